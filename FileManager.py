@@ -1,33 +1,78 @@
 import sys
-import os
-import shutil
-import pandas as pd
+import multiprocessing
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # 带参数时走命令行：在导入 Qt 之前分派，不加载任何界面模块
+    multiprocessing.freeze_support()
+    from engine import main
+    sys.exit(main(sys.argv[1:]))
+
+import time
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QFileDialog,
     QComboBox, QSpinBox, QRadioButton, QGroupBox, QVBoxLayout, QHBoxLayout,
     QFormLayout, QMessageBox, QTabWidget, QCheckBox, QDateEdit, QSizePolicy,
-    QSpacerItem
+    QSpacerItem, QProgressBar
+)
+from PyQt5.QtCore import Qt, QDate, QThread, pyqtSignal
+
+from engine import (
+    JobSpec, JobError, STYLE_MAP, COPY_STRATEGY_MAP, CONFLICT_POLICY_MAP, RENAME_SORT_MAP,
+    DURABILITY_MAP, SHARD_LAYOUT_MAP, PROFILE_MAP, parse_skip_numbers, run_job, plan_job, default_workers
 )
-from PyQt5.QtCore import Qt, QDate
-
-def number_to_style(num, style):
-    if style == "Arabic":
-        return str(num)
-    elif style == "Chinese":
-        return ''.join("零一二三四五六七八九"[int(d)] for d in str(num))
-    elif style == "Chinese_Upper":
-        return ''.join("零壹贰叁肆伍陆柒捌玖"[int(d)] for d in str(num))
-    elif style == "Circle":
-        circle_map = ['①', '②', '③', '④', '⑤', '⑥', '⑦', '⑧', '⑨', '⑩',
-                      '⑪', '⑫', '⑬', '⑭', '⑮', '⑯', '⑰', '⑱', '⑲', '⑳']
-        return circle_map[num - 1] if 1 <= num <= len(circle_map) else str(num)
-    elif style == "Roman":
-        roman_dict = {
-            1: "I", 2: "II", 3: "III", 4: "IV", 5: "V", 6: "VI",
-            7: "VII", 8: "VIII", 9: "IX", 10: "X"
-        }
-        return roman_dict.get(num, str(num))
-    return str(num)
+
+# 生成数量和起始序号的上限；生成过程是流式的，内存不随数量增长
+MAX_COUNT = 100_000_000
+MAX_START_INDEX = 999_999_999
+
+class GenerateWorker(QThread):
+    # 已完成, 总数, 已写入字节数, 每秒文件数, 预计剩余秒数
+    progress = pyqtSignal(int, int, object, float, float)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    # 进度信号最短间隔（秒），避免大批量时事件队列被刷爆
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, spec, parent=None, dry_run=False, batch=None):
+        super().__init__(parent)
+        self.spec = spec
+        self.dry_run = dry_run
+        self.batch = batch
+        self._stop = threading.Event()
+        self._started = 0.0
+        self._last_emit = 0.0
+
+    def cancel(self):
+        self._stop.set()
+
+    def run(self):
+        self._started = time.perf_counter()
+        try:
+            if self.batch is not None:
+                from batch import run_batch
+                result = run_batch(self.batch, progress=self.on_progress, should_stop=self._stop.is_set)
+            elif self.dry_run:
+                result = plan_job(self.spec, should_stop=self._stop.is_set)
+            else:
+                result = run_job(self.spec, progress=self.on_progress, should_stop=self._stop.is_set)
+        except JobError as e:
+            self.failed.emit(str(e))
+        except Exception as e:
+            self.failed.emit(f"生成失败: {e}")
+        else:
+            self.succeeded.emit(result)
+
+    def on_progress(self, done, total, bytes_written):
+        now = time.perf_counter()
+        if done < total and now - self._last_emit < self.PROGRESS_INTERVAL:
+            return
+        self._last_emit = now
+        elapsed = now - self._started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else 0.0
+        self.progress.emit(done, total, bytes_written, rate, eta)
 
 class BatchFileGenerator(QWidget):
     def __init__(self):
@@ -35,6 +80,7 @@ class BatchFileGenerator(QWidget):
         self.setWindowTitle("批量文件生成工具 - by 黄方")
         self.resize(1200, 700)
         self.setStyleSheet(self.get_stylesheet())
+        self.worker = None
         self.init_ui()
 
     def get_stylesheet(self):
@@ -137,8 +183,29 @@ class BatchFileGenerator(QWidget):
         self.btn_generate.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.btn_generate.clicked.connect(self.generate_files)
         btn_layout.addWidget(self.btn_generate)
+        self.btn_preview = QPushButton("预览文件名")
+        self.btn_preview.setMinimumHeight(40)
+        self.btn_preview.clicked.connect(self.preview_files)
+        btn_layout.addWidget(self.btn_preview)
+        self.btn_batch = QPushButton("运行任务列表")
+        self.btn_batch.setMinimumHeight(40)
+        self.btn_batch.setToolTip("从 JSON/YAML 文件读取多个任务，一次运行")
+        self.btn_batch.clicked.connect(self.run_batch_file)
+        btn_layout.addWidget(self.btn_batch)
+        self.btn_cancel = QPushButton("取消")
+        self.btn_cancel.setMinimumHeight(40)
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_generation)
+        btn_layout.addWidget(self.btn_cancel)
         main_layout.addLayout(btn_layout, 0)
 
+        # 进度
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        main_layout.addWidget(self.progress_bar, 0)
+        self.progress_label = QLabel("")
+        main_layout.addWidget(self.progress_label, 0)
+
     def init_tabs(self, tab_widget):
         # 复制文件页面
         copy_tab = QWidget()
@@ -152,6 +219,12 @@ class BatchFileGenerator(QWidget):
         self.init_create_page(create_layout)
         tab_widget.addTab(create_tab, "新建文件")
 
+        # 重命名文件页面
+        rename_tab = QWidget()
+        rename_layout = QVBoxLayout(rename_tab)
+        self.init_rename_page(rename_layout)
+        tab_widget.addTab(rename_tab, "重命名文件")
+
     def init_copy_page(self, layout):
         # 文件路径设置（复制文件页显示）
         path_group = QGroupBox("文件路径设置")
@@ -193,13 +266,28 @@ class BatchFileGenerator(QWidget):
 
         # 生成数量
         self.copy_count = QSpinBox()
-        self.copy_count.setRange(1, 1000)
+        self.copy_count.setRange(1, MAX_COUNT)
         self.copy_count.setMinimumHeight(32)
         self.copy_count.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         count_layout = QHBoxLayout()
         count_layout.addWidget(self.copy_count, stretch=1)
         path_layout.addRow("生成数量:", count_layout)
 
+        # 并发数
+        self.copy_workers = QSpinBox()
+        self.copy_workers.setRange(1, 64)
+        self.copy_workers.setValue(default_workers())
+        self.copy_workers.setMinimumHeight(32)
+        self.copy_workers.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        path_layout.addRow("并发数:", self.copy_workers)
+
+        # 复制方式
+        self.copy_strategy = QComboBox()
+        self.copy_strategy.addItems(list(COPY_STRATEGY_MAP))
+        self.copy_strategy.setMinimumHeight(32)
+        self.copy_strategy.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        path_layout.addRow("复制方式:", self.copy_strategy)
+
         path_group.setLayout(path_layout)
         layout.addWidget(path_group)
 
@@ -217,6 +305,30 @@ class BatchFileGenerator(QWidget):
         self.create_file_type.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         type_output_layout.addRow("文件类型:", self.create_file_type)
 
+        # 文档模板
+        self.doc_template = QLineEdit()
+        self.doc_template.setPlaceholderText("可选：.docx/.pptx 模板，其中的 {姓名} 等占位符会被替换")
+        self.doc_template.setMinimumHeight(32)
+        self.doc_template.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.doc_template.textChanged.connect(self.toggle_doc_template)
+        self.btn_select_doc_template = QPushButton("浏览模板")
+        self.btn_select_doc_template.setMinimumWidth(120)
+        self.btn_select_doc_template.setMinimumHeight(32)
+        self.btn_select_doc_template.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.btn_select_doc_template.clicked.connect(self.select_doc_template)
+
+        doc_template_layout = QHBoxLayout()
+        doc_template_layout.addWidget(self.btn_select_doc_template)
+        doc_template_layout.addWidget(self.doc_template, stretch=1)
+        type_output_layout.addRow("文档模板:", doc_template_layout)
+
+        # 文档内容模板
+        self.body_template = QLineEdit()
+        self.body_template.setPlaceholderText("留空则使用{数据}，可用 {序号}{日期} 及字段映射中的名称")
+        self.body_template.setMinimumHeight(32)
+        self.body_template.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        type_output_layout.addRow("文档内容:", self.body_template)
+
         # 输出目录
         self.create_output_path = QLineEdit()
         self.create_output_path.setPlaceholderText("请选择输出目录")
@@ -235,16 +347,69 @@ class BatchFileGenerator(QWidget):
 
         # 生成数量
         self.create_count = QSpinBox()
-        self.create_count.setRange(1, 1000)
+        self.create_count.setRange(1, MAX_COUNT)
         self.create_count.setMinimumHeight(32)
         self.create_count.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         count_layout = QHBoxLayout()
         count_layout.addWidget(self.create_count, stretch=1)
         type_output_layout.addRow("生成数量:", count_layout)
 
+        # 进程数，0 表示按数量自动选择
+        self.create_workers = QSpinBox()
+        self.create_workers.setRange(0, 64)
+        self.create_workers.setSpecialValueText("自动")
+        self.create_workers.setValue(0)
+        self.create_workers.setMinimumHeight(32)
+        self.create_workers.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        type_output_layout.addRow("进程数:", self.create_workers)
+
         type_output_group.setLayout(type_output_layout)
         layout.addWidget(type_output_group)
 
+    def init_rename_page(self, layout):
+        # 要重命名的目录和排序方式（重命名文件页显示）
+        rename_group = QGroupBox("重命名设置")
+        rename_layout = QFormLayout()
+        rename_layout.setSpacing(10)
+        rename_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        # 目录
+        self.rename_path = QLineEdit()
+        self.rename_path.setPlaceholderText("请选择要重命名的文件所在目录")
+        self.rename_path.setMinimumHeight(32)
+        self.rename_path.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.btn_rename_select_path = QPushButton("浏览目录")
+        self.btn_rename_select_path.setMinimumWidth(120)
+        self.btn_rename_select_path.setMinimumHeight(32)
+        self.btn_rename_select_path.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.btn_rename_select_path.clicked.connect(self.select_rename_path)
+
+        path_layout = QHBoxLayout()
+        path_layout.addWidget(self.btn_rename_select_path)
+        path_layout.addWidget(self.rename_path, stretch=1)
+        rename_layout.addRow("目录:", path_layout)
+
+        # 文件筛选
+        self.rename_pattern = QLineEdit("*")
+        self.rename_pattern.setPlaceholderText("如 *.docx，留空表示全部文件")
+        self.rename_pattern.setMinimumHeight(32)
+        self.rename_pattern.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        rename_layout.addRow("文件筛选:", self.rename_pattern)
+
+        # 排序方式
+        sort_layout = QHBoxLayout()
+        self.rename_sort = QComboBox()
+        self.rename_sort.addItems(list(RENAME_SORT_MAP))
+        self.rename_sort.setMinimumHeight(32)
+        self.rename_sort.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.rename_reverse = QCheckBox("倒序")
+        sort_layout.addWidget(self.rename_sort, stretch=1)
+        sort_layout.addWidget(self.rename_reverse)
+        rename_layout.addRow("排序方式:", sort_layout)
+
+        rename_group.setLayout(rename_layout)
+        layout.addWidget(rename_group)
+
     def create_filename_group(self):
         group = QGroupBox("文件名规则")
         layout = QFormLayout()
@@ -258,6 +423,78 @@ class BatchFileGenerator(QWidget):
         filename_layout.addWidget(self.filename_template, stretch=1)
         layout.addRow("文件名模板:", filename_layout)
 
+        # 重名处理
+        self.conflict_policy = QComboBox()
+        self.conflict_policy.addItems(list(CONFLICT_POLICY_MAP))
+        self.conflict_policy.setMinimumHeight(32)
+        self.conflict_policy.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        layout.addRow("重名处理:", self.conflict_policy)
+
+        # 分子目录：文件很多时分散到多个子目录，并在输出目录写出 manifest.csv
+        shard_layout = QHBoxLayout()
+        self.shard_layout = QComboBox()
+        self.shard_layout.addItems(list(SHARD_LAYOUT_MAP))
+        self.shard_layout.setMinimumHeight(32)
+        self.shard_layout.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.shard_layout.currentTextChanged.connect(self.toggle_shard_size)
+        self.shard_size = QSpinBox()
+        self.shard_size.setRange(1, 1_000_000)
+        self.shard_size.setValue(1000)
+        self.shard_size.setSuffix(" 个/目录")
+        self.shard_size.setMinimumHeight(32)
+        self.shard_size.setEnabled(False)
+        shard_layout.addWidget(self.shard_layout, stretch=1)
+        shard_layout.addWidget(self.shard_size)
+        layout.addRow("子目录:", shard_layout)
+
+        # 输出到压缩包：所有文件直接写进一个 .zip/.tar(.gz/.zst)，不写输出目录
+        archive_layout = QHBoxLayout()
+        self.enable_archive = QCheckBox("输出为压缩包")
+        self.enable_archive.stateChanged.connect(self.toggle_archive)
+        self.archive_path = QLineEdit()
+        self.archive_path.setPlaceholderText("如 输出.zip，也支持 .tar、.tar.gz、.tar.zst")
+        self.archive_path.setMinimumHeight(32)
+        self.archive_path.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.archive_path.setEnabled(False)
+        self.btn_select_archive = QPushButton("浏览")
+        self.btn_select_archive.setMinimumHeight(32)
+        self.btn_select_archive.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.btn_select_archive.setEnabled(False)
+        self.btn_select_archive.clicked.connect(self.select_archive)
+        archive_layout.addWidget(self.enable_archive)
+        archive_layout.addWidget(self.archive_path, stretch=1)
+        archive_layout.addWidget(self.btn_select_archive)
+        layout.addRow("压缩包:", archive_layout)
+
+        # 落盘方式：文件总是先写临时文件再改名，这里选择何时强制同步到磁盘
+        self.durability = QComboBox()
+        self.durability.addItems(list(DURABILITY_MAP))
+        self.durability.setMinimumHeight(32)
+        self.durability.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        layout.addRow("落盘方式:", self.durability)
+
+        # 断点续传：中断后用相同设置重新生成时跳过已完成的文件
+        resume_layout = QHBoxLayout()
+        self.resume = QCheckBox("记录进度，中断后重新生成时跳过已完成的文件")
+        self.resume.stateChanged.connect(self.toggle_resume)
+        self.verify_checksum = QCheckBox("按校验和核对（较慢）")
+        self.verify_checksum.setEnabled(False)
+        resume_layout.addWidget(self.resume)
+        resume_layout.addWidget(self.verify_checksum)
+        resume_layout.addStretch(1)
+        layout.addRow("断点续传:", resume_layout)
+
+        # 性能统计：完成提示中总会显示简要统计，这里选择是否保存报告和是否分析
+        report_layout = QHBoxLayout()
+        self.save_report = QCheckBox("保存性能报告")
+        self.profile_mode = QComboBox()
+        self.profile_mode.addItems(list(PROFILE_MAP))
+        self.profile_mode.setMinimumHeight(32)
+        report_layout.addWidget(self.save_report)
+        report_layout.addWidget(self.profile_mode)
+        report_layout.addStretch(1)
+        layout.addRow("性能统计:", report_layout)
+
         group.setLayout(layout)
         return group
 
@@ -269,7 +506,7 @@ class BatchFileGenerator(QWidget):
 
         # 起始序号
         self.start_index = QSpinBox()
-        self.start_index.setRange(1, 999)
+        self.start_index.setRange(1, MAX_START_INDEX)
         self.start_index.setMinimumHeight(32)
         self.start_index.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         layout.addRow("起始序号:", self.start_index)
@@ -301,6 +538,13 @@ class BatchFileGenerator(QWidget):
         skip_multiples_layout.addWidget(self.skip_multiples, stretch=1)
         layout.addRow("跳过倍数:", skip_multiples_layout)
 
+        # 跳过含有指定数字的序号
+        self.skip_digits = QLineEdit()
+        self.skip_digits.setPlaceholderText("如 4 表示跳过 4、14、40…")
+        self.skip_digits.setMinimumHeight(32)
+        self.skip_digits.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        layout.addRow("跳过含数字:", self.skip_digits)
+
         group.setLayout(layout)
         group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         return group
@@ -358,6 +602,18 @@ class BatchFileGenerator(QWidget):
         self.excel_col.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         data_settings_layout.addRow("列号（从1开始）:", self.excel_col)
 
+        # 多列字段映射
+        self.data_fields = QLineEdit()
+        self.data_fields.setPlaceholderText("如 姓名=1, 部门=3；留空则按列号读取{数据}")
+        self.data_fields.setToolTip("每项为 名称=列号 或 表头中的列名，文件名和文档内容中用 {名称} 引用；"
+                                    "填 * 则表头中的每一列都可用")
+        self.data_fields.setMinimumHeight(32)
+        self.data_fields.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        data_settings_layout.addRow("字段映射:", self.data_fields)
+
+        self.data_header = QCheckBox("第一行是表头")
+        data_settings_layout.addRow(self.data_header)
+
         self.data_settings.setLayout(data_settings_layout)
         layout.addRow(self.data_settings)
 
@@ -404,6 +660,16 @@ class BatchFileGenerator(QWidget):
     def toggle_skip_multiples(self, state):
         self.skip_multiples.setEnabled(state == Qt.Checked)
 
+    def toggle_shard_size(self, text):
+        self.shard_size.setEnabled(SHARD_LAYOUT_MAP[text] == "bucket")
+
+    def toggle_archive(self, state):
+        self.archive_path.setEnabled(state == Qt.Checked)
+        self.btn_select_archive.setEnabled(state == Qt.Checked)
+
+    def toggle_resume(self, state):
+        self.verify_checksum.setEnabled(state == Qt.Checked)
+
     def toggle_data_settings(self, state):
         self.data_settings.setEnabled(state == Qt.Checked)
         if state == Qt.Checked:
@@ -437,141 +703,223 @@ class BatchFileGenerator(QWidget):
         if path:
             self.create_output_path.setText(path)
 
+    def select_rename_path(self):
+        path = QFileDialog.getExistingDirectory(self, "选择要重命名的目录")
+        if path:
+            self.rename_path.setText(path)
+
+    def select_archive(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "保存压缩包", "", "压缩包 (*.zip *.tar *.tar.gz *.tgz *.tar.zst)"
+        )
+        if path:
+            self.archive_path.setText(path)
+
+    def select_doc_template(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择文档模板", "", "Word/PowerPoint 文件 (*.docx *.pptx)")
+        if path:
+            self.doc_template.setText(path)
+
+    def toggle_doc_template(self, text):
+        # 使用模板时文件类型和文档内容都由模板决定
+        self.create_file_type.setEnabled(not text)
+        self.body_template.setEnabled(not text)
+
     def select_excel(self):
-        path, _ = QFileDialog.getOpenFileName(self, "选择Excel文件", "", "Excel 文件 (*.xlsx *.xls)")
+        path, _ = QFileDialog.getOpenFileName(self, "选择Excel文件", "", "Excel/CSV 文件 (*.xlsx *.xlsm *.xls *.csv *.tsv)")
         if path:
             self.excel_path.setText(path)
 
     def parse_skip_numbers(self, text):
-        if not text:
-            return []
-        numbers = set()
-        parts = text.split(",")
-        for part in parts:
-            if "-" in part:
-                start, end = map(int, part.split("-"))
-                numbers.update(range(start, end + 1))
-            else:
-                numbers.add(int(part))
-        return list(numbers)
+        return parse_skip_numbers(text)
 
-    def generate_files(self):
-        from docx import Document
-        from pptx import Presentation
-
-        tab_index = self.tab_widget.currentIndex()
-        mode = "copy" if tab_index == 0 else "create"
+    def build_job_spec(self):
+        mode = ("copy", "create", "rename")[self.tab_widget.currentIndex()]
 
+        spec = JobSpec(mode=mode)
         # 获取路径和文件类型
         if mode == "copy":
-            source_path = self.copy_source_path.text()
-            output_path = self.copy_output_path.text()
-            file_type = ""
-            count = self.copy_count.value()
+            spec.source_path = self.copy_source_path.text()
+            spec.output_path = self.copy_output_path.text()
+            spec.count = self.copy_count.value()
+            spec.workers = self.copy_workers.value()
+            spec.copy_strategy = COPY_STRATEGY_MAP[self.copy_strategy.currentText()]
+        elif mode == "create":
+            spec.output_path = self.create_output_path.text()
+            spec.file_type = self.create_file_type.currentText()
+            spec.count = self.create_count.value()
+            spec.workers = self.create_workers.value()
+            spec.body_template = self.body_template.text()
+            spec.doc_template = self.doc_template.text()
         else:
-            source_path = ""
-            output_path = self.create_output_path.text()
-            file_type = self.create_file_type.currentText()
-            count = self.create_count.value()
+            # 数量由目录中的文件数决定
+            spec.output_path = self.rename_path.text()
+            spec.rename_pattern = self.rename_pattern.text() or "*"
+            spec.rename_sort = RENAME_SORT_MAP[self.rename_sort.currentText()]
+            spec.rename_reverse = self.rename_reverse.isChecked()
 
-        filename_template = self.filename_template.text()
-        start = self.start_index.value()
+        spec.filename_template = self.filename_template.text()
+        spec.start_index = self.start_index.value()
+        spec.number_style = STYLE_MAP[self.number_style.currentText()]
 
         # 数据源设置
-        data_source = "excel" if self.data_source_excel.isChecked() else "manual"
-        manual_data = self.manual_data.text()
-        excel_path = self.excel_path.text()
-        excel_col = self.excel_col.value() - 1  # Excel列从0开始
+        spec.enable_data = self.enable_data.isChecked()
+        spec.data_source = "excel" if self.data_source_excel.isChecked() else "manual"
+        spec.manual_data = self.manual_data.text()
+        spec.excel_path = self.excel_path.text()
+        spec.excel_col = self.excel_col.value() - 1  # Excel列从0开始
+        spec.data_fields = self.data_fields.text()
+        spec.data_header = self.data_header.isChecked()
+
+        spec.use_date = self.use_date.isChecked()
+        spec.date_text = self.date_picker.date().toString(self.date_format.currentText()) if spec.use_date else ""
+
+        spec.skip_numbers = self.skip_numbers.text()
+        spec.skip_multiples = self.skip_multiples.value() if self.enable_skip_multiples.isChecked() else 0
+        spec.skip_digits = self.skip_digits.text()
+        spec.conflict_policy = CONFLICT_POLICY_MAP[self.conflict_policy.currentText()]
+        spec.shard_layout = SHARD_LAYOUT_MAP[self.shard_layout.currentText()]
+        spec.shard_size = self.shard_size.value()
+        if mode != "rename" and self.enable_archive.isChecked():
+            spec.archive_path = self.archive_path.text()
+        spec.durability = DURABILITY_MAP[self.durability.currentText()]
+        spec.resume = self.resume.isChecked()
+        spec.verify = "checksum" if self.verify_checksum.isChecked() else "stat"
+        spec.save_report = self.save_report.isChecked()
+        spec.profile = PROFILE_MAP[self.profile_mode.currentText()]
+        return spec
 
-        use_date = self.use_date.isChecked()
-        selected_date = self.date_picker.date().toString(self.date_format.currentText()) if use_date else ""
+    def generate_files(self):
+        self.start_worker(dry_run=False)
 
-        skip_numbers = self.parse_skip_numbers(self.skip_numbers.text())
-        skip_multiples = self.skip_multiples.value() if self.enable_skip_multiples.isChecked() else 0
+    def preview_files(self):
+        self.start_worker(dry_run=True)
 
-        # 验证输入
-        if not output_path:
-            QMessageBox.critical(self, "错误", "请选择输出目录")
+    def run_batch_file(self):
+        if self.worker is not None:
             return
-        if mode == "copy" and not source_path:
-            QMessageBox.critical(self, "错误", "请选择源文件")
+        path, _ = QFileDialog.getOpenFileName(self, "选择任务列表", "", "任务列表 (*.json *.yaml *.yml)")
+        if not path:
             return
+        from batch import load_batch
+        try:
+            jobs = load_batch(path)
+        except JobError as e:
+            QMessageBox.critical(self, "错误", str(e))
+            return
+        self.start_worker(dry_run=False, batch=jobs)
 
-        os.makedirs(output_path, exist_ok=True)
-
-        # 获取数据
-        data_list = []
-        if self.enable_data.isChecked():
-            if data_source == "excel":
-                if not excel_path:
-                    QMessageBox.critical(self, "错误", "请选择Excel文件")
-                    return
-                try:
-                    df = pd.read_excel(excel_path, header=None)
-                    data_list = df.iloc[:, excel_col].dropna().tolist()
-                    if len(data_list) < count:
-                        QMessageBox.critical(self, "错误", "Excel 中的数据数量不足")
-                        return
-                except Exception as e:
-                    QMessageBox.critical(self, "错误", f"读取Excel失败: {e}")
-                    return
-            else:
-                if not manual_data:
-                    QMessageBox.critical(self, "错误", "请输入数据或从Excel导入")
-                    return
-                data_list = [manual_data] * count
-
-        # 映射中文样式为英文标识符
-        style_map = {
-            "阿拉伯数字": "Arabic",
-            "汉字小写": "Chinese",
-            "汉字大写": "Chinese_Upper",
-            "带圈数字": "Circle",
-            "罗马数字": "Roman"
-        }
-        selected_style = style_map[self.number_style.currentText()]
-
-        # 生成文件
-        generated_count = 0
-        i = start
-        while generated_count < count:
-            if i in skip_numbers or (skip_multiples and i % skip_multiples == 0):
-                i += 1
-                continue
-            index_str = number_to_style(i, selected_style)
-            current_data = data_list[generated_count] if self.enable_data.isChecked() else ""
-            filename = filename_template.replace("{序号}", index_str)
-            if self.enable_data.isChecked():
-                filename = filename.replace("{数据}", str(current_data))
-            if use_date:
-                filename = filename.replace("{日期}", selected_date)
-            full_path = os.path.join(output_path, filename)
-
-            if mode == "copy":
-                if not os.path.exists(source_path):
-                    QMessageBox.critical(self, "错误", "源文件不存在")
-                    return
-                _, ext = os.path.splitext(source_path)
-                full_path += ext
-                shutil.copy2(source_path, full_path)
-            elif mode == "create":
-                full_path += file_type
-                if file_type == ".docx":
-                    doc = Document()
-                    doc.add_heading(current_data, 0)
-                    doc.save(full_path)
-                elif file_type == ".pptx":
-                    prs = Presentation()
-                    slide = prs.slides.add_slide(prs.slide_layouts[0])
-                    slide.shapes.title.text = current_data
-                    prs.save(full_path)
-
-            generated_count += 1
-            i += 1
-
-        QMessageBox.information(self, "完成", f"已生成 {count} 个文件到 {output_path}")
+    def start_worker(self, dry_run, batch=None):
+        if self.worker is not None:
+            return
+        spec = self.build_job_spec() if batch is None else None
+        self.progress_bar.setRange(0, spec.count if spec else 0)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("正在检查文件名..." if dry_run else "正在生成...")
+        self.btn_generate.setEnabled(False)
+        self.btn_preview.setEnabled(False)
+        self.btn_batch.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+
+        self.worker = GenerateWorker(spec, self, dry_run=dry_run, batch=batch)
+        self.worker.progress.connect(self.on_generate_progress)
+        if batch is not None:
+            self.worker.succeeded.connect(self.on_batch_succeeded)
+        elif dry_run:
+            self.worker.succeeded.connect(self.on_preview_succeeded)
+        else:
+            self.worker.succeeded.connect(self.on_generate_succeeded)
+        self.worker.failed.connect(self.on_generate_failed)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def cancel_generation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.btn_cancel.setEnabled(False)
+            self.progress_label.setText("正在取消，当前文件完成后停止...")
+
+    def on_generate_progress(self, done, total, bytes_written, rate, eta):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_label.setText(
+            f"已完成 {done}/{total} 个文件，已写入 {bytes_written / 1024 / 1024:.1f} MB，"
+            f"{rate:.1f} 个/秒，预计剩余 {eta:.0f} 秒"
+        )
+
+    def on_generate_succeeded(self, result):
+        title = "已取消" if result.cancelled else "完成"
+        if self.worker.spec.mode == "rename":
+            message = f"已重命名 {result.created} 个文件，用时 {result.elapsed:.2f} 秒"
+        else:
+            message = f"已生成 {result.created} 个文件到 {result.output_path}，用时 {result.elapsed:.2f} 秒"
+        if result.cancelled:
+            message = "已取消，" + message
+        if result.resumed:
+            message += f"\n续传跳过已完成的 {result.resumed} 个文件"
+        if result.skipped:
+            message += f"\n因重名跳过 {result.skipped} 个文件"
+        if result.failed:
+            shown = "\n".join(f"{e['path']}: {e['error']}" for e in result.errors[:10])
+            message += f"\n\n{result.failed} 个文件失败:\n{shown}"
+        if result.error:
+            title = "未完成"
+            message += f"\n\n{result.error}，已停止"
+        if result.stats:
+            from stats import format_summary
+            message += "\n\n" + format_summary(result.stats)
+        self.progress_label.setText(title)
+        if result.failed or result.error:
+            QMessageBox.warning(self, title, message)
+        else:
+            QMessageBox.information(self, title, message)
+
+    def on_batch_succeeded(self, result):
+        from batch import format_batch
+        title = "已取消" if result.cancelled else "完成"
+        self.progress_label.setText(title)
+        if result.failed:
+            QMessageBox.warning(self, title, format_batch(result))
+        else:
+            QMessageBox.information(self, title, format_batch(result))
+
+    def on_preview_succeeded(self, report):
+        self.progress_label.setText("")
+        if report.cancelled:
+            return
+        lines = report.preview[:20]
+        if report.total > len(lines):
+            lines.append(f"……共 {report.total} 个文件")
+        if report.duplicate_count:
+            lines.append(f"\n批次内重名 {report.duplicate_count} 个，如: {', '.join(report.duplicates[:5])}")
+        if report.existing_count:
+            lines.append(f"\n与输出目录已有文件重名 {report.existing_count} 个，如: {', '.join(report.existing[:5])}")
+        if report.conflict:
+            lines.append("\n当前重名处理方式为覆盖，生成时将报错，请修改文件名模板或重名处理方式")
+            QMessageBox.warning(self, "预览", "\n".join(lines))
+        else:
+            QMessageBox.information(self, "预览", "\n".join(lines))
+
+    def on_generate_failed(self, message):
+        self.progress_label.setText("")
+        QMessageBox.critical(self, "错误", message)
+
+    def on_worker_finished(self):
+        self.worker = None
+        self.btn_generate.setEnabled(True)
+        self.btn_preview.setEnabled(True)
+        self.btn_batch.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+
+    def closeEvent(self, event):
+        # 关闭窗口时让后台线程在当前文件后停下
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = BatchFileGenerator()
     window.show()
@@ -0,0 +1,234 @@
+import os
+import time
+import zlib
+import struct
+import tempfile
+
+from atomic import temp_path, fsync_path, fsync_dir
+
+# 压缩包扩展名 -> 格式
+ARCHIVE_FORMATS = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar.gz",
+    ".tgz": "tar.gz",
+    ".tar.zst": "tar.zst",
+    ".tzst": "tar.zst",
+}
+
+# 本身已经压缩过的格式，存入 zip 时不再压缩
+COMPRESSED_EXTS = {
+    ".docx", ".pptx", ".xlsx", ".zip", ".gz", ".7z", ".rar", ".zst",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp3", ".mp4", ".mkv",
+}
+
+# 中央目录超过该大小时转存到临时文件，内存不随文件数增长
+_CENTRAL_SPOOL = 8 * 1024 * 1024
+
+_ZIP32_MAX = 0xFFFFFFFF
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_END_ARCHIVE = struct.Struct("<4s4H2LH")
+_END_ARCHIVE64 = struct.Struct("<4sQ2H2L4Q")
+_END_ARCHIVE64_LOCATOR = struct.Struct("<4sLQL")
+
+
+def archive_format(path):
+    """按扩展名判断压缩包格式，不是压缩包时返回 None"""
+    lower = path.lower()
+    for ext, fmt in ARCHIVE_FORMATS.items():
+        if lower.endswith(ext):
+            return fmt
+    return None
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (0 << 9) | (1 << 5) | 1
+    return (t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2,
+            (t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday)
+
+
+class Blob:
+    """准备好写入 zip 的一份内容：压缩（或原样存储）和 CRC 只计算一次，可重复写入"""
+
+    def __init__(self, data, compress):
+        self.data = data
+        self.usize = len(data)
+        self.crc = zlib.crc32(data)
+        if compress:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            self.raw = compressor.compress(data) + compressor.flush()
+            self.method = 8
+        else:
+            self.raw = data
+            self.method = 0
+
+
+class _ZipStream:
+    """顺序写出的 zip，成员的压缩数据由调用方提供（支持 ZIP64）"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.offset = 0
+        self.count = 0
+        self.central = tempfile.SpooledTemporaryFile(max_size=_CENTRAL_SPOOL)
+
+    def add(self, name, blob, mtime, mode):
+        name = name.encode("utf-8")
+        dostime, dosdate = _dos_datetime(mtime)
+        csize = len(blob.raw)
+        big = blob.usize >= _ZIP32_MAX or csize >= _ZIP32_MAX
+        version = 45 if big or self.offset >= _ZIP32_MAX else 20
+
+        local_extra = struct.pack("<2H2Q", 1, 16, blob.usize, csize) if big else b""
+        sizes = (_ZIP32_MAX, _ZIP32_MAX) if big else (csize, blob.usize)
+        self.fp.write(_LOCAL_HEADER.pack(
+            b"PK\003\004", version, 0, 0x800, blob.method, dostime, dosdate,
+            blob.crc, sizes[0], sizes[1], len(name), len(local_extra)
+        ))
+        self.fp.write(name)
+        self.fp.write(local_extra)
+        self.fp.write(blob.raw)
+
+        # 中央目录中超出 32 位的字段放到 ZIP64 扩展字段里
+        fields = []
+        usize = csize_field = offset = None
+        if blob.usize >= _ZIP32_MAX:
+            fields.append(blob.usize)
+            usize = _ZIP32_MAX
+        if csize >= _ZIP32_MAX:
+            fields.append(csize)
+            csize_field = _ZIP32_MAX
+        if self.offset >= _ZIP32_MAX:
+            fields.append(self.offset)
+            offset = _ZIP32_MAX
+        extra = struct.pack(f"<2H{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+        self.central.write(_CENTRAL_DIR.pack(
+            b"PK\001\002", version, 3, version, 0, 0x800, blob.method, dostime, dosdate,
+            blob.crc, csize if csize_field is None else csize_field,
+            blob.usize if usize is None else usize,
+            len(name), len(extra), 0, 0, 0, (0o100000 | mode & 0o7777) << 16,
+            self.offset if offset is None else offset
+        ))
+        self.central.write(name)
+        self.central.write(extra)
+        self.offset += _LOCAL_HEADER.size + len(name) + len(local_extra) + csize
+        self.count += 1
+
+    def close(self):
+        start = self.offset
+        self.central.seek(0)
+        while True:
+            block = self.central.read(1024 * 1024)
+            if not block:
+                break
+            self.fp.write(block)
+        size = self.central.tell()
+        self.central.close()
+        count, size32, start32 = self.count, size, start
+        if count >= 0xFFFF or size >= _ZIP32_MAX or start >= _ZIP32_MAX:
+            end64 = start + size
+            self.fp.write(_END_ARCHIVE64.pack(
+                b"PK\006\006", _END_ARCHIVE64.size - 12, 45, 45, 0, 0, count, count, size, start
+            ))
+            self.fp.write(_END_ARCHIVE64_LOCATOR.pack(b"PK\006\007", 0, end64, 1))
+            count = min(count, 0xFFFF)
+            size32 = min(size, _ZIP32_MAX)
+            start32 = min(start, _ZIP32_MAX)
+        self.fp.write(_END_ARCHIVE.pack(b"PK\005\006", 0, 0, count, count, size32, start32, 0))
+
+
+class _ViewReader:
+    # 给 tarfile 读取的只读文件对象，按块切片，不复制整份内容
+    def __init__(self, data):
+        self.view = memoryview(data)
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else self.pos + size
+        chunk = self.view[self.pos:end]
+        self.pos += len(chunk)
+        return chunk
+
+
+class _TarBlob:
+    # tar 不需要预先压缩，只保存内容
+    def __init__(self, data):
+        self.data = data
+
+
+class ArchiveWriter:
+    """把生成的文件直接写进一个 .zip 或 .tar(.gz/.zst) 压缩包
+
+    先写到同目录的临时文件，close() 时替换为最终文件名；abort() 丢弃临时文件。
+    zip 中的成员用 Blob 提供，已压缩的内容（docx/pptx 等）原样存储，
+    同一份内容（复制模式的源文件）只压缩一次。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = archive_format(path)
+        if self.format is None:
+            raise ValueError(f"不支持的压缩包格式: {path}")
+        self._tmp = temp_path(os.path.abspath(path))
+        self._file = open(self._tmp, "wb")
+        self._zip = self._tar = self._zstd = None
+        try:
+            if self.format == "zip":
+                self._zip = _ZipStream(self._file)
+                return
+            import tarfile
+            if self.format == "tar.zst":
+                try:
+                    import zstandard
+                except ImportError:
+                    raise ValueError("写入 .tar.zst 需要安装 zstandard")
+                self._zstd = zstandard.ZstdCompressor().stream_writer(self._file, closefd=False)
+                self._tar = tarfile.open(fileobj=self._zstd, mode="w|")
+            else:
+                self._tar = tarfile.open(fileobj=self._file, mode="w|gz" if self.format == "tar.gz" else "w|")
+        except BaseException:
+            self.abort()
+            raise
+
+    def blob(self, data, name=""):
+        """为 data 准备一份可重复写入的内容"""
+        if self._zip is None:
+            return _TarBlob(data)
+        ext = os.path.splitext(name)[1].lower()
+        return Blob(data, compress=ext not in COMPRESSED_EXTS)
+
+    def add(self, name, blob, mtime, mode=0o644):
+        if self._zip is not None:
+            self._zip.add(name, blob, mtime, mode)
+            return
+        import tarfile
+        info = tarfile.TarInfo(name)
+        info.size = len(blob.data)
+        info.mtime = int(mtime)
+        info.mode = mode & 0o7777
+        self._tar.addfile(info, _ViewReader(blob.data))
+
+    def close(self, fsync=False):
+        """写完压缩包并替换为最终文件名"""
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+        if self._zstd is not None:
+            self._zstd.close()
+        self._file.close()
+        if fsync:
+            fsync_path(self._tmp)
+        os.replace(self._tmp, self.path)
+        if fsync:
+            fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
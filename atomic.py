@@ -0,0 +1,149 @@
+import os
+import itertools
+import threading
+
+# 落盘方式：不强制落盘 / 每个文件落盘 / 每批统一落盘
+DURABILITY_LEVELS = ("none", "file", "batch")
+
+# "batch" 方式下每写完这么多文件统一同步一次
+SYNC_BATCH_SIZE = 1000
+
+# 临时文件名前缀；不带原扩展名，监视目录的程序按扩展名筛选时看不到写了一半的文件
+TEMP_PREFIX = ".fm_tmp_"
+
+_counter = itertools.count()
+
+
+def temp_path(final_path):
+    """与最终文件同目录的临时文件名，os.replace 才能原子地改名"""
+    directory = os.path.dirname(final_path)
+    return os.path.join(directory, f"{TEMP_PREFIX}{os.getpid()}_{next(_counter)}.tmp")
+
+
+def fsync_path(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_dir(directory):
+    # 目录项（改名）落盘；Windows 不能打开目录，跳过
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(final_path, produce, fsync=False):
+    """produce(路径) 把内容写到临时文件，完成后替换为 final_path
+
+    中途出错或进程被杀时 final_path 不会出现写了一半的文件；出错时删除临时文件。
+    fsync 为真时在替换前把文件内容落盘。
+    """
+    tmp = temp_path(final_path)
+    try:
+        produce(tmp)
+        if fsync:
+            fsync_path(tmp)
+        os.replace(tmp, final_path)
+        # 两个名字已是同一个文件时（如再次硬链接到同一源文件）replace 什么也不做，临时名还在
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Windows 上没有不影响进程的探测方式，其他进程的临时文件都当作遗留的
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def sweep_temp(directory):
+    """删除目录中崩溃或被杀的进程留下的临时文件，返回删除的个数
+
+    临时文件名中带有写入进程的 pid，仍在运行的进程的临时文件不动。
+    """
+    removed = 0
+    try:
+        it = os.scandir(directory)
+    except FileNotFoundError:
+        return removed
+    with it:
+        for entry in it:
+            if not entry.name.startswith(TEMP_PREFIX):
+                continue
+            pid = entry.name[len(TEMP_PREFIX):].partition("_")[0]
+            if pid.isdigit() and _pid_alive(int(pid)):
+                continue
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                continue
+            removed += 1
+    return removed
+
+
+class BatchSync:
+    """按落盘方式在主线程中统一同步
+
+    - "file"：每个文件已在替换前落盘，结束时同步一次用到的目录
+    - "batch"：每 SYNC_BATCH_SIZE 个文件同步一次文件内容和用到的目录
+    - "none"：不做任何同步
+    """
+
+    def __init__(self, directory, durability="none"):
+        self.directory = directory
+        self.durability = durability
+        self._pending = []
+        # 分片输出时文件分布在多个子目录中，每个目录都要同步
+        self._dirs = {directory}
+        self._lock = threading.Lock()
+
+    def committed(self, path):
+        if self.durability == "none":
+            return
+        with self._lock:
+            self._dirs.add(os.path.dirname(path))
+            if self.durability != "batch":
+                return
+            self._pending.append(path)
+            if len(self._pending) >= SYNC_BATCH_SIZE:
+                self._sync()
+
+    def _sync_dirs(self):
+        for directory in self._dirs:
+            fsync_dir(directory)
+
+    def _sync(self):
+        # 只同步本任务写的文件，不用 os.sync 刷整台机器的所有文件系统
+        for path in self._pending:
+            try:
+                fsync_path(path)
+            except OSError:
+                pass
+        self._sync_dirs()
+        self._pending = []
+        self._dirs = {self.directory}
+
+    def close(self):
+        if self.durability == "batch":
+            with self._lock:
+                self._sync()
+        elif self.durability == "file":
+            self._sync_dirs()
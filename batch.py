@@ -0,0 +1,323 @@
+"""批量任务：从 JSON/YAML 任务列表读取多个复制/新建/重命名任务，在一个进程中运行
+
+任务列表格式（YAML 示例，JSON 结构相同）::
+
+    defaults:                 # 所有任务共用的参数，任务中可以覆盖
+      excel_path: 名单.xlsx
+      data_header: true
+    jobs:
+      - name: 通知
+        mode: create
+        output_path: 输出/通知
+        doc_template: 通知模板.docx
+        count: 200
+      - mode: copy
+        source_path: 表格.xlsx
+        output_path: 输出/表格
+        count: 200
+        after: [通知]           # 可选：显式指定要等待的任务
+
+键与 engine.JobSpec 的字段相同；相对路径相对于任务列表所在目录。
+"""
+import os
+import sys
+import time
+import threading
+from dataclasses import dataclass, field, fields
+
+import caches
+from engine import JobSpec, JobError, run_job
+
+# 任务列表中表示路径的字段
+PATH_FIELDS = ("source_path", "output_path", "excel_path", "archive_path", "doc_template")
+
+# 复制和重命名主要等待磁盘，新建主要消耗 CPU（在子进程中渲染），两类任务分开排队、同时运行
+LANES = {"copy": "io", "rename": "io", "create": "cpu"}
+
+_SPEC_FIELDS = {f.name: f for f in fields(JobSpec)}
+
+
+@dataclass
+class BatchJob:
+    name: str
+    spec: JobSpec
+    after: list = field(default_factory=list)    # 必须先完成的任务（下标）
+    status: str = "pending"                      # pending / done / failed / cancelled / blocked
+    result: object = None                        # engine.JobResult
+    error: str = ""
+
+    @property
+    def lane(self):
+        return LANES[self.spec.mode]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "mode": self.spec.mode,
+            "status": self.status,
+            "error": self.error,
+            "result": self.result.to_dict() if self.result is not None else None,
+        }
+
+
+@dataclass
+class BatchResult:
+    jobs: list
+    elapsed: float = 0.0
+    cache: dict = field(default_factory=dict)    # 各缓存的命中、淘汰统计，见 caches.summary
+
+    @property
+    def cancelled(self):
+        return any(job.status == "cancelled" for job in self.jobs)
+
+    @property
+    def failed(self):
+        return sum(1 for job in self.jobs if job.status in ("failed", "blocked"))
+
+    def to_dict(self):
+        return {
+            "elapsed": self.elapsed,
+            "jobs": [job.to_dict() for job in self.jobs],
+            "cache": self.cache,
+        }
+
+
+def _read_file(path):
+    try:
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+    except OSError as e:
+        raise JobError(f"无法读取任务列表: {e}")
+    if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise JobError("读取 YAML 任务列表需要安装 PyYAML")
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise JobError(f"任务列表格式错误: {e}")
+    import json
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise JobError(f"任务列表格式错误: {e}")
+
+
+def _make_spec(values, label, base_dir):
+    spec = JobSpec()
+    for key, value in values.items():
+        f = _SPEC_FIELDS.get(key)
+        if f is None:
+            raise JobError(f"{label}: 未知的参数 {key}")
+        default = f.default
+        # bool 是 int 的子类，true/false 不能当作数量
+        if not isinstance(value, type(default)) or isinstance(value, bool) != isinstance(default, bool):
+            raise JobError(f"{label}: 参数 {key} 的类型应为 {type(default).__name__}")
+        if key in PATH_FIELDS and value:
+            value = os.path.normpath(os.path.join(base_dir, os.path.expanduser(value)))
+        setattr(spec, key, value)
+    if spec.mode not in LANES:
+        raise JobError(f"{label}: 未知的生成模式 {spec.mode}")
+    return spec
+
+
+def load_batch(path):
+    """读取任务列表，返回 BatchJob 列表（已确定依赖关系）"""
+    data = _read_file(path)
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise JobError("任务列表中缺少 jobs")
+    defaults = data.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise JobError("defaults 必须是参数表")
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    names = {}
+    for index, entry in enumerate(data["jobs"]):
+        if not isinstance(entry, dict):
+            raise JobError(f"第 {index + 1} 个任务必须是参数表")
+        entry = dict(entry)
+        name = str(entry.pop("name", "") or f"任务{index + 1}")
+        after = entry.pop("after", [])
+        if isinstance(after, str):
+            after = [after]
+        if name in names:
+            raise JobError(f"任务名重复: {name}")
+        spec = _make_spec({**defaults, **entry}, name, base_dir)
+        deps = set()
+        for other in after:
+            if other not in names:
+                raise JobError(f"{name}: after 中的任务 {other} 不存在或不在它之前")
+            deps.add(names[other])
+        names[name] = index
+        jobs.append(BatchJob(name, spec, sorted(deps)))
+    _link_paths(jobs)
+    return jobs
+
+
+def _outputs(spec):
+    return [os.path.abspath(p) for p in (spec.archive_path or spec.output_path,) if p]
+
+
+def _inputs(spec):
+    return [os.path.abspath(p) for p in (spec.source_path, spec.excel_path, spec.doc_template) if p]
+
+
+def _inside(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _link_paths(jobs):
+    """按路径推断依赖：与前面的任务输出到同一（或嵌套的）位置、读取前面任务的输出、
+    或写到前面任务读取的位置时，必须等它完成"""
+    for k, job in enumerate(jobs):
+        mine_out, mine_in = _outputs(job.spec), _inputs(job.spec)
+        for i in range(k):
+            theirs_out, theirs_in = _outputs(jobs[i].spec), _inputs(jobs[i].spec)
+            if (any(_inside(a, b) or _inside(b, a) for a in mine_out for b in theirs_out)
+                    or any(_inside(p, root) for p in mine_in for root in theirs_out)
+                    or any(_inside(p, root) for p in theirs_in for root in mine_out)):
+                if i not in job.after:
+                    job.after.append(i)
+        job.after.sort()
+
+
+class _Progress:
+    """汇总各任务的进度，回调 progress(已完成, 总数, 已写入字节数)"""
+
+    def __init__(self, jobs, callback):
+        self.callback = callback
+        self.done = [0] * len(jobs)
+        self.total = [0 if job.spec.mode == "rename" else job.spec.count for job in jobs]
+        self.bytes = [0] * len(jobs)
+        self._lock = threading.Lock()
+
+    def update(self, index, done, total, nbytes):
+        if self.callback is None:
+            return
+        with self._lock:
+            self.done[index], self.total[index], self.bytes[index] = done, total, nbytes
+            summary = sum(self.done), sum(self.total), sum(self.bytes)
+        self.callback(*summary)
+
+    def finish(self, index):
+        self.update(index, self.total[index], self.total[index], self.bytes[index])
+
+    def for_job(self, index):
+        return lambda done, total, nbytes: self.update(index, done, total, nbytes)
+
+
+def run_batch(jobs, progress=None, should_stop=None):
+    """运行一组任务，返回 BatchResult
+
+    复制/重命名和新建任务各排一队、同时运行，磁盘等待和 CPU 渲染互相重叠；
+    同一队中按列表顺序执行，有依赖的任务等前面的任务完成后再开始。
+    某个任务失败时，依赖它的任务不运行（状态为 blocked），其余任务照常运行。
+    运行期间数据文件、源文件在各任务间共用（见 caches）。
+    """
+    done_events = [threading.Event() for _ in jobs]
+    tracker = _Progress(jobs, progress)
+    lanes = {}
+    for index, job in enumerate(jobs):
+        lanes.setdefault(job.lane, []).append(index)
+
+    def run_lane(indexes):
+        for index in indexes:
+            job = jobs[index]
+            try:
+                for dep in job.after:
+                    done_events[dep].wait()
+                if should_stop and should_stop():
+                    job.status = "cancelled"
+                    continue
+                failed = [jobs[dep].name for dep in job.after if jobs[dep].status != "done"]
+                if failed:
+                    job.status = "blocked"
+                    job.error = f"前置任务未完成: {', '.join(failed)}"
+                    continue
+                try:
+                    job.result = run_job(job.spec, tracker.for_job(index), should_stop)
+                except JobError as e:
+                    job.status, job.error = "failed", str(e)
+                except Exception as e:
+                    job.status, job.error = "failed", f"生成失败: {e}"
+                else:
+                    if job.result.cancelled:
+                        job.status = "cancelled"
+                    elif job.result.error:
+                        job.status, job.error = "failed", job.result.error
+                    elif job.result.failed:
+                        job.status, job.error = "failed", f"{job.result.failed} 个文件失败"
+                    else:
+                        job.status = "done"
+            finally:
+                tracker.finish(index)
+                done_events[index].set()
+
+    started = time.perf_counter()
+    with caches.shared():
+        threads = [threading.Thread(target=run_lane, args=(indexes,), name=f"batch-{lane}", daemon=True)
+                   for lane, indexes in lanes.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache = caches.summary()
+    return BatchResult(jobs=jobs, elapsed=time.perf_counter() - started, cache=cache)
+
+
+_STATUS_LABELS = {
+    "done": "完成",
+    "failed": "失败",
+    "cancelled": "已取消",
+    "blocked": "未运行",
+    "pending": "未运行",
+}
+
+
+def format_batch(result):
+    """每个任务一行的结果摘要"""
+    lines = []
+    for job in result.jobs:
+        line = f"{job.name}: {_STATUS_LABELS.get(job.status, job.status)}"
+        if job.result is not None:
+            line += f"，{job.result.created} 个文件，用时 {job.result.elapsed:.2f} 秒"
+        if job.error:
+            line += f"（{job.error}）"
+        lines.append(line)
+    lines.append(f"共 {len(result.jobs)} 个任务，用时 {result.elapsed:.2f} 秒")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="运行任务列表中的多个任务")
+    parser.add_argument("path", help="任务列表文件（.json/.yaml/.yml）")
+    parser.add_argument("--dry-run", action="store_true", help="只列出任务、所在队列和依赖关系")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+    try:
+        jobs = load_batch(args.path)
+    except JobError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        for job in jobs:
+            deps = "，".join(jobs[i].name for i in job.after)
+            print(f"{job.name}: {job.spec.mode}（{job.lane}）" + (f"，等待 {deps}" if deps else ""))
+        return 0
+    result = run_batch(jobs)
+    if args.json:
+        import json
+        print(json.dumps(result.to_dict(), ensure_ascii=False))
+    else:
+        print(format_batch(result))
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
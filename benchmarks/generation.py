@@ -0,0 +1,352 @@
+"""生成性能基准：复制、新建文档、读取 Excel、跳过规则、序号命名
+
+每个用例在新的解释器进程中运行（直接调用引擎，不需要显示器），记录吞吐量
+（每秒文件/行/名称数）、MB/s 和峰值内存，结果写成 JSON，便于比较两次运行：
+
+    python benchmarks/generation.py --json base.json
+    python benchmarks/generation.py --json new.json --compare base.json
+    python benchmarks/generation.py --only copy_small --scale 0.1
+
+测试数据（源文件、Excel）生成在 --workdir 中，指定同一个目录时可重复使用。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SMALL_SOURCE = 4 * 1024
+LARGE_SOURCE = 100 * 1024 * 1024
+
+STYLES = ["Arabic", "Chinese", "Chinese_Upper", "Circle", "Roman"]
+
+
+def _cases():
+    """用例名 -> (类型, 参数)，数量按 --scale 缩放"""
+    cases = {}
+    for count in (1000, 10000, 100000):
+        cases[f"copy_small_{count // 1000}k"] = ("copy", {"count": count, "size": SMALL_SOURCE})
+        cases[f"copy_100mb_{count // 1000}k"] = ("copy", {"count": count, "size": LARGE_SOURCE})
+    for file_type in (".docx", ".pptx"):
+        for count in (1000, 10000):
+            cases[f"create{file_type.replace('.', '_')}_{count // 1000}k"] = (
+                "create", {"count": count, "file_type": file_type})
+    for rows in (10000, 100000, 1000000):
+        label = f"{rows // 1000}k" if rows < 1000000 else "1m"
+        cases[f"excel_{label}"] = ("excel", {"rows": rows})
+    cases["skip_parse"] = ("skip_parse", {"count": 10000})
+    cases["skip_membership"] = ("skip_membership", {"count": 1000000})
+    for style in STYLES:
+        cases[f"naming_{style}"] = ("naming", {"count": 1000000, "style": style})
+    return cases
+
+
+def _scaled(value, scale):
+    return max(1, int(value * scale))
+
+
+# ---- 测试数据 ----
+
+def _source_file(workdir, size):
+    path = os.path.join(workdir, f"source_{size}.bin")
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        with open(path, "wb") as f:
+            remaining = size
+            while remaining:
+                block = os.urandom(min(remaining, 1024 * 1024))
+                f.write(block)
+                remaining -= len(block)
+    return path
+
+
+def _excel_file(workdir, rows):
+    path = os.path.join(workdir, f"data_{rows}.xlsx")
+    if os.path.exists(path):
+        return path
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["姓名", "部门", "编号"])
+    for n in range(rows):
+        sheet.append([f"员工{n}", f"部门{n % 37}", n])
+    tmp = path + ".tmp"
+    workbook.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def prepare(kind, params, workdir):
+    """在父进程中准备测试数据，不计入用例的时间和内存"""
+    if kind == "copy":
+        return {"source": _source_file(workdir, params["size"])}
+    if kind == "excel":
+        return {"excel": _excel_file(workdir, params["rows"])}
+    return {}
+
+
+def _free_bytes(path):
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+
+def skip_reason(kind, params, workdir):
+    """输出超出可用磁盘空间的用例跳过（大源文件按实际复制计算）"""
+    if kind != "copy":
+        return None
+    free = _free_bytes(workdir)
+    need = params["count"] * params["size"]
+    if free is not None and need > free * 0.8:
+        return f"需要约 {need / 1e9:.1f} GB，可用 {free / 1e9:.1f} GB"
+    return None
+
+
+# ---- 子进程中运行的用例 ----
+
+def _peak_rss_mb():
+    # Linux 上 ru_maxrss 会继承 fork 时父进程的内存，优先读 VmHWM（exec 后重新计算）
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_engine(spec):
+    from engine import run_job
+    started = time.perf_counter()
+    result = run_job(spec)
+    elapsed = time.perf_counter() - started
+    if result.failed:
+        raise RuntimeError(f"{result.failed} 个文件生成失败: {result.errors[:3]}")
+    return elapsed, result.created, result.bytes_written
+
+
+def bench_copy(params, data, workdir):
+    from engine import JobSpec
+    out = tempfile.mkdtemp(prefix="copy_", dir=workdir)
+    try:
+        spec = JobSpec(mode="copy", source_path=data["source"], output_path=out,
+                       count=params["count"], filename_template="f_{序号}",
+                       copy_strategy=params.get("strategy", "auto"))
+        elapsed, items, nbytes = _run_engine(spec)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+    return {"elapsed": elapsed, "items": items, "bytes": nbytes, "unit": "files"}
+
+
+def bench_create(params, data, workdir):
+    from engine import JobSpec
+    out = tempfile.mkdtemp(prefix="create_", dir=workdir)
+    try:
+        spec = JobSpec(mode="create", output_path=out, count=params["count"],
+                       file_type=params["file_type"], filename_template="f_{序号}",
+                       enable_data=True, data_source="manual", manual_data="基准测试")
+        elapsed, items, nbytes = _run_engine(spec)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+    return {"elapsed": elapsed, "items": items, "bytes": nbytes, "unit": "files"}
+
+
+def bench_excel(params, data, workdir):
+    from engine import JobSpec, load_data
+    spec = JobSpec(enable_data=True, data_source="excel", excel_path=data["excel"],
+                   data_header=True, data_fields="姓名, 部门, 编号", count=params["rows"])
+    started = time.perf_counter()
+    _, rows = load_data(spec)
+    items = sum(1 for _ in rows)
+    elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "items": items, "bytes": os.path.getsize(data["excel"]), "unit": "rows"}
+
+
+# 典型的跳过写法：零散的序号、区间，加上倍数和数字
+_SKIP_TEXT = ",".join(f"{n * 97}-{n * 97 + n % 5}" if n % 3 else str(n * 97) for n in range(1, 200))
+
+
+def bench_skip_parse(params, data, workdir):
+    from engine import parse_skip_numbers
+    count = params["count"]
+    started = time.perf_counter()
+    for _ in range(count):
+        parse_skip_numbers(_SKIP_TEXT)
+    return {"elapsed": time.perf_counter() - started, "items": count, "bytes": 0, "unit": "parses"}
+
+
+def bench_skip_membership(params, data, workdir):
+    from skip_rules import SkipRules
+    rules = SkipRules.parse(_SKIP_TEXT, multiple=7, digits="4")
+    count = params["count"]
+    started = time.perf_counter()
+    hits = sum(1 for n in range(count) if n in rules)
+    valid = rules.iter_valid(1)
+    for _ in range(count - hits):
+        next(valid)
+    return {"elapsed": time.perf_counter() - started, "items": 2 * count - hits, "bytes": 0, "unit": "checks"}
+
+
+def bench_naming(params, data, workdir):
+    # 完整的命名流程：跳过规则、序号样式、文件名模板
+    from engine import JobSpec, iter_plan, load_data
+    spec = JobSpec(mode="create", count=params["count"], number_style=params["style"],
+                   filename_template="文档_{序号}", output_path=workdir)
+    started = time.perf_counter()
+    items = sum(1 for _ in iter_plan(spec, load_data(spec)))
+    return {"elapsed": time.perf_counter() - started, "items": items, "bytes": 0, "unit": "names"}
+
+
+BENCHES = {
+    "copy": bench_copy,
+    "create": bench_create,
+    "excel": bench_excel,
+    "skip_parse": bench_skip_parse,
+    "skip_membership": bench_skip_membership,
+    "naming": bench_naming,
+}
+
+
+def child_main(payload):
+    kind, params, data, workdir = payload["kind"], payload["params"], payload["data"], payload["workdir"]
+    result = BENCHES[kind](params, data, workdir)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    print(json.dumps(result))
+
+
+# ---- 父进程 ----
+
+def run_case(kind, params, data, workdir, timeout):
+    payload = json.dumps({"kind": kind, "params": params, "data": data, "workdir": workdir})
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", payload],
+        cwd=ROOT, capture_output=True, text=True, timeout=timeout
+    )
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "子进程失败")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    elapsed = statistics.median(s["elapsed"] for s in samples)
+    items = samples[0]["items"]
+    nbytes = samples[0]["bytes"]
+    rss = [s["peak_rss_mb"] for s in samples if s["peak_rss_mb"] is not None]
+    return {
+        "unit": samples[0]["unit"],
+        "items": items,
+        "elapsed_s": elapsed,
+        "per_sec": items / elapsed if elapsed else None,
+        "mb_per_sec": nbytes / elapsed / (1024 * 1024) if nbytes and elapsed else None,
+        "peak_rss_mb": max(rss) if rss else None,
+    }
+
+
+def _fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def compare(report, base_path):
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f).get("cases", {})
+    print(f"\n与 {base_path} 比较（>1 表示更快）:")
+    for name, case in report["cases"].items():
+        old = base.get(name)
+        if not old or not case.get("per_sec") or not old.get("per_sec"):
+            continue
+        ratio = case["per_sec"] / old["per_sec"]
+        rss = ""
+        if case.get("peak_rss_mb") and old.get("peak_rss_mb"):
+            rss = f"  内存 {old['peak_rss_mb']:.0f} -> {case['peak_rss_mb']:.0f} MB"
+        print(f"  {name:<24} {ratio:6.2f}x{rss}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量各种生成方式的吞吐量和内存")
+    parser.add_argument("--only", action="append", default=[],
+                        help="只运行名称匹配的用例，可用通配符，如 copy_* ，可重复")
+    parser.add_argument("--list", action="store_true", help="列出全部用例")
+    parser.add_argument("--runs", type=int, default=1, help="每个用例的运行次数，取中位数")
+    parser.add_argument("--scale", type=float, default=1.0, help="文件数、行数等按该比例缩放")
+    parser.add_argument("--workdir", default=None, help="测试数据和输出目录，默认使用临时目录")
+    parser.add_argument("--timeout", type=float, default=3600, help="单个用例的超时时间（秒）")
+    parser.add_argument("--json", default=None, help="把结果写入该 JSON 文件")
+    parser.add_argument("--compare", default=None, help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child_main(json.loads(args.child))
+        return 0
+
+    cases = _cases()
+    if args.only:
+        cases = {name: case for name, case in cases.items()
+                 if any(fnmatch.fnmatch(name, pattern) or pattern in name for pattern in args.only)}
+    if args.list:
+        for name in cases:
+            print(name)
+        return 0
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="fm_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "scale": args.scale,
+        "runs": args.runs,
+        "cases": {},
+    }
+    failures = []
+    try:
+        for name, (kind, params) in cases.items():
+            params = {key: _scaled(value, args.scale) if key in ("count", "rows") else value
+                      for key, value in params.items()}
+            reason = skip_reason(kind, params, workdir)
+            if reason:
+                report["cases"][name] = {"skipped": reason}
+                print(f"{name:<24} 跳过: {reason}")
+                continue
+            try:
+                data = prepare(kind, params, workdir)
+                samples = [run_case(kind, params, data, workdir, args.timeout) for _ in range(args.runs)]
+            except Exception as e:
+                report["cases"][name] = {"error": str(e)}
+                failures.append(name)
+                print(f"{name:<24} 失败: {e}", file=sys.stderr)
+                continue
+            case = report["cases"][name] = summarize(samples)
+            case["params"] = params
+            print(f"{name:<24} {_fmt(case['per_sec'], ',.0f'):>12} {case['unit']}/s"
+                  f"  {_fmt(case['mb_per_sec'], ',.1f'):>9} MB/s"
+                  f"  峰值内存 {_fmt(case['peak_rss_mb'], '.0f')} MB")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
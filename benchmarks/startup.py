@@ -0,0 +1,106 @@
+"""启动开销基准：冷启动导入引擎的时间、打开主窗口的时间
+
+每次测量都在新的解释器进程中进行。超出预算或引擎导入时加载了重量级依赖时
+以非零状态退出，可以直接放进 CI：
+
+    python benchmarks/startup.py --runs 10 --json startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只导入引擎时不应被加载的模块
+HEAVY_MODULES = ["PyQt5", "pandas", "numpy", "openpyxl", "docx", "pptx", "lxml"]
+
+IMPORT_SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+import engine
+elapsed = time.perf_counter() - t
+heavy = sorted({name.split('.')[0] for name in sys.modules} & set(%r))
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+""" % (HEAVY_MODULES,)
+
+WINDOW_SNIPPET = """
+import time, json
+t = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+import FileManager
+app = QApplication([])
+window = FileManager.BatchFileGenerator()
+window.show()
+app.processEvents()
+print(json.dumps({"elapsed": time.perf_counter() - t}))
+"""
+
+
+def run_snippet(snippet, env=None):
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    wall = time.perf_counter() - started
+    data = json.loads(out.strip().splitlines()[-1])
+    data["wall"] = wall
+    return data
+
+
+def measure(snippet, runs, env=None):
+    samples = [run_snippet(snippet, env) for _ in range(runs)]
+    result = {
+        "median_ms": statistics.median(s["elapsed"] for s in samples) * 1000,
+        "max_ms": max(s["elapsed"] for s in samples) * 1000,
+        "process_median_ms": statistics.median(s["wall"] for s in samples) * 1000,
+    }
+    if "heavy" in samples[0]:
+        result["heavy_modules"] = samples[0]["heavy"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量启动开销")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的次数")
+    parser.add_argument("--import-budget-ms", type=float, default=80.0,
+                        help="导入 engine 的中位时间上限")
+    parser.add_argument("--window-budget-ms", type=float, default=1500.0,
+                        help="打开主窗口的中位时间上限")
+    parser.add_argument("--no-window", action="store_true", help="不测量主窗口（没有 PyQt5 时）")
+    parser.add_argument("--json", default=None, help="把结果写入该 JSON 文件")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "runs": args.runs}
+    failures = []
+
+    report["import_engine"] = measure(IMPORT_SNIPPET, args.runs)
+    print(f"导入 engine: {report['import_engine']['median_ms']:.1f} ms（中位）")
+    if report["import_engine"]["heavy_modules"]:
+        failures.append(f"导入 engine 时加载了: {', '.join(report['import_engine']['heavy_modules'])}")
+    if report["import_engine"]["median_ms"] > args.import_budget_ms:
+        failures.append(f"导入 engine 超出预算 {args.import_budget_ms:.0f} ms")
+
+    if not args.no_window:
+        env = dict(os.environ)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        report["first_window"] = measure(WINDOW_SNIPPET, args.runs, env)
+        print(f"打开主窗口: {report['first_window']['median_ms']:.1f} ms（中位）")
+        if report["first_window"]["median_ms"] > args.window_budget_ms:
+            failures.append(f"打开主窗口超出预算 {args.window_budget_ms:.0f} ms")
+
+    report["failures"] = failures
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    for failure in failures:
+        print(f"失败: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# 各缓存的大小上限（字节），超出时淘汰最久未用的条目
+WORKBOOK_CACHE_BYTES = 256 * 1024 * 1024
+SOURCE_CACHE_BYTES = 256 * 1024 * 1024
+TEMPLATE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class BoundedCache:
+    """按字节数限制大小的 LRU 缓存，可在多个线程中共用
+
+    条目的大小由放入方估算。单个条目超过上限时淘汰其余全部条目、只保留它，
+    最近放入的一项总能命中（如很大的文档模板不会每个文件都重新编译）。
+    enabled 为假时 get 总是未命中、put 不保存。
+    """
+
+    def __init__(self, max_bytes, enabled=True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if not self.enabled:
+                return None
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if not self.enabled:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def get_or_load(self, key, load, sizeof=len):
+        """取缓存的值，未命中时调用 load() 读取并放入缓存
+
+        读取在锁外进行，两个线程同时未命中同一个键时各读一次。
+        """
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.put(key, value, sizeof(value))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def summary(self):
+        return {
+            "entries": len(self._items),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Excel/CSV 中所选各列的行、复制模式的源文件内容只在批量任务期间缓存；
+# 编译好的文档模板总是缓存
+workbooks = BoundedCache(WORKBOOK_CACHE_BYTES, enabled=False)
+sources = BoundedCache(SOURCE_CACHE_BYTES, enabled=False)
+templates = BoundedCache(TEMPLATE_CACHE_BYTES)
+
+_shared_depth = 0
+_shared_lock = threading.Lock()
+
+
+def file_key(path):
+    """文件的缓存键：路径、大小和修改时间，文件被改动后不会命中旧内容"""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+@contextmanager
+def shared():
+    """在此期间运行的任务共用读入的数据文件和源文件，结束时释放"""
+    global _shared_depth
+    with _shared_lock:
+        _shared_depth += 1
+        workbooks.enabled = sources.enabled = True
+    try:
+        yield
+    finally:
+        with _shared_lock:
+            _shared_depth -= 1
+            if not _shared_depth:
+                for cache in (workbooks, sources):
+                    cache.enabled = False
+                    cache.clear()
+
+
+def summary():
+    return {
+        "workbooks": workbooks.summary(),
+        "sources": sources.summary(),
+        "templates": templates.summary(),
+    }
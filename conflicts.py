@@ -0,0 +1,72 @@
+import os
+
+# 重名处理方式：覆盖已有文件 / 跳过 / 在文件名后加 " (2)" 等后缀
+CONFLICT_POLICIES = ("overwrite", "skip", "suffix")
+
+
+def name_key(name):
+    # Windows 上文件名不区分大小写
+    return os.path.normcase(name)
+
+
+def existing_names(directory):
+    """一次 scandir 建立目录中已有文件名的索引；directory 为 None（输出到压缩包）时为空"""
+    if directory is None:
+        return set()
+    try:
+        with os.scandir(directory) as it:
+            return {name_key(entry.name) for entry in it}
+    except FileNotFoundError:
+        return set()
+
+
+def names_are_unique(template, data_names=()):
+    """模板能否保证同一批次内文件名互不相同
+
+    模板含 {序号} 且不含任何由数据决定的占位符（data_names）时，不同序号
+    得到的文件名一定不同（各种序号样式都是一一对应的），不必逐个记录。
+    """
+    return "{序号}" in template and not any("{%s}" % name in template for name in data_names)
+
+
+class NameResolver:
+    """按重名处理方式决定每个文件的最终文件名
+
+    resolve(stem) 返回最终文件名（不含扩展名），需要跳过时返回 None。
+    existing 是已有文件名的索引（见 existing_names）。policy 为 "overwrite" 时
+    已有文件直接覆盖，只检查批次内重名：遇到第一个重名就抛出 ValueError。
+    """
+
+    def __init__(self, policy, existing, ext, track_batch=True):
+        self.policy = policy
+        self.ext = ext
+        self.existing = existing
+        self.track_batch = track_batch
+        self.seen = set()
+
+    def _taken(self, key):
+        return key in self.existing or key in self.seen
+
+    def resolve(self, stem):
+        key = name_key(stem + self.ext)
+        if self.policy == "overwrite":
+            if key in self.seen:
+                raise ValueError(f"文件名重复: {stem + self.ext}")
+            if self.track_batch:
+                self.seen.add(key)
+            return stem
+        if not self._taken(key):
+            if self.track_batch:
+                self.seen.add(key)
+            return stem
+        if self.policy == "skip":
+            return None
+        k = 2
+        while True:
+            candidate = f"{stem} ({k})"
+            key = name_key(candidate + self.ext)
+            if not self._taken(key):
+                # 加了后缀的名字总要记录，避免与本批后面的文件再次冲突
+                self.seen.add(key)
+                return candidate
+            k += 1
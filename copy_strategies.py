@@ -0,0 +1,215 @@
+import os
+import mmap
+import errno
+import shutil
+import threading
+
+import caches
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# 出现这些错误说明当前平台或文件系统不支持该方式，改用下一种
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS,
+    errno.EPERM, errno.EMLINK, errno.EBADF
+}
+
+# 不超过该大小的源文件整个读入内存，更大的用 mmap 映射
+FANOUT_MEMORY_LIMIT = 64 * 1024 * 1024
+
+# 每种方式不可用时依次尝试的后备方式，最后总是完整复制
+FALLBACKS = {
+    "fanout": ["fanout", "copy"],
+    "auto": ["reflink", "copy_file_range", "sendfile", "copy"],
+    "reflink": ["reflink", "copy_file_range", "sendfile", "copy"],
+    "copy_file_range": ["copy_file_range", "sendfile", "copy"],
+    "sendfile": ["sendfile", "copy"],
+    "hardlink": ["hardlink", "reflink", "copy_file_range", "sendfile", "copy"],
+    "symlink": ["symlink", "copy"],
+    "copy": ["copy"],
+}
+
+STRATEGIES = list(FALLBACKS)
+
+
+class Unsupported(Exception):
+    """当前方式在该平台/文件系统上不可用"""
+
+
+def _copy_full(src, dst):
+    shutil.copy2(src, dst)
+
+
+def _copy_reflink(src, dst):
+    if fcntl is None:
+        raise Unsupported("reflink")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def _copy_file_range(src, dst):
+    if not hasattr(os, "copy_file_range"):
+        raise Unsupported("copy_file_range")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        while offset < size:
+            sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - offset, offset, offset)
+            if sent == 0:
+                break
+            offset += sent
+        if offset < size:
+            raise Unsupported("copy_file_range")
+    shutil.copystat(src, dst)
+
+
+def _copy_sendfile(src, dst):
+    if not hasattr(os, "sendfile"):
+        raise Unsupported("sendfile")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+        if offset < size:
+            raise Unsupported("sendfile")
+    shutil.copystat(src, dst)
+
+
+def _replace_with_link(make_link, src, dst):
+    # 与 copy2 一样覆盖已存在的目标
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    make_link(src, dst)
+
+
+def _copy_hardlink(src, dst):
+    _replace_with_link(os.link, src, dst)
+
+
+def _copy_symlink(src, dst):
+    _replace_with_link(os.symlink, os.path.abspath(src), dst)
+
+
+_IMPLS = {
+    "copy": _copy_full,
+    "reflink": _copy_reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _copy_sendfile,
+    "hardlink": _copy_hardlink,
+    "symlink": _copy_symlink,
+}
+
+
+class SourcePayload:
+    """源文件只读一次，之后把同一份内容写到每个目标"""
+
+    def __init__(self, src, st):
+        self.src = src
+        self.st = st
+        self._file = None
+        self._mmap = None
+        if st.st_size == 0:
+            self.data = b""
+        elif st.st_size <= FANOUT_MEMORY_LIMIT:
+            # 批量任务中多个任务复制同一个源文件时只读一次
+            self.data = caches.sources.get_or_load(caches.file_key(src), self._read)
+        else:
+            self._file = open(src, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = memoryview(self._mmap)
+
+    def _read(self):
+        with open(self.src, "rb") as f:
+            return f.read()
+
+    def write_to(self, dst):
+        with open(dst, "wb") as f:
+            f.write(self.data)
+        # 与 copy2 一样保留权限和修改时间
+        os.chmod(dst, self.st.st_mode & 0o7777)
+        os.utime(dst, ns=(self.st.st_atime_ns, self.st.st_mtime_ns))
+
+    def close(self):
+        if self._mmap is not None:
+            self.data.release()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+        self.data = b""
+
+
+class Copier:
+    """把一个源文件按选定方式复制到多个目标，不支持时自动降级
+
+    源文件在创建时校验并 stat 一次；第一次遇到不支持的错误后会永久切换到
+    下一种方式，之后的文件不再重复探测。可在多个线程中共用，用完需 close()。
+    落盘由调用方负责（见 atomic.BatchSync）。
+    """
+
+    def __init__(self, src, strategy="copy"):
+        if strategy not in FALLBACKS:
+            raise ValueError(f"未知的复制方式: {strategy}")
+        self.src = src
+        self.st = os.stat(src)
+        self.ext = os.path.splitext(src)[1]
+        self.strategy = strategy
+        self._chain = FALLBACKS[strategy]
+        self._level = 0
+        self._lock = threading.Lock()
+        self._payload = None
+
+    @property
+    def active(self):
+        return self._chain[self._level]
+
+    def _downgrade(self, level):
+        with self._lock:
+            if self._level == level and level < len(self._chain) - 1:
+                self._level += 1
+
+    def payload(self):
+        """源文件内容（只读取一次），供复制以外的输出方式复用"""
+        with self._lock:
+            if self._payload is None:
+                self._payload = SourcePayload(self.src, self.st)
+            return self._payload
+
+    def _copy_once(self, name, dst):
+        if name == "copy":
+            _copy_full(self.src, dst)
+        elif name == "fanout":
+            self.payload().write_to(dst)
+        else:
+            _IMPLS[name](self.src, dst)
+
+    def copy(self, dst):
+        """复制到 dst，返回实际使用的方式"""
+        while True:
+            level = self._level
+            name = self._chain[level]
+            try:
+                self._copy_once(name, dst)
+                break
+            except Unsupported:
+                pass
+            except OSError as e:
+                if name == "copy" or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+            self._downgrade(level)
+        return name
+
+    def close(self):
+        if self._payload is not None:
+            self._payload.close()
+            self._payload = None
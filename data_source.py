@@ -0,0 +1,166 @@
+import os
+import csv
+import itertools
+
+import caches
+
+# 探测 CSV 编码时读取的字节数
+_SNIFF_BYTES = 64 * 1024
+
+# 整张表读入内存后约为文件大小的多少倍（.xlsx 是压缩的 XML，膨胀更多），
+# 用于批量任务中决定是否缓存
+_EXPANSION = {".xlsx": 24, ".xlsm": 24}
+_DEFAULT_EXPANSION = 12
+
+
+def _is_empty(value):
+    # 与 pandas dropna 一致：只丢弃真正的空单元格
+    if value is None:
+        return True
+    if isinstance(value, float) and value != value:
+        return True
+    return value == ""
+
+
+def _detect_encoding(path):
+    with open(path, "rb") as f:
+        head = f.read(_SNIFF_BYTES)
+    try:
+        head.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # 截断在多字节字符中间不算错误；整个文件都读进来时没有截断
+        if len(head) == _SNIFF_BYTES and e.start >= len(head) - 3:
+            return "utf-8-sig"
+        return "gbk"
+
+
+def _iter_csv(path, delimiter):
+    with open(path, newline="", encoding=_detect_encoding(path)) as f:
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def _iter_xlsx(workbook, max_col):
+    try:
+        sheet = workbook.worksheets[0]
+        # 只读模式按文件中记录的 <dimension> 截取范围，不少程序写出的是过时的 "A1"，
+        # 清掉后按实际的行读取
+        sheet.reset_dimensions()
+        yield from sheet.iter_rows(max_col=max_col, values_only=True)
+    finally:
+        workbook.close()
+
+
+def _iter_xls(path, cols):
+    # 旧版 .xls 只能交给 pandas；已知列号时只读取需要的列
+    import pandas as pd
+    df = pd.read_excel(path, header=None, usecols=cols)
+    yield from df.itertuples(index=False, name=None)
+
+
+def _open_rows(path, cols):
+    """打开文件，返回逐行产出整行（列表或元组）的迭代器
+
+    cols 为需要的列号列表（从0开始），None 表示全部列。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".csv", ".tsv", ".txt"):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        return _iter_csv(path, "\t" if ext == ".tsv" else ",")
+    if ext == ".xls":
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        # usecols 按原列号读取后列的位置会变，这里读出与列号对齐的宽度
+        return _iter_xls(path, None if cols is None else list(range(max(cols) + 1)))
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    return _iter_xlsx(workbook, None if cols is None else max(cols) + 1)
+
+
+def _row_size(row):
+    # 粗略估算一行在内存中占用的字节数
+    return 56 + 8 * len(row) + sum(49 + len(v) if isinstance(v, str) else 32 for v in row)
+
+
+def _cached_rows(cache, key, path, names, rows, fraction):
+    """批量任务期间把所选各列的行整个读入缓存，返回行迭代器
+
+    读之前先按文件大小估算所选各列占用的内存（fraction 为所选列占整行的比例），
+    估计放不下时不缓存、照常逐行读取。估算偏小、读到一半超出上限时停止缓存，
+    已读的行接上剩余部分继续读，不重复读取。
+    """
+    expansion = _EXPANSION.get(os.path.splitext(path)[1].lower(), _DEFAULT_EXPANSION)
+    if os.path.getsize(path) * expansion * fraction > cache.max_bytes:
+        return rows
+    buffered = []
+    size = 0
+    for row in rows:
+        buffered.append(row)
+        size += _row_size(row)
+        if size > cache.max_bytes:
+            return itertools.chain(buffered, rows)
+    cache.put(key, (names, buffered), size)
+    return iter(buffered)
+
+
+def read_rows(path, columns=None, header=False):
+    """一次遍历读取多列，返回 (列名列表, 行迭代器)
+
+    columns 中每项是列号（从0开始）或表头中的列名（此时第一行必须是表头）；
+    为 None 时取表头中的全部列。header 为真时第一行作为表头，不算数据。
+    每行产出所选各列的值组成的元组，所选列全为空的行被跳过。
+    文件在调用时立即打开并读取表头，数据在迭代时逐行读取。
+
+    批量任务期间（见 caches.workbooks）同一文件的同一组列只读一次，
+    缓存中只保存所选各列。
+    """
+    if columns is not None and any(isinstance(c, str) for c in columns):
+        header = True
+    if columns is None and not header:
+        raise ValueError("未指定要读取的列")
+    cache = caches.workbooks
+    key = None
+    if cache.enabled:
+        key = (caches.file_key(path), header, None if columns is None else tuple(columns))
+        hit = cache.get(key)
+        if hit is not None:
+            names, rows = hit
+            return names, iter(rows)
+    known = None if header or columns is None else list(columns)
+    rows = _open_rows(path, known)
+    first = next(rows, None)
+    width = len(first) if first is not None else 0
+    names = None
+    if header:
+        titles = ["" if _is_empty(v) else str(v).strip() for v in (first or ())]
+        if columns is None:
+            columns = [k for k, title in enumerate(titles) if title]
+            names = [titles[k] for k in columns]
+        else:
+            resolved = []
+            for c in columns:
+                if isinstance(c, str):
+                    if c not in titles:
+                        raise ValueError(f"表头中没有列: {c}")
+                    c = titles.index(c)
+                resolved.append(c)
+            columns = resolved
+            names = [titles[c] if c < len(titles) else "" for c in columns]
+    elif first is not None:
+        rows = itertools.chain([first], rows)
+    selected = _select(rows, columns)
+    if key is None:
+        return names, selected
+    fraction = min(1.0, len(columns) / width) if width else 1.0
+    return names, _cached_rows(cache, key, path, names, selected, fraction)
+
+
+def _select(rows, columns):
+    for row in rows:
+        width = len(row)
+        values = tuple(row[c] if c < width else None for c in columns)
+        if all(_is_empty(v) for v in values):
+            continue
+        yield values
+
@@ -0,0 +1,329 @@
+import io
+import os
+import re
+import zlib
+import struct
+import zipfile
+from functools import lru_cache
+
+import caches
+
+# 生成模板时写入标题的占位文本，之后在 XML 中定位并替换
+MARKER = "FMTITLEMARKER7F3A"
+
+# 与 zipfile 模块使用的结构一致
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_END_ARCHIVE = struct.Struct("<4s4H2LH")
+
+
+# 用户模板中的占位符，如 {姓名}；名称中不能有空白
+PLACEHOLDER = re.compile(r"\{([^{}\s]+)\}")
+
+# 编译用户模板时暂时替换占位符的标记（Unicode 私用区字符，不会出现在属性里）
+_SLOT = re.compile("\ue000(\\d+)\ue001".encode("utf-8"))
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+_PARAGRAPHS = {_W + "p", _A + "p"}
+_TEXTS = {_W + "t", _A + "t"}
+
+
+def escape(text):
+    # 与 lxml 序列化文本节点时的转义一致；不用 xml.sax.saxutils，它会连带导入 urllib
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def build_document(file_type, text):
+    """按原来的方式用 python-docx/python-pptx 生成文档，返回文件内容"""
+    buf = io.BytesIO()
+    if file_type == ".docx":
+        from docx import Document
+        doc = Document()
+        doc.add_heading(text, 0)
+        doc.save(buf)
+    elif file_type == ".pptx":
+        from pptx import Presentation
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[0])
+        slide.shapes.title.text = text
+        prs.save(buf)
+    else:
+        raise ValueError(f"不支持的文件类型: {file_type}")
+    return buf.getvalue()
+
+
+class _Member:
+    """zip 中的一个成员，保存已压缩的原始数据和解压后的内容"""
+
+    def __init__(self, info, raw, data):
+        self.name = info.filename.encode("utf-8")
+        self.flags = 0x800 if info.flag_bits & 0x800 else 0
+        self.method = info.compress_type
+        dt = info.date_time
+        self.dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+        self.dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+        self.crc = info.CRC
+        self.usize = info.file_size
+        self.raw = raw
+        self.data = data
+
+    def local_header(self):
+        return _LOCAL_HEADER.pack(
+            b"PK\003\004", 20, 0, self.flags, self.method, self.dostime, self.dosdate,
+            self.crc, len(self.raw), self.usize, len(self.name), 0
+        ) + self.name
+
+    def central_entry(self, offset):
+        return _CENTRAL_DIR.pack(
+            b"PK\001\002", 20, 0, 20, 0, self.flags, self.method, self.dostime, self.dosdate,
+            self.crc, len(self.raw), self.usize, len(self.name), 0, 0, 0, 0, 0o644 << 16, offset
+        ) + self.name
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _prebuild(members, patched):
+    """把不需要修改的成员预先拼好，返回 (本地数据, 中央目录)"""
+    head = io.BytesIO()
+    central = io.BytesIO()
+    for member in members:
+        if member in patched:
+            continue
+        offset = head.tell()
+        head.write(member.local_header())
+        head.write(member.raw)
+        central.write(member.central_entry(offset))
+    return head.getvalue(), central.getvalue()
+
+
+def _assemble(head, central, count, parts):
+    """在预先拼好的成员后追加修改过的部件 [(成员, 新内容)]，返回完整的 zip"""
+    chunks = [head]
+    offset = len(head)
+    entries = [central]
+    for part, data in parts:
+        raw = _deflate(data)
+        crc = zlib.crc32(data)
+        name = part.name
+        local = _LOCAL_HEADER.pack(
+            b"PK\003\004", 20, 0, part.flags, zipfile.ZIP_DEFLATED, part.dostime, part.dosdate,
+            crc, len(raw), len(data), len(name), 0
+        ) + name
+        entries.append(_CENTRAL_DIR.pack(
+            b"PK\001\002", 20, 0, 20, 0, part.flags, zipfile.ZIP_DEFLATED, part.dostime, part.dosdate,
+            crc, len(raw), len(data), len(name), 0, 0, 0, 0, 0o644 << 16, offset
+        ) + name)
+        chunks.append(local)
+        chunks.append(raw)
+        offset += len(local) + len(raw)
+    central = b"".join(entries)
+    end = _END_ARCHIVE.pack(b"PK\005\006", 0, 0, count, count, len(central), offset, 0)
+    return b"".join(chunks + [central, end])
+
+
+def _read_members(blob):
+    members = []
+    with zipfile.ZipFile(io.BytesIO(blob)) as zf:
+        for info in zf.infolist():
+            # 跳过本地文件头，直接取压缩后的数据
+            offset = info.header_offset
+            name_len, extra_len = struct.unpack("<2H", blob[offset + 26:offset + 30])
+            start = offset + 30 + name_len + extra_len
+            raw = blob[start:start + info.compress_size]
+            members.append(_Member(info, raw, zf.read(info)))
+    return members
+
+
+class CompiledTemplate:
+    """编译好的文档模板
+
+    先生成一次带占位标题的文档，找到包含标题的 XML 部件；之后每个文件只替换
+    该部件中的文本并重新压缩它，其余部件直接复用已压缩的数据拼成 zip。
+    """
+
+    def __init__(self, file_type):
+        self.file_type = file_type
+        members = _read_members(build_document(file_type, MARKER))
+        marker = MARKER.encode("utf-8")
+        patched = None
+        for member in members:
+            if marker in member.data:
+                patched = member
+                self.before, self.after = member.data.split(marker, 1)
+                break
+        if patched is None or marker in self.after:
+            raise ValueError(f"无法在 {file_type} 模板中定位标题")
+        self.part = patched
+
+        # 未修改的部件放在前面，偏移固定，可以预先拼好
+        self.head, self.central = _prebuild(members, {patched})
+        for member in members:
+            member.data = None
+        self.count = len(members)
+        self.nbytes = len(self.head) + len(self.central) + len(self.before) + len(self.after)
+
+    def accepts(self, text):
+        """能否走快速路径；空文本、控制字符等交给 python-docx/pptx 处理"""
+        if not text or any(ord(c) < 32 for c in text):
+            return False
+        # python-docx 对首尾有空白的文本会加 xml:space="preserve"
+        if self.file_type == ".docx" and text.strip() != text:
+            return False
+        return True
+
+    def render(self, text):
+        data = self.before + escape(text).encode("utf-8") + self.after
+        return _assemble(self.head, self.central, self.count, [(self.part, data)])
+
+
+def _xml_text(value):
+    return escape(_INVALID_XML.sub("", value)).encode("utf-8")
+
+
+def _paragraph_of(node):
+    parent = node.getparent()
+    while parent is not None and parent.tag not in _PARAGRAPHS:
+        parent = parent.getparent()
+    return parent
+
+
+def _join_split_placeholders(nodes):
+    """Word/PowerPoint 常把一个占位符拆到几个文本段里，把它整体移到起始的文本段
+
+    文本段沿用起始段的格式；被移走的部分从后面的文本段中删除。
+    """
+    texts = [node.text or "" for node in nodes]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+    joined = "".join(texts)
+
+    def locate(pos):
+        k = len(starts) - 1
+        while starts[k] > pos:
+            k -= 1
+        return k
+
+    # 从后往前处理，前面文本段的偏移不受影响
+    for match in reversed(list(PLACEHOLDER.finditer(joined))):
+        first, last = locate(match.start()), locate(match.end() - 1)
+        if first == last:
+            continue
+        texts[first] = texts[first][:match.start() - starts[first]] + match.group(0)
+        for k in range(first + 1, last):
+            texts[k] = ""
+        texts[last] = texts[last][match.end() - starts[last]:]
+    for node, text in zip(nodes, texts):
+        if node.text != text and (node.text or text):
+            node.text = text
+
+
+class UserTemplate:
+    """编译好的用户 .docx/.pptx 模板
+
+    编译时找出正文、页眉页脚、表格、幻灯片等各 XML 部件中的 {名称} 占位符
+    （包括被拆到多个文本段里的），把含占位符的部件切成 内容-占位符-内容 片段；
+    其余部件保留原来的压缩数据。每个文件只拼接并压缩含占位符的部件，
+    不再解析整个文档。
+    """
+
+    def __init__(self, path):
+        from lxml import etree
+        self.path = path
+        self.file_type = os.path.splitext(path)[1].lower()
+        with open(path, "rb") as f:
+            members = _read_members(f.read())
+        self.names = []
+        self.parts = []
+        slots = {}
+
+        def slot(match):
+            name = match.group(1)
+            if name not in slots:
+                slots[name] = len(self.names)
+                self.names.append(name)
+            return f"\ue000{slots[name]}\ue001"
+
+        for member in members:
+            if not member.name.endswith(b".xml") or b"{" not in member.data:
+                continue
+            root = etree.fromstring(member.data)
+            groups = {}
+            for node in root.iter(*_TEXTS):
+                groups.setdefault(_paragraph_of(node), []).append(node)
+            found = False
+            for nodes in groups.values():
+                _join_split_placeholders(nodes)
+                for node in nodes:
+                    if node.text and PLACEHOLDER.search(node.text):
+                        node.text = PLACEHOLDER.sub(slot, node.text)
+                        if node.tag == _W + "t":
+                            # 取值首尾有空格时 Word 也要保留
+                            node.set(_XML_SPACE, "preserve")
+                        found = True
+            if not found:
+                continue
+            data = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+            # 片段：偶数位是原样的内容，奇数位是占位符编号
+            pieces = _SLOT.split(data)
+            self.parts.append((member, [p if k % 2 == 0 else int(p) for k, p in enumerate(pieces)]))
+
+        patched = {member for member, _ in self.parts}
+        self.head, self.central = _prebuild(members, patched)
+        for member in members:
+            member.data = None
+        self.count = len(members)
+        # 没有取值的占位符原样保留
+        self.literals = [_xml_text("{" + name + "}") for name in self.names]
+        self.nbytes = len(self.head) + len(self.central) + sum(
+            len(p) for _, pieces in self.parts for p in pieces if isinstance(p, bytes))
+
+    def render(self, values):
+        """values 是 {占位符名: 文本}，返回生成的文件内容"""
+        texts = [_xml_text(values[name]) if name in values else literal
+                 for name, literal in zip(self.names, self.literals)]
+        parts = [(member, b"".join(p if k % 2 == 0 else texts[p] for k, p in enumerate(pieces)))
+                 for member, pieces in self.parts]
+        return _assemble(self.head, self.central, self.count, parts)
+
+
+def _nbytes(template):
+    return template.nbytes
+
+
+def get_template(file_type):
+    return caches.templates.get_or_load(file_type, lambda: CompiledTemplate(file_type), _nbytes)
+
+
+def get_user_template(path):
+    """编译并缓存用户模板；模板文件被修改后重新编译"""
+    return caches.templates.get_or_load(caches.file_key(path), lambda: UserTemplate(path), _nbytes)
+
+
+@lru_cache(maxsize=16)
+def _build_cached(file_type, text):
+    # 不走快速路径的文本通常是同一个值（如未启用数据时的空标题），缓存整份结果
+    return build_document(file_type, text)
+
+
+def render_document(file_type, text):
+    """返回标题为 text 的 .docx/.pptx 文件内容"""
+    template = get_template(file_type)
+    if template.accepts(text):
+        return template.render(text)
+    return _build_cached(file_type, text)
+
+
+def render_user_template(path, values):
+    """用用户模板生成文件内容，values 是 {占位符名: 文本}"""
+    return get_user_template(path).render(values)
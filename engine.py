@@ -0,0 +1,1278 @@
+import sys
+import os
+import time
+import itertools
+from dataclasses import dataclass, field, asdict, replace
+
+from copy_strategies import Copier, STRATEGIES
+from skip_rules import SkipRules
+from numbering import get_formatter
+from conflicts import CONFLICT_POLICIES, NameResolver, existing_names, name_key, names_are_unique
+from rename import RENAME_SORT_KEYS
+from journal import VERIFY_MODES
+from atomic import DURABILITY_LEVELS, BatchSync, atomic_write, sweep_temp
+from sharding import SHARD_LAYOUTS
+from stats import PROFILE_MODES, REPORT_NAME
+
+# 文档库、Excel 读取、进程池等较重的依赖只在用到时才导入，
+# 保证命令行和界面启动时不为用不到的功能付出导入开销
+
+
+# 界面上的中文样式名 -> 英文标识符
+STYLE_MAP = {
+    "阿拉伯数字": "Arabic",
+    "汉字小写": "Chinese",
+    "汉字大写": "Chinese_Upper",
+    "带圈数字": "Circle",
+    "罗马数字": "Roman"
+}
+
+# 界面上的复制方式 -> 英文标识符
+COPY_STRATEGY_MAP = {
+    "完整复制": "copy",
+    "读取一次分发写入": "fanout",
+    "自动（优先零拷贝）": "auto",
+    "写时复制 (reflink)": "reflink",
+    "内核复制 (copy_file_range)": "copy_file_range",
+    "内核复制 (sendfile)": "sendfile",
+    "硬链接": "hardlink",
+    "符号链接": "symlink"
+}
+
+
+class JobError(Exception):
+    """任务参数或数据错误，消息直接展示给用户"""
+
+
+# 界面上的重名处理方式 -> 英文标识符
+CONFLICT_POLICY_MAP = {
+    "覆盖已有文件": "overwrite",
+    "跳过已有文件": "skip",
+    "自动添加后缀": "suffix"
+}
+
+# 界面上的落盘方式 -> 英文标识符
+DURABILITY_MAP = {
+    "不强制落盘（最快）": "none",
+    "每批统一落盘": "batch",
+    "每个文件落盘（最安全）": "file"
+}
+
+# 界面上的性能分析方式 -> 英文标识符
+PROFILE_MAP = {
+    "不分析": "none",
+    "函数耗时（cProfile）": "cprofile",
+    "内存分配（tracemalloc）": "tracemalloc"
+}
+
+# 界面上的分片方式 -> 英文标识符
+SHARD_LAYOUT_MAP = {
+    "不分子目录": "none",
+    "按序号分子目录": "bucket",
+    "按文件名哈希分子目录": "hash"
+}
+
+# 界面上的重命名排序方式 -> 英文标识符
+RENAME_SORT_MAP = {
+    "文件名": "name",
+    "修改时间": "mtime",
+    "文件大小": "size"
+}
+
+# 结果中最多保留的错误明细条数，其余只计数
+MAX_ERRORS_KEPT = 1000
+
+# 预览时列出的文件名个数，以及重名样例的个数
+PREVIEW_COUNT = 50
+SAMPLE_COUNT = 20
+
+
+@dataclass
+class JobSpec:
+    mode: str = "copy"                  # "copy"、"create" 或 "rename"
+    output_path: str = ""               # 重命名模式下为要重命名的目录
+    count: int = 1
+    source_path: str = ""               # 复制模式的源文件
+    file_type: str = ".docx"            # 新建模式的文件类型
+    doc_template: str = ""              # 新建模式使用的 .docx/.pptx 模板，其中的 {名称} 占位符被替换；文件类型随模板
+    filename_template: str = "文档_{序号}"
+    start_index: int = 1
+    number_style: str = "Arabic"
+    skip_numbers: str = ""
+    skip_multiples: int = 0             # 0 表示不跳过倍数
+    skip_digits: str = ""               # 跳过含有这些数字的序号，如 "4"
+    enable_data: bool = False
+    data_fields: str = ""               # 多列字段映射，如 "姓名=1, 部门=3"、"姓名, 部门"（按表头名）或 "*"（表头全部列）
+    data_header: bool = False           # Excel/CSV 第一行是表头
+    data_source: str = "manual"         # "manual" 或 "excel"
+    manual_data: str = ""
+    excel_path: str = ""
+    excel_col: int = 0                  # Excel列从0开始
+    body_template: str = ""             # 新建文档的标题内容模板，如 "{姓名} - {部门}"，空则为 {数据}
+    use_date: bool = False
+    date_text: str = ""                 # 已按格式化好的日期文本
+    workers: int = 0                    # 复制为线程数、新建为进程数，0 表示自动
+    copy_strategy: str = "copy"         # 见 copy_strategies.STRATEGIES
+    durability: str = "none"            # 见 atomic.DURABILITY_LEVELS
+    keep_files: bool = False            # 在结果中记录每个文件的路径（内存随数量增长）
+    conflict_policy: str = "overwrite"  # 见 conflicts.CONFLICT_POLICIES
+    rename_pattern: str = "*"           # 重命名模式只处理匹配的文件
+    rename_sort: str = "name"           # 见 rename.RENAME_SORT_KEYS
+    rename_reverse: bool = False
+    shard_layout: str = "none"          # 见 sharding.SHARD_LAYOUTS，分片时在输出目录写 manifest.csv
+    shard_size: int = 1000              # 按序号分片时每个子目录的文件数
+    archive_path: str = ""              # 非空时所有文件直接写进该 .zip/.tar(.gz/.zst) 压缩包，不写输出目录
+    resume: bool = False                # 在输出目录记录进度，重新运行时跳过已完成的文件
+    verify: str = "stat"                # 续传时核对已完成文件："stat" 比较大小和修改时间，"checksum" 比较 sha256
+    save_report: bool = False           # 把各阶段耗时等统计写成 JSON 报告，放在输出目录（或压缩包旁边）
+    profile: str = "none"               # 见 stats.PROFILE_MODES，在 cProfile 或 tracemalloc 下运行
+
+
+@dataclass
+class JobResult:
+    output_path: str
+    created: int = 0                    # 生成（重命名模式下为改名）的文件数
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    cancelled: bool = False
+    copy_strategy: str = ""             # 实际使用的复制方式
+    failed: int = 0
+    skipped: int = 0                    # 因重名被跳过的文件数
+    resumed: int = 0                    # 续传时已完成、直接跳过的文件数
+    error: str = ""                     # 规划中途出错（如数据数量不足）而停止的原因，已生成的文件仍计入结果
+    files: list = field(default_factory=list)     # 仅 keep_files 时记录
+    errors: list = field(default_factory=list)    # [{"path": ..., "error": ...}]，最多 MAX_ERRORS_KEPT 条
+    stats: dict = None                  # 各阶段耗时、单文件延迟分位数等，见 stats.JobStats.to_dict
+
+    def add_error(self, path, error):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS_KEPT:
+            self.errors.append({"path": path, "error": str(error)})
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class PlanReport:
+    """预览（不写文件）的结果"""
+    output_path: str
+    policy: str
+    total: int = 0
+    preview: list = field(default_factory=list)         # 前 PREVIEW_COUNT 个文件名
+    duplicate_count: int = 0                            # 本批次内重复的文件名数
+    duplicates: list = field(default_factory=list)
+    existing_count: int = 0                             # 与输出目录已有文件重名的数量
+    existing: list = field(default_factory=list)
+    cancelled: bool = False
+    renaming: bool = False                              # 预览的是重命名，preview 为 "原名 -> 新名"
+
+    @property
+    def conflict(self):
+        # 覆盖模式下批次内重名会互相覆盖，其余情况都能按规则处理；
+        # 重命名从不覆盖文件，与目录中其余条目重名也算冲突
+        if self.policy != "overwrite":
+            return False
+        return self.duplicate_count > 0 or (self.renaming and self.existing_count > 0)
+
+    def to_dict(self):
+        data = asdict(self)
+        data["conflict"] = self.conflict
+        return data
+
+
+def parse_skip_numbers(text):
+    """解析跳过数字，返回支持 `in` 判断的 SkipRules"""
+    return SkipRules.parse(text)
+
+
+def compile_skip_rules(spec):
+    try:
+        return SkipRules.parse(spec.skip_numbers, spec.skip_multiples, spec.skip_digits)
+    except ValueError as e:
+        raise JobError(str(e))
+
+
+def default_workers():
+    # 复制以 I/O 为主，线程数可以多于核数
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+# 新建模式自动选择进程数时，少于该数量的任务不启动进程池
+PROCESS_POOL_MIN_FILES = 2000
+
+# 新建模式每次发给子进程的文件数
+PROCESS_CHUNK_SIZE = 256
+
+# 规划文件名时每次成批生成的序号文本数
+PLAN_CHUNK_SIZE = 4096
+
+
+def resolve_workers(spec):
+    if spec.workers > 0:
+        return spec.workers
+    if spec.mode == "copy":
+        return default_workers()
+    # 进程池启动和加载文档库有固定开销，小批量直接在当前进程生成
+    return (os.cpu_count() or 1) if spec.count >= PROCESS_POOL_MIN_FILES else 1
+
+
+def validate(spec):
+    if not spec.output_path and not spec.archive_path:
+        raise JobError("请选择输出目录")
+    if spec.mode == "copy" and not spec.source_path:
+        raise JobError("请选择源文件")
+    if spec.mode not in ("copy", "create", "rename"):
+        raise JobError(f"未知的生成模式: {spec.mode}")
+    if spec.mode == "rename" and not os.path.isdir(spec.output_path):
+        raise JobError("要重命名的目录不存在")
+    if spec.mode == "rename" and spec.rename_sort not in RENAME_SORT_KEYS:
+        raise JobError(f"未知的排序方式: {spec.rename_sort}")
+    if spec.mode == "copy" and not os.path.exists(spec.source_path):
+        raise JobError("源文件不存在")
+    if spec.mode == "copy" and spec.copy_strategy not in STRATEGIES:
+        raise JobError(f"未知的复制方式: {spec.copy_strategy}")
+    if spec.mode == "create" and spec.doc_template:
+        if os.path.splitext(spec.doc_template)[1].lower() not in (".docx", ".pptx"):
+            raise JobError("文档模板只支持 .docx 和 .pptx")
+        if not os.path.isfile(spec.doc_template):
+            raise JobError("文档模板不存在")
+    elif spec.mode == "create" and spec.file_type not in (".docx", ".pptx"):
+        raise JobError(f"不支持的文件类型: {spec.file_type}")
+    compile_skip_rules(spec)
+    if spec.conflict_policy not in CONFLICT_POLICIES:
+        raise JobError(f"未知的重名处理方式: {spec.conflict_policy}")
+    if spec.durability not in DURABILITY_LEVELS:
+        raise JobError(f"未知的落盘方式: {spec.durability}")
+    if spec.profile not in PROFILE_MODES:
+        raise JobError(f"未知的性能分析方式: {spec.profile}")
+    if spec.verify not in VERIFY_MODES:
+        raise JobError(f"未知的核对方式: {spec.verify}")
+    if spec.shard_layout not in SHARD_LAYOUTS:
+        raise JobError(f"未知的分片方式: {spec.shard_layout}")
+    if spec.shard_size < 1:
+        raise JobError("每个子目录的文件数必须大于0")
+    if spec.archive_path:
+        from archive import archive_format
+        if spec.mode == "rename":
+            raise JobError("重命名模式不能输出到压缩包")
+        if archive_format(spec.archive_path) is None:
+            raise JobError("压缩包只支持 .zip、.tar、.tar.gz、.tgz、.tar.zst")
+        if spec.resume:
+            raise JobError("输出到压缩包时不支持断点续传")
+
+
+def _guard_read(values):
+    try:
+        yield from values
+    except Exception as e:
+        raise JobError(f"读取Excel失败: {e}")
+
+
+def parse_data_fields(text):
+    """解析字段映射 "姓名=1, 部门=3" 或 "姓名, 部门"（按表头名），返回 [(占位符名, 列)]
+
+    列为列号（从0开始）或表头中的列名；只写名称时名称就是表头中的列名。
+    """
+    fields = []
+    for part in (text or "").replace("，", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, col = part.partition("=")
+        name = name.strip()
+        col = col.strip() if sep else name
+        if not name or not col:
+            raise JobError(f"无法解析字段映射: {part}")
+        if col.isdigit():
+            if int(col) < 1:
+                raise JobError(f"列号从1开始: {part}")
+            col = int(col) - 1
+        fields.append((name, col))
+    return fields
+
+
+def load_data(spec):
+    """返回 (占位符名列表, 行迭代器)，每行是与占位符一一对应的值
+
+    Excel/CSV 只遍历一次，在生成过程中按需逐行读取。未设置字段映射时
+    只读取 excel_col 一列，对应 {数据}。
+    """
+    if not spec.enable_data:
+        return [], iter(())
+    if spec.data_source == "excel":
+        if not spec.excel_path:
+            raise JobError("请选择Excel文件")
+        all_columns = spec.data_fields.strip() == "*"
+        fields = [] if all_columns else parse_data_fields(spec.data_fields)
+        if all_columns:
+            if not spec.data_header:
+                raise JobError("使用全部列（*）时第一行必须是表头")
+            columns = None
+        elif fields:
+            columns = [col for _, col in fields]
+        else:
+            columns = [spec.excel_col]
+        try:
+            from data_source import read_rows
+            titles, rows = read_rows(spec.excel_path, columns, spec.data_header)
+        except Exception as e:
+            raise JobError(f"读取Excel失败: {e}")
+        if fields:
+            names = [name for name, _ in fields]
+        elif columns is None:
+            names = titles
+        else:
+            names = ["数据"]
+        return names, _guard_read(rows)
+    if not spec.manual_data:
+        raise JobError("请输入数据或从Excel导入")
+    return ["数据"], itertools.repeat((spec.manual_data,), spec.count)
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def placeholder_positions(spec, names):
+    """各占位符在值元组 (序号, 日期, 各字段…) 中的位置
+
+    {数据} 是名为“数据”的字段，没有时取第一个字段。
+    """
+    positions = {"序号": 0}
+    if spec.use_date:
+        positions["日期"] = 1
+    if spec.enable_data and names:
+        for k, name in enumerate(names):
+            positions.setdefault(name, k + 2)
+        positions.setdefault("数据", 2)
+    return positions
+
+
+def data_placeholders(spec):
+    """由数据决定的占位符（文件名含这些时不能保证互不重复）"""
+    if not spec.enable_data:
+        return ()
+    if spec.data_fields.strip() == "*":
+        # 全部表头列：文件名中除 序号/日期 外的占位符都可能来自数据
+        from text_template import TextTemplate
+        return [n for n in TextTemplate(spec.filename_template, {}).placeholders
+                if n not in ("序号", "日期")]
+    return ["数据"] + [name for name, _ in parse_data_fields(spec.data_fields)]
+
+
+def _numbered_chunks(spec):
+    """按块产出 (序号列表, 序号文本列表)，共 spec.count 个序号
+
+    没有跳过规则或这一块序号连续时整段交给 format_range，否则用 format_many。
+    """
+    formatter = get_formatter(spec.number_style)
+    rules = compile_skip_rules(spec)
+    remaining = spec.count
+    if not rules:
+        start = spec.start_index
+        while remaining > 0:
+            stop = start + min(PLAN_CHUNK_SIZE, remaining)
+            yield range(start, stop), formatter.format_range(start, stop)
+            remaining -= stop - start
+            start = stop
+        return
+    indexes = rules.iter_valid(spec.start_index)
+    while remaining > 0:
+        chunk = list(itertools.islice(indexes, min(PLAN_CHUNK_SIZE, remaining)))
+        remaining -= len(chunk)
+        if chunk[-1] - chunk[0] == len(chunk) - 1:
+            yield chunk, formatter.format_range(chunk[0], chunk[-1] + 1)
+        else:
+            yield chunk, formatter.format_many(chunk)
+
+
+def iter_plan(spec, data):
+    """依次产出 (序号, 文档内容, 文件名)，文件名不含扩展名
+
+    data 是 load_data 的结果，每生成一个文件取一行。序号文本按块成批生成，
+    文件名模板和文档内容模板各编译一次，每个文件只做一次格式化。
+    """
+    from text_template import TextTemplate
+    names, rows = data
+    rows = iter(rows)
+    positions = placeholder_positions(spec, names)
+    filename_template = TextTemplate(spec.filename_template, positions)
+    body_template = TextTemplate(spec.body_template, positions) if spec.body_template else None
+    data_pos = positions.get("数据")
+    # 使用文档模板时每个文件的内容是各占位符的取值
+    slots = list(positions.items()) if spec.mode == "create" and spec.doc_template else None
+    date_text = spec.date_text if spec.use_date else ""
+    if not spec.enable_data and slots is None:
+        # 没有数据时文件名和内容只取决于序号和日期，整块渲染
+        for indexes, numbers in _numbered_chunks(spec):
+            values = [(number, date_text) for number in numbers]
+            names = filename_template.render_many(values)
+            if body_template is not None:
+                yield from zip(indexes, body_template.render_many(values), names)
+            else:
+                yield from zip(indexes, itertools.repeat(""), names)
+        return
+    generated_count = 0
+    for indexes, numbers in _numbered_chunks(spec):
+        for i, number in zip(indexes, numbers):
+            values = (number, date_text)
+            if spec.enable_data:
+                row = next(rows, None)
+                if row is None:
+                    raise JobError(
+                        f"Excel 中的数据数量不足：只读到 {generated_count} 条，需要 {spec.count} 条"
+                    )
+                values += tuple(map(_text, row))
+            filename = filename_template.render(values)
+            if slots is not None:
+                text = {name: values[pos] for name, pos in slots}
+            elif body_template is not None:
+                text = body_template.render(values)
+            else:
+                text = values[data_pos] if data_pos is not None else ""
+            yield i, text, filename
+            generated_count += 1
+
+
+def target_ext(spec):
+    if spec.mode == "copy":
+        return os.path.splitext(spec.source_path)[1]
+    if spec.doc_template:
+        return os.path.splitext(spec.doc_template)[1].lower()
+    return spec.file_type
+
+
+def output_dir(spec):
+    """写入文件的目录；输出到压缩包时为 None"""
+    return None if spec.archive_path else spec.output_path
+
+
+def plan_job(spec, preview=PREVIEW_COUNT, should_stop=None):
+    """只规划不写入：列出文件名，检查批次内重名和与已有文件的重名"""
+    validate(spec)
+    if spec.mode == "rename":
+        return _plan_rename(spec, preview)
+    data = load_data(spec)
+    ext = target_ext(spec)
+    existing = _existing_names(spec, make_layout(spec))
+    seen = set()
+    report = PlanReport(output_path=spec.archive_path or spec.output_path, policy=spec.conflict_policy)
+    for _, _, stem in iter_plan(spec, data):
+        if should_stop and should_stop():
+            report.cancelled = True
+            break
+        name = stem + ext
+        key = name_key(name)
+        if len(report.preview) < preview:
+            report.preview.append(name)
+        if key in seen:
+            report.duplicate_count += 1
+            if len(report.duplicates) < SAMPLE_COUNT:
+                report.duplicates.append(name)
+        else:
+            seen.add(key)
+        if key in existing:
+            report.existing_count += 1
+            if len(report.existing) < SAMPLE_COUNT:
+                report.existing.append(name)
+        report.total += 1
+    return report
+
+
+def make_layout(spec):
+    """分片布局；不分片时为 None
+
+    输出目录中已有按其他分片方式生成的文件时报错，避免同一个文件在两个子目录中各有一份。
+    """
+    if spec.shard_layout == "none":
+        return None
+    from sharding import ShardLayout, check_layout
+    layout = ShardLayout(spec.output_path, spec.shard_layout, spec.shard_size,
+                         create=not spec.archive_path)
+    if not spec.archive_path:
+        try:
+            check_layout(spec.output_path, layout)
+        except ValueError as e:
+            raise JobError(f"{e}，请换一个输出目录，或删除原有的子目录和 manifest.csv")
+        except OSError as e:
+            raise JobError(f"无法读取分片清单: {e}")
+    return layout
+
+
+def _existing_names(spec, layout):
+    if layout is not None and not spec.archive_path:
+        return layout.existing_names()
+    return existing_names(output_dir(spec))
+
+
+def _resolved_plan(spec, data, result, journal=None, layout=None, resumed=None):
+    """按重名处理方式调整文件名，跳过的文件计入 result.skipped；
+    续传时日志中已完成的文件计入 result.resumed，并调用 resumed(顺序, 文件名)。
+
+    产出 (顺序, 文档内容, 文件名)：顺序是文件在计划中的位置（从0开始，
+    跳过的文件也占位置）；文件名是相对输出目录的路径（分片时带子目录），不含扩展名。
+    """
+    plan = iter_plan(spec, data)
+    unique = names_are_unique(spec.filename_template, data_placeholders(spec))
+    overwrite = spec.conflict_policy == "overwrite"
+    if overwrite and unique and journal is None and layout is None:
+        for seq, (_, current_data, stem) in enumerate(plan):
+            yield seq, current_data, stem
+        return
+    ext = target_ext(spec)
+    resolver = None
+    if not overwrite:
+        existing = _existing_names(spec, layout)
+        if journal is not None:
+            # 上次运行开始或完成的文件不算已有文件，才能得到与上次相同的文件名
+            existing.difference_update(name_key(os.path.basename(n)) for n in journal.names())
+        resolver = NameResolver(spec.conflict_policy, existing, ext, track_batch=not unique)
+    elif not unique:
+        # 覆盖模式下批次内重名会互相覆盖，遇到第一个重名就停止
+        resolver = NameResolver("overwrite", set(), ext)
+    for seq, (i, current_data, stem) in enumerate(plan):
+        if resolver is not None:
+            try:
+                stem = resolver.resolve(stem)
+            except ValueError as e:
+                raise JobError(f"{e}，请修改文件名模板或选择其他重名处理方式")
+            if stem is None:
+                result.skipped += 1
+                continue
+        if layout is not None:
+            stem = layout.path_for(seq, stem)
+        if journal is not None:
+            if journal.is_done(stem + ext):
+                result.resumed += 1
+                if resumed is not None:
+                    resumed(seq, stem + ext)
+                continue
+            journal.begin(stem + ext)
+        yield seq, current_data, stem
+
+
+def _journal_fields(spec):
+    # 只取决定输出内容和文件名的参数；并发数、统计报告等执行参数变了仍可续传。
+    # 前 N 个文件名与生成数量无关，增加数量后重新运行只生成新增的部分
+    fields = asdict(spec)
+    for key in ("count", "workers", "durability", "keep_files", "resume", "verify",
+                "save_report", "profile"):
+        fields.pop(key)
+    # 源文件或数据文件被修改过也不沿用旧日志
+    for key in ("source_path", "excel_path", "doc_template"):
+        try:
+            st = os.stat(fields[key])
+        except OSError:
+            continue
+        fields[key + "_stat"] = [st.st_size, st.st_mtime_ns]
+    return fields
+
+
+def open_journal(spec):
+    from journal import Journal, spec_hash
+    try:
+        return Journal(spec.output_path, spec_hash(_journal_fields(spec)), spec.verify)
+    except OSError as e:
+        raise JobError(f"无法打开续传日志: {e}")
+
+
+def _rename_plan(spec):
+    """列出目录并按模板算出新文件名，返回 (原文件名列表, 新文件名列表, 批次内重名, 与其余条目重名)"""
+    from rename import list_files, resolve_targets
+    try:
+        names, others = list_files(spec.output_path, spec.rename_pattern or "*",
+                                   spec.rename_sort, spec.rename_reverse)
+    except OSError as e:
+        raise JobError(f"无法读取目录: {e}")
+    # 序号、数据、日期的规划与生成模式相同，数量就是目录中的文件数
+    spec = replace(spec, count=len(names))
+    stems = [stem for _, _, stem in iter_plan(spec, load_data(spec))]
+    targets, duplicates, existing = resolve_targets(names, stems, spec.conflict_policy, others)
+    return names, targets, duplicates, existing
+
+
+def _plan_rename(spec, preview):
+    names, targets, duplicates, existing = _rename_plan(spec)
+    report = PlanReport(output_path=spec.output_path, policy=spec.conflict_policy,
+                        total=len(names), renaming=True)
+    report.preview = [f"{old} -> {new if new is not None else old}"
+                      for old, new in zip(names[:preview], targets[:preview])]
+    report.duplicate_count = len(duplicates)
+    report.duplicates = duplicates[:SAMPLE_COUNT]
+    report.existing_count = len(existing)
+    report.existing = existing[:SAMPLE_COUNT]
+    return report
+
+
+def run_rename(spec, progress=None, should_stop=None, stats=None):
+    """按文件名模板重命名目录中已有的文件，参数与 run_job 相同"""
+    validate(spec)
+    started = time.perf_counter()
+    names, targets, duplicates, existing = _rename_plan(spec)
+    planned = time.perf_counter()
+    if stats is not None:
+        stats.add("plan", planned - started, len(names))
+    if spec.conflict_policy == "overwrite" and (duplicates or existing):
+        samples = ", ".join((duplicates + existing)[:5])
+        raise JobError(
+            f"有 {len(duplicates) + len(existing)} 个新文件名重复（如 {samples}），"
+            "请修改文件名模板或选择其他重名处理方式"
+        )
+    result = JobResult(output_path=spec.output_path)
+    pairs = []
+    for old, new in zip(names, targets):
+        if new is None:
+            result.skipped += 1
+        elif new != old:
+            pairs.append((old, new))
+    # 名字不变的文件直接计入已完成
+    unchanged = len(names) - len(pairs) - result.skipped
+    total = len(names)
+
+    def on_done(done):
+        if progress:
+            progress(done + unchanged + result.skipped, total, 0)
+
+    from rename import apply_renames
+    renamed, errors = apply_renames(spec.output_path, pairs, on_done, should_stop)
+    if stats is not None:
+        stats.add("write", time.perf_counter() - planned, renamed)
+    result.created = renamed
+    result.cancelled = bool(should_stop and should_stop())
+    for old, error in errors:
+        result.add_error(os.path.join(spec.output_path, old), error)
+    if spec.keep_files:
+        result.files = [os.path.join(spec.output_path, new) for new in targets if new is not None]
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def render_content(spec, current_data):
+    """新建模式下一个文件的内容；使用文档模板时 current_data 是各占位符的取值"""
+    if spec.doc_template:
+        from doc_templates import render_user_template
+        return render_user_template(spec.doc_template, current_data)
+    from doc_templates import render_document
+    return render_document(spec.file_type, current_data)
+
+
+def load_doc_template(spec):
+    """预先编译文档模板，模板有问题时在开始写文件前报错"""
+    if spec.mode != "create" or not spec.doc_template:
+        return
+    from doc_templates import get_user_template
+    try:
+        get_user_template(spec.doc_template)
+    except Exception as e:
+        raise JobError(f"无法读取文档模板: {e}")
+
+
+def write_file(spec, full_path, current_data, copier=None, content=None):
+    """写出单个文件，返回实际路径（已加扩展名）
+
+    先写到同目录的临时文件再替换为最终文件名，中断时不会留下写了一半的文件。
+    复制模式下应传入任务共用的 copier，源文件只校验一次；新建模式下
+    content 为已渲染好的文件内容时直接写入。
+    """
+    fsync = spec.durability == "file"
+    if spec.mode == "copy":
+        if copier is None:
+            copier = Copier(spec.source_path, spec.copy_strategy)
+        full_path += copier.ext
+        atomic_write(full_path, copier.copy, fsync)
+    elif spec.mode == "create":
+        full_path += target_ext(spec)
+        if content is None:
+            content = render_content(spec, current_data)
+
+        def produce(path):
+            with open(path, "wb") as f:
+                f.write(content)
+        atomic_write(full_path, produce, fsync)
+    return full_path
+
+
+def report_path(spec):
+    """统计报告的位置：输出目录中，输出到压缩包时放在压缩包旁边"""
+    if spec.archive_path:
+        return spec.archive_path + ".report.json"
+    return os.path.join(spec.output_path, REPORT_NAME)
+
+
+def run_job(spec, progress=None, should_stop=None):
+    """执行一个生成任务
+
+    progress(已完成, 总数, 已写入字节数) 在每个文件写完后回调；
+    should_stop() 返回真时在当前文件写完后停止。
+    单个文件的写入错误记录在 result.errors 中，不中断整批任务。
+
+    序号、数据、文件名和写入是一条惰性的流水线，内存占用与生成数量无关
+    （除非 spec.keep_files 要求记录全部路径）。
+
+    result.stats 中是各阶段耗时、单文件延迟分位数等统计；spec.save_report
+    时同时写成 JSON 报告。spec.profile 可以让任务在 cProfile 或 tracemalloc
+    下运行，摘要放进报告，cProfile 的完整数据保存为报告旁边的 .prof 文件。
+    """
+    validate(spec)
+    from stats import JobStats, Profiler
+    stats = JobStats()
+    profiler = Profiler(spec.profile)
+    report = report_path(spec)
+    dump = os.path.splitext(report)[0] + ".prof" if spec.profile == "cprofile" else None
+    profiler.start()
+    try:
+        if spec.mode == "rename":
+            result = run_rename(spec, progress, should_stop, stats)
+        else:
+            result = _generate(spec, progress, should_stop, stats)
+    finally:
+        try:
+            profile = profiler.stop(dump)
+        except Exception as e:
+            # 分析出错不影响已经完成的任务
+            profile = {"mode": spec.profile, "error": str(e)}
+    result.stats = stats.to_dict(result)
+    if profile:
+        result.stats["profile"] = profile
+    if spec.save_report or profile:
+        from stats import write_report
+        result.stats["report_path"] = report
+        try:
+            write_report(report, result.stats)
+        except OSError as e:
+            result.stats["report_path"] = ""
+            result.stats["report_error"] = str(e)
+    return result
+
+
+def _generate(spec, progress, should_stop, stats):
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(spec.archive_path)) if spec.archive_path
+                else spec.output_path, exist_ok=True)
+    layout = make_layout(spec)
+    load_doc_template(spec)
+    result = JobResult(output_path=spec.archive_path or spec.output_path)
+    copier = None
+    if spec.mode == "copy":
+        try:
+            copier = Copier(spec.source_path, spec.copy_strategy)
+        except OSError as e:
+            raise JobError(f"无法读取源文件: {e}")
+    journal = open_journal(spec) if spec.resume else None
+    if not spec.archive_path:
+        # 上次运行崩溃时留下的临时文件
+        for directory in [spec.output_path] + (layout.shard_dirs() if layout is not None else []):
+            sweep_temp(directory)
+    commit = _Committer(spec, stats, journal, layout is not None and not spec.archive_path)
+    loading = time.perf_counter()
+    stats.add("setup", loading - started, 0)
+
+    names, rows = load_data(spec)
+    # 数据在规划文件名时才逐行读取，这部分时间单独计入 load
+    data = names, stats.timed("load", rows, parent="plan")
+    plan = _stop_on_error(
+        stats.timed("plan", _resolved_plan(spec, data, result, journal, layout, commit.resumed)), result)
+    stats.add("load", time.perf_counter() - loading, 0)
+    workers = resolve_workers(spec)
+    completed = False
+    try:
+        if spec.archive_path:
+            _run_archive(spec, copier, plan, workers, result, progress, should_stop, stats)
+        elif workers > 1 and spec.mode == "create":
+            _run_processes(spec, plan, workers, result, progress, should_stop, commit)
+        elif workers > 1:
+            _run_parallel(spec, copier, plan, workers, result, progress, should_stop, commit)
+        else:
+            _run_sequential(spec, copier, plan, result, progress, should_stop, commit)
+        completed = not (result.cancelled or result.failed or result.error)
+    finally:
+        finishing = time.perf_counter()
+        if copier is not None:
+            copier.close()
+        commit.close()
+        if journal is not None:
+            # 全部成功才删除日志，否则留给下次续传
+            journal.close(finished=completed)
+        stats.add("finish", time.perf_counter() - finishing, 0)
+    if copier is not None and not spec.archive_path:
+        result.copy_strategy = copier.active
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _stop_on_error(plan, result):
+    # 数据不足、批次内重名等往往在写出一部分文件后才发现：停止规划，
+    # 已写出的文件照常提交并计入结果，原因记在 result.error
+    try:
+        yield from plan
+    except JobError as e:
+        result.error = str(e)
+
+
+def _write_one(spec, copier, full_path, current_data):
+    """写出一个文件，返回 (路径, 大小, 修改时间, 校验和, {阶段: 耗时})
+
+    校验和只在续传按校验和核对时计算。
+    """
+    clock = time.perf_counter
+    timings = {}
+    started = clock()
+    content = None
+    if spec.mode == "create":
+        content = render_content(spec, current_data)
+        rendered = clock()
+        timings["render"] = rendered - started
+        started = rendered
+    written = write_file(spec, full_path, current_data, copier, content)
+    st = os.stat(written)
+    finished = clock()
+    timings["write"] = finished - started
+    digest = ""
+    if spec.resume and spec.verify == "checksum":
+        from journal import file_digest
+        digest = file_digest(written)
+        timings["verify"] = clock() - finished
+    return written, st.st_size, st.st_mtime_ns, digest, timings
+
+
+class _Committer:
+    """文件写好后在主线程中依次处理：统一落盘、续传日志、分片清单"""
+
+    def __init__(self, spec, stats, journal=None, manifest=False):
+        self.root = spec.output_path
+        self.stats = stats
+        self.journal = journal
+        # 输出到压缩包时由压缩包自己落盘
+        self.syncer = BatchSync(spec.output_path, "none" if spec.archive_path else spec.durability)
+        self.manifest = None
+        if manifest:
+            from sharding import Manifest
+            self.manifest = Manifest(spec.output_path)
+
+    def __call__(self, seq, written, size, mtime, digest, timings):
+        started = time.perf_counter()
+        self.syncer.committed(written)
+        if self.journal is not None or self.manifest is not None:
+            relpath = os.path.relpath(written, self.root)
+            if self.journal is not None:
+                self.journal.record(relpath, size, mtime, digest)
+            if self.manifest is not None:
+                self.manifest.add(seq, relpath)
+        self.stats.file_done(timings)
+        self.stats.add("commit", time.perf_counter() - started)
+
+    def resumed(self, seq, relpath):
+        # 续传跳过的文件仍列入清单
+        if self.manifest is not None:
+            self.manifest.add(seq, relpath)
+
+    def close(self):
+        if self.manifest is not None:
+            self.manifest.close()
+        self.syncer.close()
+
+
+def _run_sequential(spec, copier, plan, result, progress, should_stop, commit):
+    done = 0
+    for seq, current_data, filename in plan:
+        if should_stop and should_stop():
+            result.cancelled = True
+            break
+        full_path = os.path.join(spec.output_path, filename)
+        try:
+            written, size, mtime, digest, timings = _write_one(spec, copier, full_path, current_data)
+        except OSError as e:
+            result.add_error(full_path, e)
+        else:
+            commit(seq, written, size, mtime, digest, timings)
+            if spec.keep_files:
+                result.files.append(written)
+            result.created += 1
+            result.bytes_written += size
+        done += 1
+        if progress:
+            progress(done + result.skipped + result.resumed, spec.count, result.bytes_written)
+
+
+def _run_parallel(spec, copier, plan, workers, result, progress, should_stop, commit):
+    # 文件名仍由主线程按顺序规划，线程池只负责写入；
+    # 同时在途的任务数有上限，避免大批量时一次性提交全部任务
+    max_pending = workers * 4
+    pending = {}
+    written_files = []
+    done = 0
+
+    def collect(finished):
+        nonlocal done
+        for future in finished:
+            seq, full_path = pending.pop(future)
+            try:
+                written, size, mtime, digest, timings = future.result()
+            except OSError as e:
+                result.add_error(full_path, e)
+            else:
+                commit(seq, written, size, mtime, digest, timings)
+                if spec.keep_files:
+                    written_files.append((seq, written))
+                result.created += 1
+                result.bytes_written += size
+            done += 1
+            if progress:
+                progress(done + result.skipped + result.resumed, spec.count, result.bytes_written)
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for seq, current_data, filename in plan:
+            if should_stop and should_stop():
+                result.cancelled = True
+                break
+            full_path = os.path.join(spec.output_path, filename)
+            future = executor.submit(_write_one, spec, copier, full_path, current_data)
+            pending[future] = (seq, full_path)
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(pending)[0])
+
+    written_files.sort()
+    result.files.extend(path for _, path in written_files)
+
+
+def _init_create_worker(file_type, doc_template=""):
+    # 每个子进程只加载一次文档库并编译模板
+    from doc_templates import get_template, get_user_template
+    if doc_template:
+        get_user_template(doc_template)
+    else:
+        get_template(file_type)
+
+
+def _create_chunk(spec, items):
+    """子进程中生成一组文件，返回 ([(顺序, *_write_one 的结果)], [错误])"""
+    written = []
+    errors = []
+    for seq, full_path, current_data in items:
+        try:
+            written.append((seq,) + _write_one(spec, None, full_path, current_data))
+        except OSError as e:
+            errors.append({"path": full_path, "error": str(e)})
+    return written, errors
+
+
+def _run_processes(spec, plan, workers, result, progress, should_stop, commit):
+    # 与线程池相同：主进程按顺序规划文件名，分块交给子进程写入
+    max_pending = workers * 2
+    pending = {}
+    written_files = []
+    done = 0
+
+    def collect(finished):
+        nonlocal done
+        for future in finished:
+            items = pending.pop(future)
+            try:
+                written, errors = future.result()
+            except Exception as e:
+                errors = [{"path": full_path, "error": str(e)} for _, full_path, _ in items]
+                written = []
+            for seq, path, size, mtime, digest, timings in written:
+                commit(seq, path, size, mtime, digest, timings)
+                if spec.keep_files:
+                    written_files.append((seq, path))
+                result.bytes_written += size
+            result.created += len(written)
+            for error in errors:
+                result.add_error(error["path"], error["error"])
+            done += len(items)
+            if progress:
+                progress(done + result.skipped + result.resumed, spec.count, result.bytes_written)
+
+    def submit(items):
+        future = executor.submit(_create_chunk, spec, items)
+        pending[future] = items
+        if len(pending) >= max_pending:
+            collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_create_worker,
+                             initargs=(spec.file_type, spec.doc_template)) as executor:
+        chunk = []
+        for seq, current_data, filename in plan:
+            if should_stop and should_stop():
+                result.cancelled = True
+                break
+            chunk.append((seq, os.path.join(spec.output_path, filename), current_data))
+            if len(chunk) >= PROCESS_CHUNK_SIZE:
+                submit(chunk)
+                chunk = []
+        if chunk and not result.cancelled:
+            submit(chunk)
+        collect(wait(pending)[0])
+
+    written_files.sort()
+    result.files.extend(path for _, path in written_files)
+
+
+def _render_timed(spec, text):
+    started = time.perf_counter()
+    content = render_content(spec, text)
+    return content, time.perf_counter() - started
+
+
+def _render_chunk(spec, texts):
+    """子进程中渲染一组文档，返回 [(内容, 渲染耗时)]（输出到压缩包时使用）"""
+    return [_render_timed(spec, text) for text in texts]
+
+
+def _iter_rendered(spec, items, workers):
+    """按顺序产出 (文件名, (文档内容, 渲染耗时))；多进程时分块渲染，在途的块数有上限"""
+    if workers <= 1:
+        for filename, text in items:
+            yield filename, _render_timed(spec, text)
+        return
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    queue = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_create_worker,
+                             initargs=(spec.file_type, spec.doc_template)) as executor:
+        def submit(chunk):
+            names = [filename for filename, _ in chunk]
+            texts = [text for _, text in chunk]
+            queue.append((names, executor.submit(_render_chunk, spec, texts)))
+
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= PROCESS_CHUNK_SIZE:
+                submit(chunk)
+                chunk = []
+            # 最早提交的块先写，保证压缩包中的顺序与序号一致
+            while len(queue) > workers * 2:
+                names, future = queue.popleft()
+                yield from zip(names, future.result())
+        if chunk:
+            submit(chunk)
+        while queue:
+            names, future = queue.popleft()
+            yield from zip(names, future.result())
+
+
+def _run_archive(spec, copier, plan, workers, result, progress, should_stop, stats):
+    """所有文件直接写进一个压缩包，不经过输出目录"""
+    from archive import ArchiveWriter
+    try:
+        writer = ArchiveWriter(spec.archive_path)
+    except (OSError, ValueError) as e:
+        raise JobError(f"无法创建压缩包: {e}")
+    ext = target_ext(spec)
+
+    def planned():
+        # 取消时停止规划；已经在途的文件仍写入压缩包
+        for _, current_data, stem in plan:
+            if should_stop and should_stop():
+                result.cancelled = True
+                return
+            # 分片时成员名带子目录，压缩包中统一用 /
+            yield (stem + ext).replace(os.sep, "/"), current_data
+
+    finished = False
+    try:
+        if copier is not None:
+            # 源文件只读一次；zip 中只压缩一次，之后每个成员复用同一份压缩数据
+            payload = copier.payload()
+            blob = writer.blob(payload.data, spec.source_path)
+            entries = ((name, blob, {}) for name, _ in planned())
+            mtime, mode = payload.st.st_mtime, payload.st.st_mode
+        else:
+            entries = ((name, content, {"render": seconds})
+                       for name, (content, seconds) in _iter_rendered(spec, planned(), workers))
+            mtime, mode = time.time(), 0o644
+        for name, content, timings in entries:
+            started = time.perf_counter()
+            if copier is None:
+                blob = writer.blob(content, name)
+            writer.add(name, blob, mtime, mode)
+            timings["write"] = time.perf_counter() - started
+            stats.file_done(timings)
+            result.created += 1
+            result.bytes_written += len(blob.data)
+            if spec.keep_files:
+                result.files.append(name)
+            if progress:
+                progress(result.created + result.skipped, spec.count, result.bytes_written)
+        closing = time.perf_counter()
+        writer.close(fsync=spec.durability != "none")
+        stats.add("finish", time.perf_counter() - closing, 0)
+        finished = True
+    except OSError as e:
+        raise JobError(f"写入压缩包失败: {e}")
+    finally:
+        if not finished:
+            writer.abort()
+
+
+def build_arg_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="批量文件生成工具（命令行）")
+    parser.add_argument("mode", choices=["copy", "create", "rename"],
+                        help="复制文件、新建文件或重命名目录中已有的文件")
+    parser.add_argument("-o", "--output", default="", help="输出目录（重命名模式下为要重命名的目录）")
+    parser.add_argument("-n", "--count", type=int, default=1, help="生成数量")
+    parser.add_argument("-s", "--source", default="", help="源文件（复制模式）")
+    parser.add_argument("-t", "--file-type", default=".docx", choices=[".docx", ".pptx"],
+                        help="文件类型（新建模式）")
+    parser.add_argument("--template", default="文档_{序号}", help="文件名模板")
+    parser.add_argument("--doc-template", default="",
+                        help="新建模式使用的 .docx/.pptx 模板，正文、页眉页脚和表格中的 {名称} 被替换")
+    parser.add_argument("--start", type=int, default=1, help="起始序号")
+    parser.add_argument("--style", default="Arabic",
+                        choices=sorted(STYLE_MAP.values()), help="序号样式")
+    parser.add_argument("--skip", default="", help="跳过数字，如 1,3,5 或 1-5")
+    parser.add_argument("--skip-multiples", type=int, default=0, help="跳过该数的倍数")
+    parser.add_argument("--skip-digits", default="", help="跳过含有这些数字的序号，如 4")
+    parser.add_argument("--data", default=None, help="手动输入的数据")
+    parser.add_argument("--excel", default=None, help="数据来源Excel/CSV文件")
+    parser.add_argument("--excel-col", type=int, default=1, help="数据列号（从1开始）")
+    parser.add_argument("--fields", default="",
+                        help='多列字段映射，如 "姓名=1,部门=3"、"姓名,部门"（按表头名）或 "*"（表头全部列）')
+    parser.add_argument("--header", action="store_true", help="数据文件第一行是表头")
+    parser.add_argument("--body", default="", help='新建文档的标题内容模板，如 "{姓名} - {部门}"')
+    parser.add_argument("--date", default=None, help="替换 {日期} 的文本")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="复制为线程数、新建为进程数，0 表示按CPU自动选择")
+    parser.add_argument("--strategy", default="copy", choices=STRATEGIES,
+                        help="复制方式，不支持时自动降级到下一种")
+    parser.add_argument("--durability", default="none", choices=DURABILITY_LEVELS,
+                        help="落盘方式：不强制落盘、每个文件落盘（file）、每批统一落盘（batch）")
+    parser.add_argument("--on-conflict", default="overwrite", choices=CONFLICT_POLICIES,
+                        help="与已有文件或本批文件重名时：覆盖、跳过或添加后缀")
+    parser.add_argument("--pattern", default="*", help="重命名模式只处理匹配的文件，如 *.docx")
+    parser.add_argument("--sort", default="name", choices=RENAME_SORT_KEYS,
+                        help="重命名模式的排序方式：文件名、修改时间、文件大小")
+    parser.add_argument("--reverse", action="store_true", help="重命名模式倒序排列")
+    parser.add_argument("--shard", default="none", choices=SHARD_LAYOUTS,
+                        help="分子目录存放：按序号（bucket）或按文件名哈希（hash），并写出 manifest.csv；"
+                             "同一输出目录中分片方式和每个子目录的文件数要保持不变")
+    parser.add_argument("--shard-size", type=int, default=1000, help="按序号分子目录时每个子目录的文件数")
+    parser.add_argument("--archive", default="",
+                        help="把所有文件直接写进该压缩包（.zip/.tar/.tar.gz/.tar.zst），代替输出目录")
+    parser.add_argument("--resume", action="store_true",
+                        help="在输出目录记录进度，中断后用相同参数重新运行时跳过已完成的文件")
+    parser.add_argument("--verify", default="stat", choices=VERIFY_MODES,
+                        help="续传时核对已完成文件：比较大小和修改时间，或比较校验和")
+    parser.add_argument("--report", action="store_true",
+                        help=f"把各阶段耗时等统计写成 JSON 报告（输出目录中的 {REPORT_NAME}）")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default="none",
+                        help="在 cProfile 或 tracemalloc 下运行，摘要写进报告")
+    parser.add_argument("--dry-run", action="store_true", help="只列出将要生成的文件名并检查重名")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    parser.add_argument("--list-files", action="store_true", help="结果中列出每个生成的文件")
+    return parser
+
+
+def spec_from_args(args):
+    spec = JobSpec(
+        mode=args.mode,
+        output_path=args.output,
+        count=args.count,
+        source_path=args.source,
+        file_type=args.file_type,
+        doc_template=args.doc_template,
+        filename_template=args.template,
+        start_index=args.start,
+        number_style=args.style,
+        skip_numbers=args.skip,
+        skip_multiples=args.skip_multiples,
+        skip_digits=args.skip_digits,
+        workers=args.workers,
+        copy_strategy=args.strategy,
+        durability=args.durability,
+        keep_files=args.list_files,
+        data_fields=args.fields,
+        data_header=args.header,
+        body_template=args.body,
+        conflict_policy=args.on_conflict,
+        rename_pattern=args.pattern,
+        rename_sort=args.sort,
+        rename_reverse=args.reverse,
+        shard_layout=args.shard,
+        shard_size=args.shard_size,
+        archive_path=args.archive,
+        resume=args.resume,
+        verify=args.verify,
+        save_report=args.report,
+        profile=args.profile,
+    )
+    if args.excel is not None:
+        spec.enable_data = True
+        spec.data_source = "excel"
+        spec.excel_path = args.excel
+        spec.excel_col = args.excel_col - 1
+    elif args.data is not None:
+        spec.enable_data = True
+        spec.manual_data = args.data
+    if args.date is not None:
+        spec.use_date = True
+        spec.date_text = args.date
+    return spec
+
+
+def print_plan(report, as_json):
+    if as_json:
+        import json
+        print(json.dumps(report.to_dict(), ensure_ascii=False))
+        return
+    for name in report.preview:
+        print(name)
+    if report.total > len(report.preview):
+        print(f"……共 {report.total} 个文件")
+    if report.duplicate_count:
+        print(f"批次内重名 {report.duplicate_count} 个，如: {', '.join(report.duplicates[:5])}")
+    if report.existing_count:
+        print(f"与已有文件重名 {report.existing_count} 个，如: {', '.join(report.existing[:5])}")
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.dry_run:
+        try:
+            report = plan_job(spec_from_args(args))
+        except JobError as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return 1
+        print_plan(report, args.json)
+        return 1 if report.conflict else 0
+    try:
+        result = run_job(spec_from_args(args))
+    except JobError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        import json
+        print(json.dumps(result.to_dict(), ensure_ascii=False))
+    else:
+        if args.mode == "rename":
+            print(f"已重命名 {result.created} 个文件，用时 {result.elapsed:.2f} 秒")
+        else:
+            print(f"已生成 {result.created} 个文件到 {result.output_path}，用时 {result.elapsed:.2f} 秒")
+        if result.resumed:
+            print(f"续传跳过已完成的 {result.resumed} 个文件")
+        if result.skipped:
+            print(f"因重名跳过 {result.skipped} 个文件")
+        if args.report or args.profile != "none":
+            from stats import format_summary
+            print(format_summary(result.stats))
+        for error in result.errors:
+            print(f"失败: {error['path']}: {error['error']}", file=sys.stderr)
+        if result.failed > len(result.errors):
+            print(f"……共 {result.failed} 个文件失败", file=sys.stderr)
+        if result.error:
+            print(f"错误: {result.error}，已停止", file=sys.stderr)
+    return 1 if result.failed or result.error else 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
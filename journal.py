@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import hashlib
+
+# 日志文件名前缀，后接任务参数的哈希
+JOURNAL_PREFIX = ".fm_journal_"
+
+# 日志首行，标明格式版本
+_HEADER = "FMJ1"
+
+# 缓冲的完成记录最长多久写入一次（秒），中断时最多重做这段时间内完成的文件
+FLUSH_INTERVAL = 1.0
+
+VERIFY_MODES = ("stat", "checksum")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def spec_hash(fields):
+    """决定输出内容的任务参数的哈希，参数变了就不会沿用旧日志"""
+    text = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class Journal:
+    """记录已完成文件的追加式日志，放在输出目录中
+
+    每行一个 JSON 数组 [文件名, 大小, 修改时间(ns), sha256]，进程崩溃时
+    最后一行可能不完整，读取时忽略。同一任务重新运行时，日志中记录过且
+    大小、修改时间（或校验和）仍一致的文件直接跳过。
+
+    开始写一个文件前先记一行 [文件名] 并立即写入日志文件。完成记录是
+    缓冲写入的，崩溃时可能丢失最后一段；这些文件有开始记录，重新运行时
+    不算已有文件，按原来的文件名重新生成，不会变成 "名称 (2)"。
+    """
+
+    def __init__(self, directory, digest, verify="stat"):
+        self.directory = directory
+        self.verify = verify
+        self.path = os.path.join(directory, f"{JOURNAL_PREFIX}{digest}.log")
+        self.started = set()
+        self.done = self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() == 0:
+            self._file.write(_HEADER + "\n")
+        self._last_flush = time.monotonic()
+
+    def _load(self):
+        done = {}
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return done
+        with f:
+            if f.readline().rstrip("\n") != _HEADER:
+                return done
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    if len(record) == 1:
+                        self.started.add(record[0])
+                        continue
+                    name, size, mtime, digest = record
+                except (ValueError, TypeError):
+                    continue
+                done[name] = (size, mtime, digest)
+        return done
+
+    def names(self):
+        """上次运行开始或完成过的文件名"""
+        return self.started.union(self.done)
+
+    def begin(self, name):
+        """开始写 name 之前调用；记录立即写入日志文件，先于输出文件出现"""
+        self._file.write(json.dumps([name], ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def is_done(self, name):
+        """name 是否已完成且输出文件未被改动（每个文件只检查一次，查过即释放）"""
+        record = self.done.pop(name, None)
+        if record is None:
+            return False
+        size, mtime, digest = record
+        path = os.path.join(self.directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != size:
+            return False
+        if self.verify == "checksum" and digest:
+            try:
+                return file_digest(path) == digest
+            except OSError:
+                return False
+        return st.st_mtime_ns == mtime
+
+    def record(self, name, size, mtime, digest=""):
+        self._file.write(json.dumps([name, size, mtime, digest], ensure_ascii=False) + "\n")
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self, finished=False):
+        """关闭日志；任务全部成功完成时删除日志"""
+        self._file.close()
+        if finished:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
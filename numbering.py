@@ -0,0 +1,203 @@
+from functools import lru_cache
+
+_CN_DIGITS = {
+    "Chinese": "零一二三四五六七八九",
+    "Chinese_Upper": "零壹贰叁肆伍陆柒捌玖",
+}
+_CN_UNITS = {
+    "Chinese": ("", "十", "百", "千"),
+    "Chinese_Upper": ("", "拾", "佰", "仟"),
+}
+# 每四位一节
+_CN_SECTIONS = ("", "万", "亿", "万亿", "亿亿")
+
+# ⓪ ①-⑳ ㉑-㉟ ㊱-㊿
+_CIRCLES = (
+    ["⓪"]
+    + [chr(c) for c in range(0x2460, 0x2474)]
+    + [chr(c) for c in range(0x3251, 0x3260)]
+    + [chr(c) for c in range(0x32b1, 0x32c0)]
+)
+
+_ROMAN_PARTS = (
+    ("", "M", "MM", "MMM"),
+    ("", "C", "CC", "CCC", "CD", "D", "DC", "DCC", "DCCC", "CM"),
+    ("", "X", "XX", "XXX", "XL", "L", "LX", "LXX", "LXXX", "XC"),
+    ("", "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX"),
+)
+ROMAN_MAX = 3999
+
+
+def _section_text(n, digits, units):
+    """0 < n < 10000 的一节，中间连续的零只读一个“零”，末尾的零不读"""
+    parts = []
+    zero = False
+    for pos in range(3, -1, -1):
+        d = n // 10 ** pos % 10
+        if d == 0:
+            zero = bool(parts)
+            continue
+        if zero:
+            parts.append(digits[0])
+            zero = False
+        parts.append(digits[d] + units[pos])
+    return "".join(parts)
+
+
+class NumberFormatter:
+    """按样式把序号转换为文本，查表实现
+
+    首次使用时预先生成所需的表；format_range / format_many 一次生成一批名称。
+    """
+
+    def __init__(self, style):
+        self.style = style
+        self._prefix_high = None
+        self._prefix_text = ""
+        self._table = None
+        if style in _CN_DIGITS:
+            digits, units = _CN_DIGITS[style], _CN_UNITS[style]
+            self._zero = digits[0]
+            # inner: 非最高节，如 10 -> 一十；leading: 最高节，小写 10-19 读作“十X”
+            inner = [""] + [_section_text(n, digits, units) for n in range(1, 10000)]
+            leading = list(inner)
+            leading[0] = digits[0]
+            if style == "Chinese":
+                for n in range(10, 20):
+                    leading[n] = inner[n][1:]
+            self._inner = inner
+            self._leading = leading
+            # 低位节前需要补“零”（不足千或上一节为零）时的写法
+            self._inner_zero = [""] + [digits[0] + s for s in inner[1:]]
+            self._format = self._chinese
+        elif style == "Roman":
+            self._roman = [""] + [
+                "".join(_ROMAN_PARTS[i][int(ch)] for i, ch in enumerate(f"{n:04d}"))
+                for n in range(1, ROMAN_MAX + 1)
+            ]
+            self._format = self._from_table(self._roman, 1)
+        elif style == "Circle":
+            self._format = self._from_table(_CIRCLES, 0)
+        else:
+            self._format = str
+
+    def _from_table(self, table, low):
+        high = len(table) - 1
+        self._table = (table, low, high)
+
+        def fmt(n):
+            return table[n] if low <= n <= high else str(n)
+        return fmt
+
+    def _chinese_full(self, n):
+        sections = []
+        while n:
+            n, sec = divmod(n, 10000)
+            sections.append(sec)
+        if len(sections) > len(_CN_SECTIONS):
+            return None
+        parts = []
+        need_zero = False
+        for pos in range(len(sections) - 1, -1, -1):
+            sec = sections[pos]
+            if sec == 0:
+                need_zero = bool(parts)
+                continue
+            if not parts:
+                parts.append(self._leading[sec])
+            elif need_zero or sec < 1000:
+                parts.append(self._inner_zero[sec])
+            else:
+                parts.append(self._inner[sec])
+            parts.append(_CN_SECTIONS[pos])
+            need_zero = False
+        return "".join(parts)
+
+    def _high_prefix(self, high):
+        # 相邻序号的高位相同，缓存最近一次的高位文本
+        if high != self._prefix_high:
+            self._prefix_text = self._chinese_full(high * 10000)
+            self._prefix_high = high
+        return self._prefix_text
+
+    def _chinese(self, n):
+        if n < 0:
+            return str(n)
+        if n < 10000:
+            return self._leading[n]
+        high, low = divmod(n, 10000)
+        prefix = self._high_prefix(high)
+        if prefix is None:
+            return str(n)
+        if low == 0:
+            return prefix
+        if low < 1000 or high % 10000 == 0:
+            return prefix + self._inner_zero[low]
+        return prefix + self._inner[low]
+
+    def format(self, n):
+        return self._format(n)
+
+    def format_many(self, indexes):
+        """把一组序号转换为文本列表，其中连续的序号整段交给 format_range"""
+        if self._format is str:
+            return list(map(str, indexes))
+        names = []
+        indexes = iter(indexes)
+        run_start = prev = next(indexes, None)
+        if run_start is None:
+            return names
+        for n in indexes:
+            if n != prev + 1:
+                names.extend(self.format_range(run_start, prev + 1))
+                run_start = n
+            prev = n
+        names.extend(self.format_range(run_start, prev + 1))
+        return names
+
+    def format_range(self, start, stop):
+        """start 到 stop-1 的连续序号，按节成批拼接"""
+        if self._format is str:
+            return list(map(str, range(start, stop)))
+        if self._table is not None:
+            # 表内的部分直接切片，表外的退回阿拉伯数字
+            table, low, high = self._table
+            names = list(map(str, range(start, min(stop, low))))
+            names.extend(table[max(start, low):max(min(stop, high + 1), low)])
+            names.extend(map(str, range(max(start, high + 1), stop)))
+            return names
+        if start < 0:
+            return list(map(self._format, range(start, stop)))
+        names = []
+        n = start
+        if n < 10000:
+            end = min(stop, 10000)
+            names.extend(self._leading[n:end])
+            n = end
+        while n < stop:
+            high, low = divmod(n, 10000)
+            end = min(stop, (high + 1) * 10000)
+            prefix = self._high_prefix(high)
+            if prefix is None:
+                names.extend(map(str, range(n, end)))
+                n = end
+                continue
+            low_end = low + (end - n)
+            if low == 0:
+                names.append(prefix)
+                low = 1
+            # 不足千、或上一节为零时低位前要补“零”
+            zero_end = min(10000 if high % 10000 == 0 else 1000, low_end)
+            names.extend(prefix + s for s in self._inner_zero[low:zero_end])
+            names.extend(prefix + s for s in self._inner[max(low, zero_end):low_end])
+            n = end
+        return names
+
+
+@lru_cache(maxsize=None)
+def get_formatter(style):
+    return NumberFormatter(style)
+
+
+def number_to_style(num, style):
+    return get_formatter(style).format(num)
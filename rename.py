@@ -0,0 +1,190 @@
+import os
+import re
+from fnmatch import fnmatch
+
+from atomic import TEMP_PREFIX as _WRITE_TEMP_PREFIX
+from conflicts import name_key
+from journal import JOURNAL_PREFIX
+from sharding import MANIFEST_NAME
+from stats import REPORT_NAME
+
+# 排序方式：文件名（数字按大小比较）、修改时间、文件大小
+RENAME_SORT_KEYS = ("name", "mtime", "size")
+
+# 两阶段重命名用的临时文件名前缀，列目录时忽略这类文件
+TEMP_PREFIX = ".fm_rename_"
+
+# 本工具自己的文件（临时文件、续传日志、分片清单、统计报告）不参与重命名，
+# 也不占用序号
+_OWN_PREFIXES = (TEMP_PREFIX, _WRITE_TEMP_PREFIX, JOURNAL_PREFIX)
+_OWN_FILES = {MANIFEST_NAME, REPORT_NAME, os.path.splitext(REPORT_NAME)[0] + ".prof"}
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(name):
+    # "文档_2" 排在 "文档_10" 前面；拆分后奇数位总是数字，类型一一对应
+    parts = _DIGITS.split(os.path.normcase(name))
+    parts[1::2] = map(int, parts[1::2])
+    return parts
+
+
+def list_files(directory, pattern="*", sort_key="name", reverse=False):
+    """一次 scandir 列出目录中要重命名的文件，返回 (文件列表, 其余条目名)
+
+    文件列表按 sort_key 排好序；其余条目（子目录、不匹配的文件）的名字
+    不会被改动，但新文件名不能与它们重复。
+    """
+    files = []
+    others = set()
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith(_OWN_PREFIXES) or entry.name in _OWN_FILES:
+                continue
+            if entry.is_file() and fnmatch(entry.name, pattern):
+                files.append(entry)
+            else:
+                others.add(name_key(entry.name))
+    if sort_key == "mtime":
+        keys = {e.name: (e.stat().st_mtime_ns, natural_key(e.name)) for e in files}
+    elif sort_key == "size":
+        keys = {e.name: (e.stat().st_size, natural_key(e.name)) for e in files}
+    else:
+        keys = {e.name: natural_key(e.name) for e in files}
+    files.sort(key=lambda e: keys[e.name], reverse=reverse)
+    return [e.name for e in files], others
+
+
+def _suffixed(stem, ext, taken):
+    k = 2
+    while True:
+        name = f"{stem} ({k}){ext}"
+        if name_key(name) not in taken:
+            return name
+        k += 1
+
+
+def resolve_targets(names, stems, policy, others):
+    """为每个文件确定新文件名（保留原扩展名）
+
+    返回 (新文件名列表, 批次内重名的文件名, 与其余条目重名的文件名)。
+    被跳过的文件新文件名为 None。重命名从不覆盖文件：policy 为 "suffix"
+    时添加 " (2)" 等后缀，为 "skip" 时保留原名，为 "overwrite" 时只报告冲突。
+    """
+    targets = [stem + os.path.splitext(name)[1] for name, stem in zip(names, stems)]
+    if policy == "suffix":
+        taken = set(others)
+        for pos, target in enumerate(targets):
+            if name_key(target) in taken:
+                target = targets[pos] = _suffixed(stems[pos], os.path.splitext(target)[1], taken)
+            taken.add(name_key(target))
+        return targets, [], []
+
+    # 保留原名的文件会占住原来的名字，可能又与别的新文件名冲突，直到不再变化
+    kept = set()
+    while True:
+        taken = set(others)
+        taken.update(name_key(names[pos]) for pos in kept)
+        seen = set()
+        duplicates = []
+        existing = []
+        for pos, target in enumerate(targets):
+            if pos in kept:
+                continue
+            key = name_key(target)
+            if key in taken:
+                existing.append(pos)
+            elif key in seen:
+                duplicates.append(pos)
+            else:
+                seen.add(key)
+        if policy != "skip" or not (duplicates or existing):
+            break
+        kept.update(duplicates)
+        kept.update(existing)
+    for pos in kept:
+        targets[pos] = None
+    return (targets, [targets[pos] for pos in duplicates],
+            [targets[pos] for pos in existing])
+
+
+def apply_renames(directory, pairs, on_done=None, should_stop=None):
+    """执行重命名，返回 (成功数, [(原文件名, 错误)])
+
+    新文件名不是任何原文件名的，直接一步改名；新文件名正好是别的文件
+    原来的名字时（如 a→b、b→a），先全部改成临时名，再改成最终名字，
+    互换、循环都不会覆盖文件。取消或出错时已改成临时名的文件会改成最终
+    名字或改回原名，不会覆盖任何文件。
+    """
+    sources = {name_key(old) for old, _ in pairs}
+    direct = []
+    chained = []
+    for old, new in pairs:
+        (chained if name_key(new) in sources else direct).append((old, new))
+
+    done = 0
+    errors = []
+    stopped = False
+    # 仍占着原名字的文件，第二阶段不能改到这些名字上
+    present = set(sources)
+    for old, new in direct:
+        if should_stop and should_stop():
+            stopped = True
+            break
+        try:
+            os.rename(os.path.join(directory, old), os.path.join(directory, new))
+        except OSError as e:
+            errors.append((old, e))
+        else:
+            present.discard(name_key(old))
+            done += 1
+            if on_done:
+                on_done(done)
+
+    # 第一阶段：改成临时名
+    moved = []
+    if not stopped:
+        prefix = f"{TEMP_PREFIX}{os.getpid()}_"
+        for seq, (old, new) in enumerate(chained):
+            if should_stop and should_stop():
+                break
+            temp = f"{prefix}{seq}"
+            try:
+                os.rename(os.path.join(directory, old), os.path.join(directory, temp))
+            except OSError as e:
+                errors.append((old, e))
+            else:
+                present.discard(name_key(old))
+                moved.append((old, new, temp))
+
+    # 第二阶段：临时名改成最终名字。目标仍被未改名的文件占着时改回原名，
+    # 改回原名又会占住别的文件的目标，所以先推算出全部要改回的文件
+    blocked = set()
+    changed = True
+    while changed:
+        changed = False
+        for pos, (old, new, _) in enumerate(moved):
+            if pos not in blocked and name_key(new) in present:
+                blocked.add(pos)
+                present.add(name_key(old))
+                changed = True
+    for pos in blocked:
+        old, _, temp = moved[pos]
+        try:
+            os.rename(os.path.join(directory, temp), os.path.join(directory, old))
+        except OSError as e:
+            errors.append((old, f"{e}（文件暂存为 {temp}）"))
+    for pos, (old, new, temp) in enumerate(moved):
+        if pos in blocked:
+            continue
+        try:
+            os.rename(os.path.join(directory, temp), os.path.join(directory, new))
+        except OSError as e:
+            # 原名可能已被别的文件占用，保留临时名并在错误中注明
+            errors.append((old, f"{e}（文件暂存为 {temp}）"))
+        else:
+            present.add(name_key(new))
+            done += 1
+            if on_done:
+                on_done(done)
+    return done, errors
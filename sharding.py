@@ -0,0 +1,187 @@
+import os
+import csv
+import heapq
+import hashlib
+import itertools
+import tempfile
+import threading
+
+from atomic import atomic_write
+from conflicts import name_key
+
+# 分片方式：不分片 / 按序号每 N 个一个子目录 / 按文件名哈希前缀分到 256 个子目录
+SHARD_LAYOUTS = ("none", "bucket", "hash")
+
+# 分片清单的文件名，放在输出目录下
+MANIFEST_NAME = "manifest.csv"
+
+# 按序号分片时子目录名的位数
+_BUCKET_DIGITS = 5
+
+_HEADER = ["顺序", "文件名", "路径"]
+
+# 清单暂存时每段的行数，以及检查分片方式时读取的行数
+_RUN_ROWS = 100_000
+_CHECK_ROWS = 100
+
+
+class ShardLayout:
+    """把逻辑文件名映射到输出目录下的分片子目录
+
+    - "bucket"：第 seq 个文件（从0开始）放在 f"{seq // size:05d}" 子目录
+    - "hash"：按文件名 md5 的前两位十六进制放在 00-ff 子目录，同名文件总在同一分片
+
+    子目录在第一次用到时创建，之后只查缓存，不再调用 makedirs。
+    """
+
+    def __init__(self, root, layout="bucket", size=1000, create=True):
+        self.root = root
+        self.layout = layout
+        self.size = max(1, size)
+        self.create = create
+        self._made = set()
+        self._lock = threading.Lock()
+
+    def shard_for(self, seq, name):
+        if self.layout == "bucket":
+            return f"{seq // self.size:0{_BUCKET_DIGITS}d}"
+        return hashlib.md5(name_key(name).encode("utf-8")).hexdigest()[:2]
+
+    def is_shard(self, dirname):
+        if self.layout == "bucket":
+            return len(dirname) >= _BUCKET_DIGITS and dirname.isdigit()
+        return len(dirname) == 2 and all(c in "0123456789abcdef" for c in dirname)
+
+    def path_for(self, seq, name):
+        """返回相对输出目录的路径，需要时创建分片子目录"""
+        shard = self.shard_for(seq, name)
+        if self.create and shard not in self._made:
+            with self._lock:
+                if shard not in self._made:
+                    os.makedirs(os.path.join(self.root, shard), exist_ok=True)
+                    self._made.add(shard)
+        return os.path.join(shard, name)
+
+    def shard_dirs(self):
+        """输出目录下已有的分片子目录"""
+        try:
+            with os.scandir(self.root) as it:
+                return [e.path for e in it if e.is_dir() and self.is_shard(e.name)]
+        except FileNotFoundError:
+            return []
+
+    def existing_names(self):
+        """各分片中已有的文件名（逻辑文件名），每个分片一次 scandir"""
+        names = set()
+        for path in self.shard_dirs():
+            with os.scandir(path) as it:
+                names.update(name_key(e.name) for e in it)
+        return names
+
+
+def check_layout(root, layout):
+    """输出目录中已有的清单是否按同一种分片方式生成，不是时抛出 ValueError
+
+    分片方式或每个子目录的文件数变了，同一个文件会落到另一个子目录，
+    旧的那份留在原处。只检查清单开头的若干行。
+    """
+    path = os.path.join(root, MANIFEST_NAME)
+    try:
+        f = open(path, newline="", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        reader = csv.reader(f)
+        # 旧版清单没有顺序一列，无法核对
+        if next(reader, None) != _HEADER:
+            return
+        for row in itertools.islice(reader, _CHECK_ROWS):
+            try:
+                seq, name, relpath = int(row[0]), row[1], row[2]
+            except (ValueError, IndexError):
+                continue
+            shard = relpath.partition("/")[0]
+            if not layout.is_shard(shard) or (
+                    layout.layout == "bucket" and shard != layout.shard_for(seq, name)):
+                raise ValueError(f"输出目录中已有按其他分片方式存放的文件（如 {relpath}）")
+
+
+class Manifest:
+    """逻辑文件名 -> 实际路径（相对输出目录）的清单，写成 CSV
+
+    每行为 [顺序, 文件名, 路径]，顺序是文件在生成它的那次计划中的位置（从0开始）。
+    本次运行写入和续传时已完成的文件与上次清单中的行合并：跳过的已有文件、
+    上次多生成的文件仍保留原来的行，同一顺序、同一路径只保留本次的一行，
+    已被删除的文件不再列出。行先按完成顺序暂存，每 _RUN_ROWS 行排好序写到
+    临时文件，结束时与上次清单按顺序归并，写到临时文件后替换 manifest.csv，
+    内存不随文件数增长。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self._rows = []
+        self._runs = []
+
+    def add(self, seq, relpath):
+        self._rows.append((seq, os.path.basename(relpath), relpath.replace(os.sep, "/")))
+        if len(self._rows) >= _RUN_ROWS:
+            self._spill()
+
+    def _spill(self):
+        self._rows.sort()
+        run = tempfile.TemporaryFile("w+", newline="", encoding="utf-8")
+        csv.writer(run).writerows(self._rows)
+        run.seek(0)
+        self._runs.append(run)
+        self._rows = []
+
+    def _read_run(self, run):
+        for seq, name, relpath in csv.reader(run):
+            yield int(seq), relpath, 0, name
+
+    def _read_previous(self, f):
+        reader = csv.reader(f)
+        # 旧版清单没有顺序一列，无法合并
+        if next(reader, None) != _HEADER:
+            return
+        for row in reader:
+            try:
+                seq, name, relpath = int(row[0]), row[1], row[2]
+            except (ValueError, IndexError):
+                continue
+            yield seq, relpath, 1, name
+
+    def close(self):
+        self._rows.sort()
+        streams = [self._read_run(run) for run in self._runs]
+        streams.append((seq, relpath, 0, name) for seq, name, relpath in self._rows)
+        try:
+            previous = open(self.path, newline="", encoding="utf-8")
+        except FileNotFoundError:
+            previous = None
+        if previous is not None:
+            streams.append(self._read_previous(previous))
+
+        def produce(path):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(_HEADER)
+                last = None
+                # 同一顺序、同一路径时本次的行排在上次的行前面
+                for seq, relpath, old, name in heapq.merge(*streams):
+                    if (seq, relpath) == last:
+                        continue
+                    if old and not os.path.lexists(os.path.join(self.root, relpath)):
+                        continue
+                    last = seq, relpath
+                    writer.writerow((seq, name, relpath))
+        try:
+            atomic_write(self.path, produce)
+        finally:
+            if previous is not None:
+                previous.close()
+            for run in self._runs:
+                run.close()
+            self._runs = []
+            self._rows = []
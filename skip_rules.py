@@ -0,0 +1,134 @@
+import re
+from bisect import bisect_right
+
+
+class SkipRules:
+    """编译后的跳过规则
+
+    - 跳过区间：合并、排序后的闭区间，用二分查找判断
+    - 跳过倍数：能被 multiple 整除的序号
+    - 跳过数字：十进制中含有任一指定数字的序号（如 "4" 跳过 4、14、40）
+
+    序号按 iter_valid 惰性产出；next_valid 整段跳过区间和含被跳过数字的序号，
+    不逐个扫描。
+    """
+
+    def __init__(self, intervals=(), multiple=0, digits=""):
+        self.starts = []
+        self.ends = []
+        for a, b in sorted((min(a, b), max(a, b)) for a, b in intervals):
+            if self.ends and a <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], b)
+            else:
+                self.starts.append(a)
+                self.ends.append(b)
+        self.multiple = multiple if multiple and multiple > 1 else 0
+        self.forbidden = frozenset(int(d) for d in digits if d.isdigit())
+        self.allowed = [d for d in range(10) if d not in self.forbidden]
+        if not any(self.allowed):
+            raise ValueError("跳过数字不能包含全部 1-9")
+        # 比每个数字大的最小可用数字
+        self._bigger = [next((a for a in self.allowed if a > d), None) for d in range(10)]
+        self._digit_re = re.compile("[%s]" % "".join(map(str, sorted(self.forbidden)))) if self.forbidden else None
+
+    @classmethod
+    def parse(cls, text, multiple=0, digits=""):
+        """解析 "1,3,5" 或 "1-5" 形式的跳过数字"""
+        intervals = []
+        for part in (text or "").replace("，", ",").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    start, end = map(int, part.split("-"))
+                    intervals.append((start, end))
+                else:
+                    n = int(part)
+                    intervals.append((n, n))
+            except ValueError:
+                raise ValueError(f"无法解析跳过数字: {part}")
+        return cls(intervals, multiple, digits)
+
+    def __bool__(self):
+        return bool(self.starts or self.multiple or self.forbidden)
+
+    def _in_intervals(self, n):
+        pos = bisect_right(self.starts, n) - 1
+        return pos >= 0 and n <= self.ends[pos]
+
+    def _has_forbidden_digit(self, n):
+        return self._digit_re is not None and self._digit_re.search(str(n)) is not None
+
+    def __contains__(self, n):
+        """n 是否应被跳过"""
+        if self.multiple and n % self.multiple == 0:
+            return True
+        if self._has_forbidden_digit(n):
+            return True
+        return self._in_intervals(n)
+
+    # ---- 下一个有效序号 ----
+
+    def _next_digit_ok(self, n):
+        """不小于 n 且不含被跳过数字的最小数"""
+        if not self.forbidden:
+            return n
+        while n < 0 and self._has_forbidden_digit(n):
+            n += 1
+        if n < 0:
+            return n
+        s = str(n)
+        found = self._digit_re.search(s)
+        if found is None:
+            return n
+        i = found.start()
+        rest = len(s) - i - 1
+        low = self.allowed[0]
+        bigger = self._bigger[int(s[i])]
+        if bigger is not None:
+            return int(s[:i] + str(bigger) + str(low) * rest)
+        # 这一位没有更大的可用数字，需要进位到前面的部分
+        if i == 0:
+            first = next(d for d in self.allowed if d > 0)
+            return int(str(first) + str(low) * len(s))
+        head = self._next_digit_ok(int(s[:i]) + 1)
+        return int(str(head) + str(low) * (rest + 1))
+
+    def next_valid(self, n):
+        """不小于 n 的最小有效序号"""
+        while True:
+            m = self._next_digit_ok(n)
+            pos = bisect_right(self.starts, m) - 1
+            if pos >= 0 and m <= self.ends[pos]:
+                m = self.ends[pos] + 1
+            if self.multiple and m % self.multiple == 0:
+                m += 1
+            if m == n:
+                return n
+            n = m
+
+    def iter_valid(self, start):
+        """从 start 起依次产出有效序号
+
+        到下一个跳过区间之前逐个只检查倍数和数字，遇到无效的序号再用
+        next_valid 整段跳过。
+        """
+        multiple = self.multiple
+        has_digit = self._has_forbidden_digit if self.forbidden else None
+        # 个位不进位时只有个位变了，查表即可
+        bad_last = [d in self.forbidden for d in range(10)]
+        n = start
+        while True:
+            n = self.next_valid(n)
+            pos = bisect_right(self.starts, n)
+            limit = self.starts[pos] if pos < len(self.starts) else None
+            while True:
+                yield n
+                n += 1
+                if n == limit or (multiple and n % multiple == 0):
+                    break
+                if has_digit is not None:
+                    last = n % 10
+                    if bad_last[last] if n > 0 and last else has_digit(n):
+                        break
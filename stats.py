@@ -0,0 +1,261 @@
+import os
+import json
+import math
+import time
+import threading
+
+# 各阶段：准备（建目录、编译模板、打开日志、清理临时文件等）/ 读取数据 / 规划文件名 /
+# 渲染文档 / 写入 / 校验和 / 主线程提交（日志、清单、落盘）/ 收尾
+STAGES = ("setup", "load", "plan", "render", "write", "verify", "commit", "finish")
+
+STAGE_LABELS = {
+    "setup": "准备",
+    "load": "读取数据",
+    "plan": "生成文件名",
+    "render": "渲染文档",
+    "write": "写入",
+    "verify": "校验",
+    "commit": "提交",
+    "finish": "收尾",
+}
+
+PROFILE_MODES = ("none", "cprofile", "tracemalloc")
+
+# 报告文件名，放在输出目录中（输出到压缩包时放在压缩包旁边）
+REPORT_NAME = "fm_report.json"
+
+# 延迟直方图每翻一倍分成的桶数，分位数的误差约 9%
+_BUCKETS_PER_DOUBLING = 8
+
+# 报告中列出的函数/分配位置数
+_PROFILE_TOP = 20
+
+_END = object()
+
+
+class LatencyHistogram:
+    """按对数分桶的延迟直方图，内存固定，不随文件数增长"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        us = seconds * 1e6
+        index = int(math.log2(us) * _BUCKETS_PER_DOUBLING) if us > 1 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """第 q 百分位的延迟（秒），取所在桶的上界"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * q / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(2 ** ((index + 1) / _BUCKETS_PER_DOUBLING) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class JobStats:
+    """生成过程中各阶段的耗时和计数
+
+    只在主线程中累加：工作线程/子进程返回每个文件各阶段的耗时，由主线程汇总。
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.latency = LatencyHistogram()
+
+    def add(self, stage, seconds, count=1):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + count
+
+    def timed(self, stage, iterable, parent=None):
+        """逐个取出 iterable 的元素并把等待时间计入 stage
+
+        parent 是外层同样被计时的阶段，这段时间从 parent 中扣除，各阶段不重复计算。
+        """
+        it = iter(iterable)
+        clock = time.perf_counter
+        while True:
+            started = clock()
+            item = next(it, _END)
+            elapsed = clock() - started
+            self.add(stage, elapsed, 0 if item is _END else 1)
+            if parent:
+                self.add(parent, -elapsed, 0)
+            if item is _END:
+                return
+            yield item
+
+    def file_done(self, timings):
+        """记录一个文件各阶段的耗时 {阶段: 秒}，总和计入单文件延迟"""
+        total = 0.0
+        for stage, seconds in timings.items():
+            self.add(stage, seconds)
+            total += seconds
+        self.latency.add(total)
+
+    def to_dict(self, result):
+        # 并发时各文件的阶段耗时累加计算，总和可以超过任务用时
+        elapsed = result.elapsed
+        stages = {}
+        for stage in sorted(self.stages, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            seconds = max(self.stages[stage], 0.0)
+            stages[stage] = {
+                "total_s": seconds,
+                "count": self.counts.get(stage, 0),
+                "share": seconds / elapsed if elapsed else 0.0,
+            }
+        return {
+            "elapsed_s": elapsed,
+            "files": result.created,
+            "bytes_written": result.bytes_written,
+            "skipped": result.skipped,
+            "resumed": result.resumed,
+            "failed": result.failed,
+            "files_per_sec": result.created / elapsed if elapsed else 0.0,
+            "mb_per_sec": result.bytes_written / elapsed / (1024 * 1024) if elapsed else 0.0,
+            "stages": stages,
+            "latency": self.latency.to_dict(),
+        }
+
+
+# tracemalloc 是整个进程共用的，同时运行的任务共用一次跟踪
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False
+
+
+class Profiler:
+    """在 cProfile 或 tracemalloc 下运行任务
+
+    cProfile 只分析调用线程；tracemalloc 统计本进程所有线程的内存分配。
+    新建模式的子进程不在分析范围内。
+
+    同时运行的任务（如批量任务的两个队列）都用 tracemalloc 时共用一次跟踪，
+    最后一个结束的任务才停止跟踪，峰值是这段时间内整个进程的峰值。
+    分析本身出错（如 Python 3.12 起同一时间只能启用一个 cProfile）时只在
+    摘要中记下错误，不影响任务。
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self._profile = None
+        self._tracing = False
+        self.error = ""
+
+    def start(self):
+        try:
+            if self.mode == "cprofile":
+                import cProfile
+                profile = cProfile.Profile()
+                profile.enable()
+                self._profile = profile
+            elif self.mode == "tracemalloc":
+                self._start_tracing()
+        except Exception as e:
+            self.error = str(e)
+
+    def _start_tracing(self):
+        global _trace_users, _trace_owned
+        import tracemalloc
+        with _trace_lock:
+            if not _trace_users and not tracemalloc.is_tracing():
+                # 用 python -X tracemalloc 等方式已在跟踪时不接管
+                tracemalloc.start()
+                _trace_owned = True
+            _trace_users += 1
+        self._tracing = True
+
+    def _stop_tracing(self):
+        """取峰值和快照，最后一个使用者停止跟踪"""
+        global _trace_users, _trace_owned
+        import tracemalloc
+        with _trace_lock:
+            try:
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+            finally:
+                self._tracing = False
+                _trace_users -= 1
+                if not _trace_users and _trace_owned:
+                    tracemalloc.stop()
+                    _trace_owned = False
+        return peak, snapshot
+
+    def stop(self, dump_path=None):
+        """停止分析并返回摘要；cProfile 的完整数据保存到 dump_path"""
+        if self.error:
+            return {"mode": self.mode, "error": self.error}
+        if self._profile is not None:
+            import pstats
+            self._profile.disable()
+            summary = {"mode": "cprofile", "file": dump_path, "top": []}
+            if dump_path:
+                try:
+                    self._profile.dump_stats(dump_path)
+                except OSError as e:
+                    summary["file"] = None
+                    summary["error"] = str(e)
+            st = pstats.Stats(self._profile)
+            rows = sorted(st.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:_PROFILE_TOP]:
+                summary["top"].append({
+                    "function": f"{os.path.basename(filename)}:{line}({name})",
+                    "calls": calls,
+                    "total_s": tottime,
+                    "cumulative_s": cumtime,
+                })
+            return summary
+        if self._tracing:
+            peak, snapshot = self._stop_tracing()
+            top = [{
+                "location": f"{os.path.basename(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+                "size_kb": s.size / 1024,
+                "count": s.count,
+            } for s in snapshot.statistics("lineno")[:_PROFILE_TOP]]
+            return {"mode": "tracemalloc", "peak_mb": peak / (1024 * 1024), "top": top}
+        return None
+
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def format_summary(report):
+    """完成提示中显示的简要统计"""
+    if not report:
+        return ""
+    lines = [f"速度: {report['files_per_sec']:.0f} 个文件/秒，{report['mb_per_sec']:.1f} MB/秒"]
+    stages = sorted(report["stages"].items(), key=lambda item: item[1]["total_s"], reverse=True)
+    parts = [f"{STAGE_LABELS.get(stage, stage)} {info['total_s']:.2f} 秒"
+             for stage, info in stages[:3] if info["total_s"] >= 0.005]
+    if parts:
+        lines.append("主要耗时: " + "，".join(parts))
+    latency = report["latency"]
+    if latency["count"]:
+        lines.append(f"单个文件: 中位 {latency['p50_ms']:.2f} ms，p99 {latency['p99_ms']:.2f} ms")
+    if report.get("report_path"):
+        lines.append(f"详细报告: {report['report_path']}")
+    return "\n".join(lines)
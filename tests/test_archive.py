@@ -0,0 +1,99 @@
+import os
+import zipfile
+import zlib
+
+import pytest
+
+from archive import ArchiveWriter, archive_format
+
+
+class _ZeroBlob:
+    """解压后超过 4 GB 的全零内容：同一段压缩数据重复拼接，不用真的压缩 4 GB"""
+
+    def __init__(self, count, chunk=1 << 24):
+        compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+        # 完全刷新后各段互不引用，可以直接重复
+        segment = compressor.compress(bytes(chunk)) + compressor.flush(zlib.Z_FULL_FLUSH)
+        self.raw = segment * count + zlib.compressobj(1, zlib.DEFLATED, -15).flush()
+        self.usize = chunk * count
+        self.crc = 0
+        self.method = 8
+
+
+def test_archive_format():
+    assert archive_format("a.ZIP") == "zip"
+    assert archive_format("a.tar.gz") == "tar.gz"
+    assert archive_format("a.tgz") == "tar.gz"
+    assert archive_format("a.docx") is None
+
+
+def test_zip_roundtrip(tmp_path):
+    path = str(tmp_path / "out.zip")
+    writer = ArchiveWriter(path)
+    text = writer.blob("内容".encode() * 100, "a.txt")
+    docx = writer.blob(b"PK-already-compressed", "b.docx")
+    writer.add("目录/a.txt", text, 1_700_000_000)
+    writer.add("b.docx", docx, 1_700_000_000)
+    writer.add("c.txt", text, 1_700_000_000)
+    writer.close()
+    with zipfile.ZipFile(path) as z:
+        assert z.testzip() is None
+        assert z.namelist() == ["目录/a.txt", "b.docx", "c.txt"]
+        assert z.getinfo("目录/a.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert z.getinfo("b.docx").compress_type == zipfile.ZIP_STORED
+        assert z.read("c.txt") == "内容".encode() * 100
+    assert os.listdir(tmp_path) == ["out.zip"]
+
+
+def test_zip64_entry_count(tmp_path):
+    path = str(tmp_path / "many.zip")
+    writer = ArchiveWriter(path)
+    blob = writer.blob(b"x", "a.txt")
+    for k in range(0x10000 + 5):
+        writer.add(f"{k}.txt", blob, 1_700_000_000)
+    writer.close()
+    with open(path, "rb") as f:
+        assert b"PK\006\006" in f.read()[-200:]
+    with zipfile.ZipFile(path) as z:
+        infos = z.infolist()
+        assert len(infos) == 0x10000 + 5
+        assert z.read(infos[-1]) == b"x"
+
+
+def test_zip64_large_member(tmp_path):
+    path = str(tmp_path / "big.zip")
+    writer = ArchiveWriter(path)
+    big = _ZeroBlob(257)
+    assert big.usize > 0xFFFFFFFF
+    writer.add("big.bin", big, 1_700_000_000)
+    writer.add("small.txt", writer.blob(b"small", "small.txt"), 1_700_000_000)
+    writer.close()
+    with zipfile.ZipFile(path) as z:
+        info = z.getinfo("big.bin")
+        assert info.file_size == big.usize
+        assert info.compress_size == len(big.raw)
+        with z.open(info) as member:
+            assert member.read(1 << 20) == bytes(1 << 20)
+        assert z.read("small.txt") == b"small"
+
+
+def test_abort_removes_temp(tmp_path):
+    writer = ArchiveWriter(str(tmp_path / "out.zip"))
+    writer.add("a.txt", writer.blob(b"a", "a.txt"), 1_700_000_000)
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_tar_roundtrip(tmp_path):
+    import tarfile
+    path = str(tmp_path / "out.tar.gz")
+    writer = ArchiveWriter(path)
+    writer.add("a.txt", writer.blob(b"hello", "a.txt"), 1_700_000_000)
+    writer.close()
+    with tarfile.open(path) as t:
+        assert t.extractfile("a.txt").read() == b"hello"
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveWriter(str(tmp_path / "out.rar"))
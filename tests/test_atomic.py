@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from atomic import TEMP_PREFIX, atomic_write, sweep_temp
+from engine import JobSpec, run_job
+
+
+def _temp_files(directory):
+    return [n for n in os.listdir(directory) if n.startswith(TEMP_PREFIX)]
+
+
+def test_atomic_write_replaces(tmp_path):
+    final = str(tmp_path / "a.txt")
+
+    def produce(path):
+        with open(path, "w") as f:
+            f.write("新")
+    atomic_write(final, produce)
+    assert open(final).read() == "新"
+    assert _temp_files(tmp_path) == []
+
+
+def test_atomic_write_cleans_up_on_error(tmp_path):
+    final = str(tmp_path / "a.txt")
+
+    def produce(path):
+        with open(path, "w") as f:
+            f.write("半")
+        raise OSError("磁盘已满")
+    with pytest.raises(OSError):
+        atomic_write(final, produce)
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="需要硬链接")
+def test_hardlink_rerun_leaves_no_temp_files(tmp_path):
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    spec = JobSpec(mode="copy", source_path=str(source), output_path=str(tmp_path / "out"),
+                   count=3, copy_strategy="hardlink")
+    for _ in range(3):
+        result = run_job(spec)
+        assert result.failed == 0
+        assert _temp_files(spec.output_path) == []
+    if result.copy_strategy == "hardlink":
+        assert os.stat(source).st_nlink == 4
+
+
+def test_sweep_temp_removes_dead_writers_only(tmp_path):
+    dead = tmp_path / f"{TEMP_PREFIX}999999999_0.tmp"
+    mine = tmp_path / f"{TEMP_PREFIX}{os.getpid()}_0.tmp"
+    other = tmp_path / "文档_1.docx"
+    for path in (dead, mine, other):
+        path.write_bytes(b"x")
+    assert sweep_temp(str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([mine.name, other.name])
+    assert sweep_temp(str(tmp_path / "missing")) == 0
+
+
+def test_run_sweeps_leftover_temp_files(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / f"{TEMP_PREFIX}999999999_7.tmp").write_bytes(b"x")
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    run_job(JobSpec(mode="copy", source_path=str(source), output_path=str(out), count=2, resume=True))
+    assert _temp_files(out) == []
+
+
+def test_batch_sync_fsyncs_only_pending_files(tmp_path, monkeypatch):
+    import atomic
+    synced, dirs = [], []
+    monkeypatch.setattr(atomic, "fsync_path", synced.append)
+    monkeypatch.setattr(atomic, "fsync_dir", dirs.append)
+    if hasattr(os, "sync"):
+        monkeypatch.setattr(os, "sync", lambda: pytest.fail("不应刷新整个系统"))
+    monkeypatch.setattr(atomic, "SYNC_BATCH_SIZE", 3)
+    sub = str(tmp_path / "00001")
+    syncer = atomic.BatchSync(str(tmp_path), "batch")
+    paths = [os.path.join(str(tmp_path), "a"), os.path.join(sub, "b"), os.path.join(str(tmp_path), "c"),
+             os.path.join(str(tmp_path), "d")]
+    for path in paths:
+        syncer.committed(path)
+    assert synced == paths[:3]
+    assert sorted(dirs) == sorted([str(tmp_path), sub])
+    syncer.close()
+    assert synced == paths
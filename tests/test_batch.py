@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from batch import load_batch, run_batch
+from engine import JobError
+
+
+def _write(tmp_path, data):
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def _source(tmp_path):
+    (tmp_path / "源.txt").write_text("内容", encoding="utf-8")
+    return "源.txt"
+
+
+def test_dependencies_from_paths(tmp_path):
+    source = _source(tmp_path)
+    jobs = load_batch(_write(tmp_path, {"jobs": [
+        {"name": "a", "mode": "create", "output_path": "out/a"},
+        {"name": "b", "mode": "copy", "source_path": source, "output_path": "out/b"},
+        # 输出目录在 a 里面
+        {"name": "c", "mode": "copy", "source_path": source, "output_path": "out/a/sub"},
+        # 读取 a 的输出
+        {"name": "d", "mode": "copy", "source_path": "out/a/文档_1.docx", "output_path": "out/d"},
+        # 写到 b 读取的位置
+        {"name": "e", "mode": "create", "output_path": "."},
+        {"name": "f", "mode": "create", "output_path": "out/f", "after": ["b"]},
+        {"name": "g", "mode": "create", "output_path": "out/ab"},
+    ]}))
+    # g 的 out/ab 与 a 的 out/a 只是前缀相同，不算嵌套
+    assert [job.after for job in jobs] == [[], [], [0], [0], [0, 1, 2, 3], [1, 4], [4]]
+    assert [job.lane for job in jobs] == ["cpu", "io", "io", "io", "cpu", "cpu", "cpu"]
+
+
+def test_relative_paths_and_defaults(tmp_path):
+    jobs = load_batch(_write(tmp_path, {"defaults": {"count": 5, "excel_path": "名单.xlsx"},
+                                        "jobs": [{"mode": "create", "output_path": "out", "count": 2}]}))
+    spec = jobs[0].spec
+    assert jobs[0].name == "任务1"
+    assert spec.count == 2 and spec.output_path == str(tmp_path / "out")
+    assert spec.excel_path == str(tmp_path / "名单.xlsx")
+
+
+@pytest.mark.parametrize("data", [
+    {"jobs": [{"mode": "create", "output_path": "o", "count": True}]},
+    {"jobs": [{"mode": "create", "output_path": "o", "unknown": 1}]},
+    {"jobs": [{"mode": "move", "output_path": "o"}]},
+    {"jobs": [{"name": "a", "mode": "create", "output_path": "o", "after": ["b"]},
+              {"name": "b", "mode": "create", "output_path": "p"}]},
+    {"jobs": [{"name": "a", "mode": "create", "output_path": "o"},
+              {"name": "a", "mode": "create", "output_path": "p"}]},
+    {"defaults": []},
+])
+def test_invalid_batch(tmp_path, data):
+    with pytest.raises(JobError):
+        load_batch(_write(tmp_path, data))
+
+
+def test_failed_job_blocks_dependents_only(tmp_path):
+    source = _source(tmp_path)
+    jobs = load_batch(_write(tmp_path, {"jobs": [
+        {"name": "a", "mode": "copy", "source_path": "不存在.txt", "output_path": "a"},
+        {"name": "b", "mode": "copy", "source_path": source, "output_path": "b", "after": ["a"]},
+        {"name": "c", "mode": "create", "output_path": "c", "count": 2},
+    ]}))
+    result = run_batch(jobs)
+    assert [job.status for job in result.jobs] == ["failed", "blocked", "done"]
+    assert result.failed == 2
+
+
+def test_concurrent_tracemalloc_jobs(tmp_path):
+    source = _source(tmp_path)
+    jobs = load_batch(_write(tmp_path, {"defaults": {"profile": "tracemalloc"}, "jobs": [
+        {"name": "a", "mode": "create", "output_path": "a", "count": 50},
+        {"name": "b", "mode": "copy", "source_path": source, "output_path": "b", "count": 500},
+    ]}))
+    result = run_batch(jobs)
+    assert [job.status for job in result.jobs] == ["done", "done"], [job.error for job in result.jobs]
+    for job in result.jobs:
+        assert "error" not in job.result.stats["profile"]
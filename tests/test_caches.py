@@ -0,0 +1,66 @@
+import caches
+from caches import BoundedCache
+
+
+def test_lru_eviction_by_bytes():
+    cache = BoundedCache(10)
+    cache.put("a", "A", 4)
+    cache.put("b", "B", 4)
+    assert cache.get("a") == "A"
+    cache.put("c", "C", 4)
+    # b 最久未用，被淘汰
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.nbytes == 8 and cache.evictions == 1
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = BoundedCache(10)
+    cache.put("a", "A", 4)
+    cache.put("big", "BIG", 50)
+    assert cache.get("big") == "BIG"
+    assert cache.get("a") is None
+    cache.put("b", "B", 4)
+    assert cache.get("big") is None and cache.get("b") == "B"
+    assert cache.nbytes == 4
+
+
+def test_get_or_load_and_disabled():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return b"data"
+    cache = BoundedCache(100)
+    assert cache.get_or_load("k", load) == b"data"
+    assert cache.get_or_load("k", load) == b"data"
+    assert len(calls) == 1 and cache.hits == 1
+    off = BoundedCache(100, enabled=False)
+    off.get_or_load("k", load)
+    off.get_or_load("k", load)
+    assert len(calls) == 3
+
+
+def test_shared_enables_batch_caches():
+    assert not caches.workbooks.enabled
+    with caches.shared():
+        with caches.shared():
+            assert caches.workbooks.enabled and caches.sources.enabled
+        caches.sources.put("k", b"x", 1)
+        assert caches.sources.enabled
+    assert not caches.sources.enabled and caches.sources.get("k") is None
+
+
+def test_large_template_compiled_once(tmp_path, monkeypatch):
+    import doc_templates
+    monkeypatch.setattr(caches, "templates", BoundedCache(1))
+    compiled = []
+    real = doc_templates.CompiledTemplate
+
+    def counting(file_type):
+        compiled.append(file_type)
+        return real(file_type)
+    monkeypatch.setattr(doc_templates, "CompiledTemplate", counting)
+    for n in range(5):
+        assert doc_templates.render_document(".docx", f"标题{n}")
+    assert compiled == [".docx"]
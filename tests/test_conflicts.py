@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+import data_source
+from conflicts import NameResolver, existing_names, names_are_unique
+from engine import JobSpec, plan_job, run_job
+
+
+def test_names_are_unique():
+    assert names_are_unique("文档_{序号}")
+    assert not names_are_unique("文档")
+    assert not names_are_unique("{序号}_{姓名}", ["数据", "姓名"])
+    assert names_are_unique("{序号}_{日期}", ["数据"])
+
+
+def test_resolver_suffix():
+    resolver = NameResolver("suffix", {"a.txt", "a (2).txt"}, ".txt")
+    assert [resolver.resolve(s) for s in ["a", "a", "b", "b"]] == ["a (3)", "a (4)", "b", "b (2)"]
+
+
+def test_resolver_skip():
+    resolver = NameResolver("skip", {"a.txt"}, ".txt")
+    assert [resolver.resolve(s) for s in ["a", "b", "b", "c"]] == [None, "b", None, "c"]
+
+
+def test_resolver_skip_without_batch_tracking():
+    # 文件名保证互不相同时不记录本批文件名
+    resolver = NameResolver("skip", {"a.txt"}, ".txt", track_batch=False)
+    assert [resolver.resolve(s) for s in ["a", "b", "c"]] == [None, "b", "c"]
+    assert resolver.seen == set()
+
+
+def test_resolver_overwrite_stops_on_batch_duplicate():
+    resolver = NameResolver("overwrite", {"a.txt"}, ".txt")
+    assert resolver.resolve("a") == "a"
+    assert resolver.resolve("b") == "b"
+    with pytest.raises(ValueError, match="b.txt"):
+        resolver.resolve("b")
+
+
+def test_existing_names(tmp_path):
+    (tmp_path / "a.txt").write_text("")
+    assert existing_names(str(tmp_path)) == {os.path.normcase("a.txt")}
+    assert existing_names(str(tmp_path / "missing")) == set()
+    assert existing_names(None) == set()
+
+
+def _data_spec(tmp_path, **kwargs):
+    data = tmp_path / "名单.csv"
+    data.write_text("张三\n李四\n张三\n王五\n", encoding="utf-8")
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    values = dict(mode="copy", source_path=str(source), output_path=str(tmp_path / "out"), count=4,
+                  filename_template="{数据}", enable_data=True, data_source="excel",
+                  excel_path=str(data))
+    values.update(kwargs)
+    return JobSpec(**values)
+
+
+def test_plan_job_reports_conflicts(tmp_path):
+    spec = _data_spec(tmp_path)
+    os.makedirs(spec.output_path)
+    (tmp_path / "out" / "王五.txt").write_text("")
+    report = plan_job(spec, preview=2)
+    assert report.total == 4
+    assert report.preview == ["张三.txt", "李四.txt"]
+    assert (report.duplicate_count, report.duplicates) == (1, ["张三.txt"])
+    assert (report.existing_count, report.existing) == (1, ["王五.txt"])
+    assert report.conflict
+    assert not plan_job(_data_spec(tmp_path, conflict_policy="suffix")).conflict
+
+
+def test_overwrite_duplicate_reads_data_once(tmp_path, monkeypatch):
+    calls = []
+    open_rows = data_source._open_rows
+    monkeypatch.setattr(data_source, "_open_rows", lambda *a: calls.append(a) or open_rows(*a))
+    spec = _data_spec(tmp_path)
+    result = run_job(spec)
+    assert "张三" in result.error
+    assert result.created == 2
+    assert len(calls) == 1
+    # 重名之前的文件已写出，重名的文件没有覆盖前一个
+    assert sorted(os.listdir(spec.output_path)) == ["张三.txt", "李四.txt"]
+
+
+def test_suffix_policy_run(tmp_path):
+    spec = _data_spec(tmp_path, conflict_policy="suffix")
+    assert run_job(spec).created == 4
+    assert sorted(os.listdir(spec.output_path)) == ["张三 (2).txt", "张三.txt", "李四.txt", "王五.txt"]
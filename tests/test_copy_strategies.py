@@ -0,0 +1,140 @@
+import errno
+import os
+
+import pytest
+
+import copy_strategies
+from copy_strategies import STRATEGIES, Copier, Unsupported
+
+MTIME_NS = 1_600_000_000_123_456_789
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "源.bin"
+    path.write_bytes(os.urandom(100_000))
+    os.chmod(path, 0o640)
+    os.utime(path, ns=(MTIME_NS, MTIME_NS))
+    return str(path)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_each_strategy_copies_content_and_metadata(tmp_path, source, strategy):
+    copier = Copier(source, strategy)
+    dst = str(tmp_path / "目标.bin")
+    try:
+        used = copier.copy(dst)
+    finally:
+        copier.close()
+    assert used in copy_strategies.FALLBACKS[strategy]
+    with open(source, "rb") as a, open(dst, "rb") as b:
+        assert a.read() == b.read()
+    st = os.stat(dst)
+    assert st.st_mode & 0o7777 == 0o640
+    assert st.st_mtime_ns == MTIME_NS
+
+
+def test_unsupported_errno_downgrades_once(tmp_path, source, monkeypatch):
+    calls = []
+
+    def reflink(src, dst):
+        calls.append(dst)
+        raise OSError(errno.EOPNOTSUPP, "不支持")
+    monkeypatch.setitem(copy_strategies._IMPLS, "reflink", reflink)
+    copier = Copier(source, "reflink")
+    used = copier.copy(str(tmp_path / "a"))
+    assert used != "reflink" and copier.active == used
+    copier.copy(str(tmp_path / "b"))
+    # 降级后不再探测
+    assert len(calls) == 1
+    assert (tmp_path / "b").read_bytes() == open(source, "rb").read()
+
+
+def test_unsupported_exception_downgrades(tmp_path, source, monkeypatch):
+    def sendfile(src, dst):
+        raise Unsupported("sendfile")
+    monkeypatch.setitem(copy_strategies._IMPLS, "sendfile", sendfile)
+    copier = Copier(source, "sendfile")
+    assert copier.copy(str(tmp_path / "a")) == "copy"
+    assert copier.active == "copy"
+
+
+def test_other_errors_are_raised_without_downgrade(tmp_path, source, monkeypatch):
+    def sendfile(src, dst):
+        raise OSError(errno.ENOSPC, "磁盘已满")
+    monkeypatch.setitem(copy_strategies._IMPLS, "sendfile", sendfile)
+    copier = Copier(source, "sendfile")
+    with pytest.raises(OSError) as info:
+        copier.copy(str(tmp_path / "a"))
+    assert info.value.errno == errno.ENOSPC
+    assert copier.active == "sendfile"
+
+
+def test_full_copy_errors_are_raised(tmp_path, source):
+    copier = Copier(source, "copy")
+    with pytest.raises(OSError):
+        copier.copy(str(tmp_path / "不存在的目录" / "a"))
+
+
+@pytest.mark.parametrize("strategy", ["hardlink", "symlink"])
+def test_links_replace_existing_target(tmp_path, source, strategy):
+    dst = tmp_path / "目标.bin"
+    dst.write_bytes(b"old")
+    copier = Copier(source, strategy)
+    if copier.copy(str(dst)) != strategy:
+        pytest.skip(f"文件系统不支持 {strategy}")
+    assert dst.read_bytes() == open(source, "rb").read()
+    if strategy == "hardlink":
+        assert os.stat(dst).st_ino == os.stat(source).st_ino
+    else:
+        assert os.readlink(dst) == os.path.abspath(source)
+
+
+def test_unknown_strategy(source):
+    with pytest.raises(ValueError):
+        Copier(source, "teleport")
+
+
+@pytest.mark.parametrize("limit", [copy_strategies.FANOUT_MEMORY_LIMIT, 1000])
+def test_payload_write_to(tmp_path, source, monkeypatch, limit):
+    # 上限调小时走 mmap
+    monkeypatch.setattr(copy_strategies, "FANOUT_MEMORY_LIMIT", limit)
+    payload = copy_strategies.SourcePayload(source, os.stat(source))
+    assert (payload._mmap is not None) == (limit == 1000)
+    for name in ("a", "b"):
+        payload.write_to(str(tmp_path / name))
+    payload.close()
+    assert payload._mmap is None and payload.data == b""
+    data = open(source, "rb").read()
+    for name in ("a", "b"):
+        assert (tmp_path / name).read_bytes() == data
+        st = os.stat(tmp_path / name)
+        assert st.st_mode & 0o7777 == 0o640
+        assert st.st_mtime_ns == MTIME_NS
+
+
+def test_payload_empty_source(tmp_path):
+    src = tmp_path / "空"
+    src.write_bytes(b"")
+    payload = copy_strategies.SourcePayload(str(src), os.stat(src))
+    payload.write_to(str(tmp_path / "a"))
+    assert (tmp_path / "a").read_bytes() == b""
+
+
+def test_payload_read_once_in_batch(source, monkeypatch):
+    import caches
+    reads = []
+    read = copy_strategies.SourcePayload._read
+    monkeypatch.setattr(copy_strategies.SourcePayload, "_read", lambda self: reads.append(1) or read(self))
+    with caches.shared():
+        for _ in range(3):
+            copy_strategies.SourcePayload(source, os.stat(source)).close()
+    assert len(reads) == 1
+
+
+def test_fanout_strategy_uses_payload(tmp_path, source):
+    copier = Copier(source, "fanout")
+    assert copier.copy(str(tmp_path / "a")) == "fanout"
+    assert copier.payload() is copier.payload()
+    copier.close()
+    assert (tmp_path / "a").read_bytes() == open(source, "rb").read()
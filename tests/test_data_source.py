@@ -0,0 +1,111 @@
+import re
+import zipfile
+
+import pytest
+
+from data_source import read_rows
+
+
+def _write_csv(path, text, encoding="utf-8"):
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+def _write_xlsx(path, rows, dimension=None):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    if dimension is not None:
+        # 模拟只写 <dimension ref="A1"/> 的程序：其余内容不变
+        src = zipfile.ZipFile(path)
+        items = [(info, src.read(info.filename)) for info in src.infolist()]
+        src.close()
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as out:
+            for info, data in items:
+                if info.filename == "xl/worksheets/sheet1.xml":
+                    data = re.sub(rb'<dimension ref="[^"]*"',
+                                  b'<dimension ref="%s"' % dimension.encode(), data)
+                out.writestr(info, data)
+    return str(path)
+
+
+def test_csv_columns_by_index(tmp_path):
+    path = _write_csv(tmp_path / "d.csv", "a,1,x\nb,2,y\n,,\nc,3,z\n")
+    names, rows = read_rows(path, [0, 2])
+    assert names is None
+    assert list(rows) == [("a", "x"), ("b", "y"), ("c", "z")]
+
+
+def test_csv_header_names(tmp_path):
+    path = _write_csv(tmp_path / "d.csv", "姓名,部门\n张三,财务\n李四,\n", "gbk")
+    names, rows = read_rows(path, ["部门", "姓名"])
+    assert names == ["部门", "姓名"]
+    assert list(rows) == [("财务", "张三"), ("", "李四")]
+
+
+def test_csv_all_header_columns(tmp_path):
+    path = _write_csv(tmp_path / "d.csv", "姓名,,部门\n张三,x,财务\n")
+    names, rows = read_rows(path, None, header=True)
+    assert names == ["姓名", "部门"]
+    assert list(rows) == [("张三", "财务")]
+
+
+def test_unknown_header_column(tmp_path):
+    path = _write_csv(tmp_path / "d.csv", "姓名\n张三\n")
+    with pytest.raises(ValueError):
+        read_rows(path, ["部门"])
+
+
+def test_xlsx_rows(tmp_path):
+    path = _write_xlsx(tmp_path / "d.xlsx", [["姓名", "编号"]] + [[f"员工{n}", n] for n in range(5)])
+    names, rows = read_rows(path, ["编号"])
+    assert names == ["编号"]
+    assert [v for (v,) in rows] == list(range(5))
+
+
+def test_xlsx_stale_dimension(tmp_path):
+    # 文件中记录的范围只有 A1，仍要读出全部 10 行
+    path = _write_xlsx(tmp_path / "d.xlsx", [[f"员工{n}", n] for n in range(10)], dimension="A1")
+    _, rows = read_rows(path, [0, 1])
+    assert list(rows) == [(f"员工{n}", n) for n in range(10)]
+
+
+def test_batch_cache_keeps_selected_columns(tmp_path):
+    import caches
+    path = _write_csv(tmp_path / "a.csv", "a,b,c\n1,2,3\n4,5,6\n")
+    with caches.shared():
+        _, rows = read_rows(path, ["c"], header=True)
+        assert list(rows) == [("3",), ("6",)]
+        (key, (value, _)), = caches.workbooks._items.items()
+        assert value == (["c"], [("3",), ("6",)])
+        hits = caches.workbooks.hits
+        _, rows = read_rows(path, ["c"], header=True)
+        assert list(rows) == [("3",), ("6",)]
+        assert caches.workbooks.hits == hits + 1
+
+
+def test_batch_cache_skips_large_file(tmp_path, monkeypatch):
+    import caches
+    path = _write_csv(tmp_path / "a.csv", "".join(f"{k},{k}\n" for k in range(1000)))
+    monkeypatch.setattr(caches.workbooks, "max_bytes", 1000)
+    with caches.shared():
+        _, rows = read_rows(path, [1])
+        assert len(list(rows)) == 1000
+        assert caches.workbooks.summary()["entries"] == 0
+
+
+def test_short_gbk_file(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_bytes(b"name\n" + "李".encode("gbk"))
+    assert list(read_rows(str(path), [0])[1]) == [("name",), ("李",)]
+
+
+def test_utf8_cut_at_sniff_boundary(tmp_path, monkeypatch):
+    import data_source
+    monkeypatch.setattr(data_source, "_SNIFF_BYTES", 6)
+    path = tmp_path / "a.csv"
+    path.write_bytes("name\n李四\n".encode("utf-8"))
+    assert list(read_rows(str(path), [0])[1]) == [("name",), ("李四",)]
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+
+from doc_templates import _join_split_placeholders, render_document, UserTemplate
+
+
+class _Text:
+    def __init__(self, text):
+        self.text = text
+
+
+def _join(*texts):
+    nodes = [_Text(t) for t in texts]
+    _join_split_placeholders(nodes)
+    return [node.text for node in nodes]
+
+
+def test_join_split_placeholder():
+    assert _join("你好 {姓", "名", "}，欢迎") == ["你好 {姓名}", "", "，欢迎"]
+
+
+def test_join_several_placeholders():
+    assert _join("{a", "}-{", "b}") == ["{a}", "-{b}", ""]
+    assert _join("{a}", "{b", "}") == ["{a}", "{b}", ""]
+
+
+def test_join_leaves_other_text():
+    assert _join("{ 不是占位符", "}") == ["{ 不是占位符", "}"]
+    assert _join("没有", "占位符") == ["没有", "占位符"]
+
+
+def _docx_template(path):
+    docx = pytest.importorskip("docx")
+    doc = docx.Document()
+    paragraph = doc.add_paragraph("尊敬的 ")
+    # Word 里改过格式的占位符会被拆成几段
+    paragraph.add_run("{姓").bold = True
+    paragraph.add_run("名}")
+    paragraph.add_run("：")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "{部门}"
+    doc.sections[0].header.paragraphs[0].text = "页眉 {部门}"
+    doc.add_paragraph("{未提供}")
+    doc.save(path)
+    return str(path)
+
+
+def test_docx_user_template(tmp_path):
+    import docx
+    template = UserTemplate(_docx_template(tmp_path / "t.docx"))
+    assert sorted(template.names) == ["姓名", "未提供", "部门"]
+    doc = docx.Document(io.BytesIO(template.render({"姓名": " 张三 <A&B>", "部门": "财务"})))
+    assert doc.paragraphs[0].text == "尊敬的  张三 <A&B>："
+    assert doc.paragraphs[0].runs[1].bold
+    assert doc.tables[0].cell(0, 0).text == "财务"
+    assert doc.sections[0].header.paragraphs[0].text == "页眉 财务"
+    # 没有取值的占位符原样保留
+    assert doc.paragraphs[-1].text == "{未提供}"
+
+
+def test_pptx_user_template(tmp_path):
+    pptx = pytest.importorskip("pptx")
+    from pptx.util import Inches
+    prs = pptx.Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    frame = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame
+    paragraph = frame.paragraphs[0]
+    for text in ("编号 {", "编号", "}"):
+        paragraph.add_run().text = text
+    path = str(tmp_path / "t.pptx")
+    prs.save(path)
+
+    data = UserTemplate(path).render({"编号": "007"})
+    shape = pptx.Presentation(io.BytesIO(data)).slides[0].shapes[0]
+    assert shape.text_frame.text == "编号 007"
+
+
+@pytest.mark.parametrize("file_type", [".docx", ".pptx"])
+def test_render_document_title(file_type):
+    pytest.importorskip("docx" if file_type == ".docx" else "pptx")
+    data = render_document(file_type, "标题 <1>")
+    if file_type == ".docx":
+        import docx
+        assert docx.Document(io.BytesIO(data)).paragraphs[0].text == "标题 <1>"
+    else:
+        import pptx
+        assert pptx.Presentation(io.BytesIO(data)).slides[0].shapes.title.text == "标题 <1>"
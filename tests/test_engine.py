@@ -0,0 +1,115 @@
+import pytest
+
+from engine import JobSpec, JobError, iter_plan, load_data, parse_data_fields
+from numbering import NumberFormatter
+from skip_rules import SkipRules
+
+
+def _plan(spec):
+    return list(iter_plan(spec, load_data(spec)))
+
+
+@pytest.mark.parametrize("style", ["Arabic", "Chinese", "Roman", "Circle"])
+@pytest.mark.parametrize("skip, multiple, digits", [("", 0, ""), ("5-9,100", 0, "4"), ("", 3, "")])
+def test_plan_names_match_per_index_format(style, skip, multiple, digits):
+    spec = JobSpec(mode="create", count=10000, start_index=1, number_style=style,
+                   filename_template="文档_{序号}", skip_numbers=skip,
+                   skip_multiples=multiple, skip_digits=digits)
+    rules = SkipRules.parse(skip, multiple, digits)
+    formatter = NumberFormatter(style)
+    indexes = []
+    n = 1
+    while len(indexes) < spec.count:
+        if n not in rules:
+            indexes.append(n)
+        n += 1
+    assert _plan(spec) == [(i, "", f"文档_{formatter.format(i)}") for i in indexes]
+
+
+def test_plan_with_manual_data_and_date():
+    spec = JobSpec(mode="create", count=3, filename_template="{日期}_{数据}_{序号}",
+                   enable_data=True, manual_data="通知", use_date=True, date_text="20240101",
+                   body_template="{数据}{序号}")
+    assert _plan(spec) == [(1, "通知1", "20240101_通知_1"),
+                           (2, "通知2", "20240101_通知_2"),
+                           (3, "通知3", "20240101_通知_3")]
+
+
+def test_plan_with_fields(tmp_path):
+    path = tmp_path / "d.csv"
+    path.write_text("姓名,部门\n张三,财务\n李四,人事\n", encoding="utf-8")
+    spec = JobSpec(mode="create", count=2, filename_template="{部门}_{姓名}", enable_data=True,
+                   data_source="excel", excel_path=str(path), data_fields="姓名, 部门")
+    assert [name for _, _, name in _plan(spec)] == ["财务_张三", "人事_李四"]
+    spec.count = 3
+    with pytest.raises(JobError):
+        _plan(spec)
+
+
+def test_parse_data_fields():
+    assert parse_data_fields("姓名=1，部门=3, 编号") == [("姓名", 0), ("部门", 2), ("编号", "编号")]
+    with pytest.raises(JobError):
+        parse_data_fields("姓名=0")
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_data_shortage_reports_created_files(tmp_path, workers):
+    import os
+    from engine import main, run_job
+    pytest.importorskip("docx")
+    data = tmp_path / "three.csv"
+    data.write_text("甲\n乙\n丙\n", encoding="utf-8")
+    spec = JobSpec(mode="create", output_path=str(tmp_path / "out"), count=10, workers=workers,
+                   enable_data=True, data_source="excel", excel_path=str(data))
+    result = run_job(spec)
+    assert result.created == 3
+    assert "数据数量不足" in result.error
+    assert sorted(os.listdir(spec.output_path)) == [f"文档_{k}.docx" for k in (1, 2, 3)]
+    argv = ["create", "-o", str(tmp_path / "cli"), "-n", "10", "--excel", str(data)]
+    assert main(argv) == 1
+
+
+def _runner_spec(tmp_path, name, **kwargs):
+    values = dict(output_path=str(tmp_path / name), count=40, keep_files=True,
+                  skip_numbers="5-9", skip_digits="3")
+    values.update(kwargs)
+    return JobSpec(**values)
+
+
+def test_parallel_copy_matches_sequential(tmp_path):
+    import os
+    from engine import run_job
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    results = {}
+    for workers in (1, 4):
+        spec = _runner_spec(tmp_path, f"out{workers}", mode="copy", source_path=str(source),
+                            workers=workers, filename_template="文件_{序号}")
+        # 目标位置是目录的文件写入失败，不影响其余文件
+        os.makedirs(os.path.join(spec.output_path, "文件_12.txt"))
+        result = run_job(spec)
+        assert result.failed == 1
+        assert result.errors[0]["path"] == os.path.join(spec.output_path, "文件_12")
+        results[workers] = [os.path.relpath(p, spec.output_path) for p in result.files]
+        assert result.created == 39
+    assert results[4] == results[1]
+    assert results[1][:4] == ["文件_1.txt", "文件_2.txt", "文件_4.txt", "文件_10.txt"]
+
+
+def test_process_pool_matches_sequential(tmp_path, monkeypatch):
+    import os
+    import engine
+    pytest.importorskip("docx")
+    # 分成多块交给子进程
+    monkeypatch.setattr(engine, "PROCESS_CHUNK_SIZE", 7)
+    results = {}
+    for workers in (1, 2):
+        spec = _runner_spec(tmp_path, f"out{workers}", mode="create", workers=workers)
+        os.makedirs(os.path.join(spec.output_path, "文档_12.docx"))
+        result = engine.run_job(spec)
+        assert result.failed == 1
+        assert result.errors[0]["path"] == os.path.join(spec.output_path, "文档_12")
+        assert result.created == 39
+        results[workers] = [os.path.relpath(p, spec.output_path) for p in result.files]
+    assert results[2] == results[1]
+    assert results[1][:4] == ["文档_1.docx", "文档_2.docx", "文档_4.docx", "文档_10.docx"]
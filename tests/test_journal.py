@@ -0,0 +1,87 @@
+import json
+import os
+
+from engine import JobSpec, run_job
+from journal import JOURNAL_PREFIX, Journal
+
+
+def _journal_file(directory):
+    names = [n for n in os.listdir(directory) if n.startswith(JOURNAL_PREFIX)]
+    assert len(names) == 1
+    return os.path.join(directory, names[0])
+
+
+def _spec(tmp_path, **kwargs):
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    values = dict(mode="copy", source_path=str(source), output_path=str(tmp_path / "out"),
+                  count=20, filename_template="文件_{序号}", resume=True)
+    values.update(kwargs)
+    return JobSpec(**values)
+
+
+def _stop_after(n):
+    calls = []
+
+    def should_stop():
+        calls.append(1)
+        return len(calls) > n
+    return should_stop
+
+
+def test_resume_skips_finished_files(tmp_path):
+    spec = _spec(tmp_path)
+    first = run_job(spec, should_stop=_stop_after(8))
+    assert first.cancelled and first.created == 8
+    second = run_job(spec)
+    assert second.resumed == 8 and second.created == 12
+    # 全部完成后删除日志
+    assert not any(n.startswith(JOURNAL_PREFIX) for n in os.listdir(spec.output_path))
+
+
+def test_lost_completion_records_keep_names(tmp_path):
+    # 完成记录还在缓冲区里时进程崩溃：输出文件已在，日志中只有开始记录
+    spec = _spec(tmp_path, conflict_policy="suffix")
+    run_job(spec, should_stop=_stop_after(8))
+    path = _journal_file(spec.output_path)
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    kept = [line for line in lines[1:] if len(json.loads(line)) == 1]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines[:1] + kept) + "\n")
+
+    result = run_job(spec)
+    assert result.failed == 0 and result.created == 20
+    names = sorted(os.listdir(spec.output_path))
+    assert names == sorted(f"文件_{n}.txt" for n in range(1, 21))
+
+
+def test_changed_output_is_redone(tmp_path):
+    spec = _spec(tmp_path, count=5)
+    run_job(spec, should_stop=_stop_after(3))
+    with open(os.path.join(spec.output_path, "文件_2.txt"), "a", encoding="utf-8") as f:
+        f.write("改动")
+    result = run_job(spec)
+    assert result.resumed == 2 and result.created == 3
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = Journal(str(tmp_path), "abc")
+    journal.begin("a.txt")
+    journal.record("a.txt", 1, 2, "")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('["b.txt", 3')
+    again = Journal(str(tmp_path), "abc")
+    assert set(again.names()) == {"a.txt"}
+    again.close()
+
+
+def test_report_and_profile_do_not_change_the_job(tmp_path):
+    spec = _spec(tmp_path)
+    run_job(spec, should_stop=_stop_after(5))
+    spec.save_report = True
+    spec.profile = "cprofile"
+    result = run_job(spec)
+    assert result.resumed == 5 and result.created == 15
+    assert os.path.exists(os.path.join(spec.output_path, "fm_report.json"))
@@ -0,0 +1,65 @@
+import pytest
+
+from numbering import NumberFormatter, ROMAN_MAX, number_to_style
+
+STYLES = ["Arabic", "Chinese", "Chinese_Upper", "Circle", "Roman"]
+
+
+@pytest.mark.parametrize("n, lower, upper", [
+    (0, "零", "零"),
+    (10, "十", "壹拾"),
+    (11, "十一", "壹拾壹"),
+    (20, "二十", "贰拾"),
+    (101, "一百零一", "壹佰零壹"),
+    (110, "一百一十", "壹佰壹拾"),
+    (1010, "一千零一十", "壹仟零壹拾"),
+    (10000, "一万", "壹万"),
+    (10010, "一万零一十", "壹万零壹拾"),
+    (100000, "十万", "壹拾万"),
+    (120003, "十二万零三", "壹拾贰万零叁"),
+    (100000001, "一亿零一", "壹亿零壹"),
+    (100010000, "一亿零一万", "壹亿零壹万"),
+    (1000000000000, "一万亿", "壹万亿"),
+])
+def test_chinese(n, lower, upper):
+    assert number_to_style(n, "Chinese") == lower
+    assert number_to_style(n, "Chinese_Upper") == upper
+
+
+def test_roman():
+    assert number_to_style(1, "Roman") == "I"
+    assert number_to_style(14, "Roman") == "XIV"
+    assert number_to_style(1994, "Roman") == "MCMXCIV"
+    assert number_to_style(ROMAN_MAX, "Roman") == "MMMCMXCIX"
+    # 范围外退回阿拉伯数字
+    assert number_to_style(0, "Roman") == "0"
+    assert number_to_style(ROMAN_MAX + 1, "Roman") == str(ROMAN_MAX + 1)
+
+
+def test_circle():
+    assert number_to_style(0, "Circle") == "⓪"
+    assert number_to_style(1, "Circle") == "①"
+    assert number_to_style(21, "Circle") == "㉑"
+    assert number_to_style(50, "Circle") == "㊿"
+    assert number_to_style(51, "Circle") == "51"
+
+
+# 覆盖各张表的边界、节与节之间的进位和表外的退回
+RANGES = [(-12, 30), (0, 60), (95, 130), (990, 1030), (3990, 4010), (9990, 10030),
+          (19990, 20020), (99990, 100030), (109990, 110020), (99999990, 100000020),
+          (100009990, 100010020), (10 ** 20 - 5, 10 ** 20 + 5)]
+
+
+@pytest.mark.parametrize("style", STYLES)
+@pytest.mark.parametrize("start, stop", RANGES)
+def test_format_range_matches_format(style, start, stop):
+    formatter = NumberFormatter(style)
+    assert formatter.format_range(start, stop) == [formatter.format(n) for n in range(start, stop)]
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_format_many_matches_format(style):
+    formatter = NumberFormatter(style)
+    indexes = [3, 4, 5, 9, 48, 49, 50, 51, 52, 7, 9999, 10000, 10001, 3999, 4000, -1, 0]
+    assert formatter.format_many(indexes) == [formatter.format(n) for n in indexes]
+    assert formatter.format_many([]) == []
@@ -0,0 +1,101 @@
+import os
+
+from rename import apply_renames, list_files, resolve_targets
+
+
+def _files(directory, names):
+    for name in names:
+        (directory / name).write_text(name, encoding="utf-8")
+
+
+def _contents(directory):
+    return {name: (directory / name).read_text(encoding="utf-8") for name in os.listdir(directory)}
+
+
+def test_natural_sort(tmp_path):
+    _files(tmp_path, ["f10.txt", "f2.txt", "f1.txt"])
+    (tmp_path / "sub").mkdir()
+    names, others = list_files(str(tmp_path), "*.txt")
+    assert names == ["f1.txt", "f2.txt", "f10.txt"]
+    assert others == {"sub"}
+
+
+def test_own_files_are_not_renamed(tmp_path):
+    _files(tmp_path, ["b.txt", "manifest.csv", ".fm_journal_abc.log", ".fm_tmp_1_2.tmp",
+                      "fm_report.json", "fm_report.prof", ".fm_rename_1_0"])
+    names, others = list_files(str(tmp_path))
+    assert names == ["b.txt"]
+    assert others == set()
+
+
+def test_swap(tmp_path):
+    _files(tmp_path, ["a.txt", "b.txt"])
+    done, errors = apply_renames(str(tmp_path), [("a.txt", "b.txt"), ("b.txt", "a.txt")])
+    assert (done, errors) == (2, [])
+    assert _contents(tmp_path) == {"a.txt": "b.txt", "b.txt": "a.txt"}
+
+
+def test_cycle_and_chain(tmp_path):
+    _files(tmp_path, ["1.txt", "2.txt", "3.txt", "4.txt"])
+    # 1→2→3→1 是循环，4→5 直接改名
+    pairs = [("1.txt", "2.txt"), ("2.txt", "3.txt"), ("3.txt", "1.txt"), ("4.txt", "5.txt")]
+    done, errors = apply_renames(str(tmp_path), pairs)
+    assert (done, errors) == (4, [])
+    assert _contents(tmp_path) == {"2.txt": "1.txt", "3.txt": "2.txt", "1.txt": "3.txt", "5.txt": "4.txt"}
+
+
+def test_stop_restores_blocked_files(tmp_path):
+    _files(tmp_path, ["a.txt", "b.txt", "c.txt"])
+    # a 改成临时名后停止：它的目标 b 仍被占用，改回原名，不留下临时文件
+    calls = []
+
+    def should_stop():
+        calls.append(None)
+        return len(calls) > 1
+
+    pairs = [("a.txt", "b.txt"), ("b.txt", "c.txt"), ("c.txt", "a.txt")]
+    done, errors = apply_renames(str(tmp_path), pairs, should_stop=should_stop)
+    assert (done, errors) == (0, [])
+    assert _contents(tmp_path) == {"a.txt": "a.txt", "b.txt": "b.txt", "c.txt": "c.txt"}
+
+
+def test_resolve_suffix():
+    targets, dup, existing = resolve_targets(["a.txt", "b.txt", "c.txt"], ["x", "x", "sub"], "suffix", {"sub.txt"})
+    assert targets == ["x.txt", "x (2).txt", "sub (2).txt"]
+    assert (dup, existing) == ([], [])
+
+
+def test_resolve_skip_cascades():
+    # b 与 a 重名被跳过，保留原名 "b.txt"，又占住了 c 的目标
+    targets, _, _ = resolve_targets(["a.txt", "b.txt", "c.txt"], ["x", "x", "b"], "skip", set())
+    assert targets == ["x.txt", None, None]
+
+
+def test_resolve_overwrite_reports():
+    targets, dup, existing = resolve_targets(["a.txt", "b.txt", "c.txt"], ["x", "x", "sub"], "overwrite", {"sub.txt"})
+    assert targets == ["x.txt", "x.txt", "sub.txt"]
+    assert dup == ["x.txt"]
+    assert existing == ["sub.txt"]
+
+
+def test_failed_rollback_is_reported(tmp_path, monkeypatch):
+    _files(tmp_path, ["a.txt", "b.txt", "c.txt"])
+    calls = []
+    rename = os.rename
+
+    def should_stop():
+        calls.append(None)
+        return len(calls) > 1
+
+    def failing_rename(src, dst):
+        # 改回原名失败
+        if os.path.basename(dst) == "a.txt":
+            raise OSError("无法改名")
+        rename(src, dst)
+    monkeypatch.setattr(os, "rename", failing_rename)
+    pairs = [("a.txt", "b.txt"), ("b.txt", "c.txt"), ("c.txt", "a.txt")]
+    done, errors = apply_renames(str(tmp_path), pairs, should_stop=should_stop)
+    assert done == 0
+    (old, error), = errors
+    assert old == "a.txt" and "文件暂存为" in error
+    assert sorted(_contents(tmp_path).values()) == ["a.txt", "b.txt", "c.txt"]
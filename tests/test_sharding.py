@@ -0,0 +1,90 @@
+import csv
+import os
+
+import pytest
+
+import sharding
+from engine import JobError, JobSpec, run_job
+from sharding import MANIFEST_NAME, Manifest, ShardLayout
+
+
+def _manifest(directory):
+    with open(os.path.join(directory, MANIFEST_NAME), newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def _spec(tmp_path, **kwargs):
+    source = tmp_path / "源.txt"
+    source.write_text("内容", encoding="utf-8")
+    values = dict(mode="copy", source_path=str(source), output_path=str(tmp_path / "out"),
+                  count=9, filename_template="文件_{序号}", shard_layout="bucket", shard_size=2)
+    values.update(kwargs)
+    return JobSpec(**values)
+
+
+def test_bucket_and_hash_paths(tmp_path):
+    bucket = ShardLayout(str(tmp_path), "bucket", 1000)
+    assert bucket.path_for(0, "a") == os.path.join("00000", "a")
+    assert bucket.path_for(2500, "a") == os.path.join("00002", "a")
+    hashed = ShardLayout(str(tmp_path), "hash")
+    shard = hashed.shard_for(0, "a")
+    assert hashed.shard_for(99, "a") == shard and hashed.is_shard(shard)
+    assert hashed.path_for(7, "a") == os.path.join(shard, "a")
+    assert sorted(os.listdir(tmp_path)) == ["00000", "00002", shard]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_manifest_sorted_and_rewritten(tmp_path, workers):
+    spec = _spec(tmp_path, workers=workers)
+    for _ in range(2):
+        assert run_job(spec).created == 9
+        rows = _manifest(spec.output_path)
+        assert rows == [[str(k), f"文件_{k + 1}.txt", f"{k // 2:05d}/文件_{k + 1}.txt"] for k in range(9)]
+
+
+def test_manifest_lists_resumed_files(tmp_path):
+    spec = _spec(tmp_path, resume=True)
+    calls = []
+    run_job(spec, should_stop=lambda: calls.append(1) or len(calls) > 4)
+    assert len(_manifest(spec.output_path)) == 4
+    result = run_job(spec)
+    assert result.resumed == 4 and result.created == 5
+    assert [row[0] for row in _manifest(spec.output_path)] == [str(k) for k in range(9)]
+
+
+def test_layout_change_is_detected(tmp_path):
+    run_job(_spec(tmp_path))
+    with pytest.raises(JobError):
+        run_job(_spec(tmp_path, shard_size=3))
+    with pytest.raises(JobError):
+        run_job(_spec(tmp_path, shard_layout="hash"))
+    # 没有写出任何文件
+    assert sorted(os.listdir(tmp_path / "out")) == ["00000", "00001", "00002", "00003", "00004",
+                                                    MANIFEST_NAME]
+
+
+def test_manifest_spills_sorted_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, "_RUN_ROWS", 3)
+    manifest = Manifest(str(tmp_path))
+    for seq in [5, 1, 9, 0, 7, 3, 2, 8, 6, 4]:
+        manifest.add(seq, os.path.join("00000", f"f{seq}"))
+    manifest.close()
+    assert [int(row[0]) for row in _manifest(str(tmp_path))] == list(range(10))
+    assert sorted(os.listdir(tmp_path)) == [MANIFEST_NAME]
+
+
+def test_manifest_keeps_skipped_and_earlier_files(tmp_path):
+    from dataclasses import replace
+    spec = _spec(tmp_path, count=5)
+    run_job(spec)
+    result = run_job(replace(spec, count=8, conflict_policy="skip"))
+    assert (result.skipped, result.created) == (5, 3)
+    expected = [[str(k), f"文件_{k + 1}.txt", f"{k // 2:05d}/文件_{k + 1}.txt"] for k in range(8)]
+    assert _manifest(spec.output_path) == expected
+    # 这次生成得更少，上次多出的文件仍在目录中，也仍在清单中
+    run_job(replace(spec, count=3))
+    assert _manifest(spec.output_path) == expected
+    # 已删除的文件不再列出
+    os.remove(os.path.join(spec.output_path, "00003", "文件_8.txt"))
+    run_job(replace(spec, count=3))
+    assert _manifest(spec.output_path) == expected[:7]
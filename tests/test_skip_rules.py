@@ -0,0 +1,69 @@
+import itertools
+
+import pytest
+
+from skip_rules import SkipRules
+
+
+def _brute(intervals, multiple, digits):
+    def skipped(n):
+        if multiple > 1 and n % multiple == 0:
+            return True
+        if any(d in str(abs(n)) for d in digits):
+            return True
+        return any(min(a, b) <= n <= max(a, b) for a, b in intervals)
+    return skipped
+
+
+CASES = [
+    ([], 0, ""),
+    ([(1, 5), (3, 9), (20, 20), (11, 12)], 0, ""),
+    ([], 3, ""),
+    ([], 0, "4"),
+    ([], 0, "09"),
+    ([(95, 130)], 7, "4"),
+    ([(1, 1), (10, 0)], 2, "19"),
+]
+
+
+@pytest.mark.parametrize("intervals, multiple, digits", CASES)
+def test_membership_matches_brute_force(intervals, multiple, digits):
+    rules = SkipRules(intervals, multiple, digits)
+    skipped = _brute(intervals, multiple, digits)
+    for n in range(-30, 2000):
+        assert (n in rules) == skipped(n), n
+
+
+@pytest.mark.parametrize("intervals, multiple, digits", CASES)
+@pytest.mark.parametrize("start", [-5, 0, 1, 38, 399, 1000])
+def test_iter_valid_matches_brute_force(intervals, multiple, digits, start):
+    rules = SkipRules(intervals, multiple, digits)
+    skipped = _brute(intervals, multiple, digits)
+    expected = list(itertools.islice((n for n in itertools.count(start) if not skipped(n)), 300))
+    assert list(itertools.islice(rules.iter_valid(start), 300)) == expected
+
+
+def test_next_valid_jumps_over_large_range():
+    rules = SkipRules.parse("1-1000000000")
+    assert rules.next_valid(1) == 1000000001
+    assert len(rules.starts) == 1
+
+
+def test_next_valid_carries_past_forbidden_digits():
+    rules = SkipRules(digits="9")
+    assert rules.next_valid(9) == 10
+    assert rules.next_valid(899) == 1000
+    assert rules.next_valid(8999999) == 10000000
+
+
+def test_parse():
+    rules = SkipRules.parse("1，3, 5-7,7-9,20-18")
+    assert list(zip(rules.starts, rules.ends)) == [(1, 1), (3, 3), (5, 9), (18, 20)]
+    assert not SkipRules.parse("")
+    with pytest.raises(ValueError):
+        SkipRules.parse("1,a")
+
+
+def test_all_digits_forbidden():
+    with pytest.raises(ValueError):
+        SkipRules(digits="123456789")
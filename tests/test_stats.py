@@ -0,0 +1,94 @@
+import threading
+import tracemalloc
+
+import pytest
+
+import engine
+from engine import JobSpec, run_job
+from stats import JobStats, LatencyHistogram, Profiler, format_summary
+
+
+def test_latency_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.add(ms / 1000)
+    # 分桶误差约 9%，并且不超过最大值
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.1)
+    assert histogram.percentile(99) == pytest.approx(0.099, rel=0.1)
+    assert histogram.percentile(100) == pytest.approx(0.100)
+    assert histogram.to_dict()["count"] == 100
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_timed_moves_time_out_of_parent():
+    stats = JobStats()
+    stats.add("plan", 1.0, 0)
+    assert list(stats.timed("load", [1, 2, 3], parent="plan")) == [1, 2, 3]
+    assert stats.counts["load"] == 3
+    assert stats.stages["load"] + stats.stages["plan"] == pytest.approx(1.0)
+
+
+def test_tracemalloc_profilers_overlap():
+    first, second = Profiler("tracemalloc"), Profiler("tracemalloc")
+    first.start()
+    second.start()
+    assert first.stop()["mode"] == "tracemalloc"
+    # 另一个分析还在进行，跟踪不能停
+    assert tracemalloc.is_tracing()
+    summary = second.stop()
+    assert "error" not in summary and summary["peak_mb"] >= 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracemalloc_profilers_in_threads():
+    errors = []
+
+    def run():
+        profiler = Profiler("tracemalloc")
+        profiler.start()
+        data = [bytes(100) for _ in range(1000)]
+        summary = profiler.stop()
+        if "error" in summary or not data:
+            errors.append(summary)
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_error_does_not_fail_the_job(tmp_path, monkeypatch):
+    import pstats
+
+    def broken(*args):
+        raise RuntimeError("分析失败")
+    monkeypatch.setattr(pstats, "Stats", broken)
+    result = run_job(JobSpec(mode="create", output_path=str(tmp_path), count=2, profile="cprofile"))
+    assert result.created == 2 and result.failed == 0
+    assert result.stats["profile"] == {"mode": "cprofile", "error": "分析失败"}
+
+
+def test_report_written(tmp_path):
+    result = run_job(JobSpec(mode="create", output_path=str(tmp_path), count=3, save_report=True,
+                             profile="cprofile"))
+    assert result.stats["files"] == 3
+    assert (tmp_path / "fm_report.json").exists() and (tmp_path / "fm_report.prof").exists()
+    assert "速度" in format_summary(result.stats)
+    assert engine.report_path(JobSpec(archive_path="a.zip")) == "a.zip.report.json"
+
+
+def test_setup_is_not_counted_as_load(tmp_path, monkeypatch):
+    import time
+    data = tmp_path / "名单.csv"
+    data.write_text("甲\n乙\n", encoding="utf-8")
+    # 清理临时文件等准备工作不算读取数据
+    monkeypatch.setattr(engine, "sweep_temp", lambda directory: time.sleep(0.2))
+    result = run_job(JobSpec(mode="create", output_path=str(tmp_path / "out"), count=2,
+                             enable_data=True, data_source="excel", excel_path=str(data)))
+    stages = result.stats["stages"]
+    assert list(stages)[:3] == ["setup", "load", "plan"]
+    assert stages["setup"]["total_s"] >= 0.2
+    assert stages["load"]["total_s"] < 0.2
+    assert stages["load"]["count"] == 2
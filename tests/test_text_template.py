@@ -0,0 +1,39 @@
+from conflicts import names_are_unique
+from text_template import TextTemplate
+
+
+def test_render_by_position():
+    template = TextTemplate("{部门}-{姓名}_{序号}", {"序号": 0, "姓名": 2, "部门": 3})
+    assert template.render(("1", "", "张三", "财务")) == "财务-张三_1"
+    assert template.names == ["部门", "姓名", "序号"]
+
+
+def test_unknown_placeholders_and_braces_kept():
+    template = TextTemplate("{未知}_{序号}_{}_{{x}}", {"序号": 0})
+    assert template.render(("7",)) == "{未知}_7_{}_{{x}}"
+    assert template.placeholders == ["未知", "序号", "", "x"]
+
+
+def test_static_template():
+    template = TextTemplate("固定名称", {"序号": 0})
+    assert template.static
+    assert template.render(("1",)) == "固定名称"
+    assert template.render_many([("1",), ("2",)]) == ["固定名称", "固定名称"]
+
+
+def test_values_with_braces_are_not_formatted():
+    template = TextTemplate("{数据}", {"数据": 0})
+    assert template.render(("{0}{x}",)) == "{0}{x}"
+
+
+def test_render_many_matches_render():
+    template = TextTemplate("{日期}_{序号}", {"序号": 0, "日期": 1})
+    rows = [(str(n), "20240101") for n in range(5)]
+    assert template.render_many(rows) == [template.render(row) for row in rows]
+
+
+def test_names_are_unique():
+    assert names_are_unique("文档_{序号}")
+    assert not names_are_unique("文档")
+    assert not names_are_unique("{数据}_{序号}", ["数据"])
+    assert names_are_unique("{日期}_{序号}", ["数据"])
@@ -0,0 +1,47 @@
+import re
+
+_PLACEHOLDER = re.compile(r"\{([^{}]*)\}")
+
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+class TextTemplate:
+    """编译好的 {名称} 模板
+
+    编译时把模板转换成以位置编号引用的 str.format 格式串，每次渲染只调用一次
+    format，不再对每个占位符各做一次 str.replace。positions 给出可用的占位符
+    在值元组中的位置，不在其中的 {xxx} 原样保留。
+    """
+
+    def __init__(self, template, positions):
+        self.template = template
+        parts = _PLACEHOLDER.split(template)
+        fmt = []
+        self.names = []
+        for k, part in enumerate(parts):
+            if k % 2 == 0:
+                fmt.append(_escape(part))
+            elif part in positions:
+                fmt.append(f"{{{positions[part]}}}")
+                self.names.append(part)
+            else:
+                fmt.append(_escape("{" + part + "}"))
+        self.format = "".join(fmt)
+        # 模板中出现的全部占位符名（含未知的）
+        self.placeholders = parts[1::2]
+        # 不含任何占位符时直接返回原文
+        self.static = not self.names
+
+    def render(self, values):
+        if self.static:
+            return self.template
+        return self.format.format(*values)
+
+    def render_many(self, rows):
+        """一次渲染多组值，返回列表"""
+        if self.static:
+            return [self.template] * len(rows)
+        fmt = self.format.format
+        return [fmt(*values) for values in rows]